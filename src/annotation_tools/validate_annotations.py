@@ -1,23 +1,31 @@
+import argparse
 import os
-import numpy as np
 import sys
 from pathlib import Path
 
 try:
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import add_filter_args, filters_from_args, load_index, select_videos
+    from utils.label_cache import load_labels
     from utils.paths import project_paths
 except ModuleNotFoundError:
     # Allow direct execution from src/annotation_tools.
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import add_filter_args, filters_from_args, load_index, select_videos
+    from utils.label_cache import load_labels
     from utils.paths import project_paths
 
-def validate_annotations():
+def validate_annotations(filters=None):
     """
     Ověří, že počet labelů odpovídá počtu snímků v NPY souborech
+    (seznam videí a počty snímků z indexu datasetu, `filters` viz select_videos)
     """
     paths = project_paths(__file__)
     features_dir = str(paths["features_enhanced"])
     labels_dir = str(paths["labels"])
+    index = load_index(features_dir, labels_dir)
     
     print("\n" + "="*80)
     print("VALIDACE SYNCHRONIZACE: Features vs Labels")
@@ -26,34 +34,30 @@ def validate_annotations():
     errors = []
     validated = 0
     
-    for root, dirs, files in os.walk(features_dir):
-        for file in files:
-            if file.endswith(".npy"):
-                npy_path = os.path.join(root, file)
-                
-                # Najdi odpovídající label file
-                rel_path = os.path.relpath(root, features_dir)
-                label_dir = os.path.join(labels_dir, rel_path)
-                label_path = os.path.join(label_dir, os.path.splitext(file)[0] + ".txt")
-                
-                if not os.path.exists(label_path):
-                    errors.append(f"❌ {file}: Chybí anotace ({label_path})")
-                    continue
-                
-                # Načti počet snímků
-                features = np.load(npy_path)
-                num_features = features.shape[0]
-                
-                with open(label_path, 'r') as f:
-                    labels = [int(line.strip()) for line in f if line.strip()]
-                num_labels = len(labels)
-                
-                # Validace
-                if num_features == num_labels:
-                    validated += 1
-                    print(f"✓ {file}: {num_features} snímků = {num_labels} labelů")
-                else:
-                    errors.append(f"❌ {file}: {num_features} snímků ≠ {num_labels} labelů (rozdíl: {abs(num_features - num_labels)})")
+    for rel, video in select_videos(index, labeled=None, **(filters or {})):
+        npy_path = os.path.join(features_dir, rel)
+        file = os.path.basename(rel)
+        
+        # Najdi odpovídající label file
+        if video["label"] is None:
+            label_path = os.path.join(labels_dir, os.path.splitext(rel)[0] + ".txt")
+            errors.append(f"❌ {file}: Chybí anotace ({label_path})")
+            continue
+        label_path = os.path.join(labels_dir, video["label"])
+        
+        # Počet snímků z indexu
+        num_features = video["frames"]
+        
+        labels = load_labels(label_path)
+        # Features extrahovane s --target_fps maji jen kazdy N-ty snimek.
+        num_labels = len(align_labels(labels, npy_path, stride=video["frame_stride"]))
+        
+        # Validace
+        if num_features == num_labels:
+            validated += 1
+            print(f"✓ {file}: {num_features} snímků = {num_labels} labelů")
+        else:
+            errors.append(f"❌ {file}: {num_features} snímků ≠ {num_labels} labelů (rozdíl: {abs(num_features - num_labels)})")
     
     print("\n" + "="*80)
     print("VÝSLEDKY VALIDACE")
@@ -71,4 +75,6 @@ def validate_annotations():
     print("="*80 + "\n")
 
 if __name__ == "__main__":
-    validate_annotations()
+    parser = argparse.ArgumentParser(description="Validace poctu labelu vs. snimku features")
+    add_filter_args(parser)
+    validate_annotations(filters_from_args(parser.parse_args()))
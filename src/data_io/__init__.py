@@ -1 +1 @@
-from .dataset import InhalerDataset
+from .dataset import InhalerDataset, PackedInhalerDataset, WindowedDataset, make_dataset
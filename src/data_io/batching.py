@@ -0,0 +1,96 @@
+import random
+
+import torch
+from torch.utils.data import Sampler
+
+# Davky z videi podobne delky: misto paddingu vsech vzorku na max_len se kazda davka
+# doplni jen na nejdelsi video v ni (pad_collate), MS-TCN i ASFormer tak nepocitaji
+# nad stovkami snimku paddingu.
+
+
+class LengthBucketBatchSampler(Sampler):
+    """
+    Kazdou epochu: nahodne zamicha vzorky, rozdeli je do skupin po `batch_size * bucket_batches`,
+    uvnitr skupiny seradi podle delky a rozreze na davky; poradi davek se znovu zamicha.
+    Davky tak obsahuji videa podobne delky, ale nejsou v kazde epose stejne.
+    """
+
+    def __init__(self, lengths, batch_size, bucket_batches=50, shuffle=True, drop_last=False, seed=None):
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.bucket_batches = bucket_batches
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.rng = random.Random(seed)
+
+    def batches(self, rng=None):
+        """Davky jedne epochy; s vlastnim `rng` (napr. pro diagnostiku) se stav sampleru nezmeni."""
+        rng = rng or self.rng
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        bucket_size = self.batch_size * self.bucket_batches
+        batches = []
+        for start in range(0, len(indices), bucket_size):
+            bucket = sorted(indices[start : start + bucket_size], key=self.lengths.__getitem__)
+            for i in range(0, len(bucket), self.batch_size):
+                batch = bucket[i : i + self.batch_size]
+                if len(batch) == self.batch_size or not self.drop_last:
+                    batches.append(batch)
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.lengths) // self.batch_size
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+def pad_collate(samples):
+    """
+    Vzorky (features (C, t), labely (t,), delka) z datasetu s pad=False ->
+    (data (B, C, T), target (B, T), lengths (B,), mask (B, T)), T = nejdelsi vzorek v davce.
+    Padding: features 0, labely -100, mask False.
+    """
+    lengths = torch.tensor([int(length) for _, _, length in samples], dtype=torch.long)
+    t_max = int(lengths.max()) if len(samples) else 0
+    channels = samples[0][0].shape[0] if samples else 0
+    data = torch.zeros((len(samples), channels, t_max), dtype=torch.float32)
+    target = torch.full((len(samples), t_max), -100, dtype=torch.long)
+    for i, (features, labels, length) in enumerate(samples):
+        data[i, :, :length] = features[:, :length]
+        target[i, :length] = labels[:length]
+    mask = torch.arange(t_max).unsqueeze(0) < lengths.unsqueeze(1)
+    return data, target, lengths, mask
+
+
+def padding_ratio(batches, lengths, pad_to=None):
+    """
+    Podil paddingu (0-1) ve vsech davkach: kazda davka se doplni na `pad_to`
+    (pevny max_len), nebo na nejdelsi vzorek v davce.
+    """
+    used = padded = 0
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        used += sum(batch_lengths)
+        padded += len(batch) * (pad_to if pad_to is not None else max(batch_lengths))
+    return 0.0 if padded == 0 else 1.0 - used / padded
+
+
+def describe_padding(lengths, batch_size, max_len, sampler):
+    """
+    Text pro log: padding s pevnym max_len, s nahodnymi davkami a s bucketingem.
+    Pouziva vlastni generator, poradi davek treninku tak nezavisi na tom, jestli se diagnostika vypsala.
+    """
+    shuffled = list(range(len(lengths)))
+    random.Random(0).shuffle(shuffled)
+    random_batches = [shuffled[i : i + batch_size] for i in range(0, len(shuffled), batch_size)]
+    return (
+        f"Padding: pevny max_len={max_len} {padding_ratio(random_batches, lengths, pad_to=max_len):.1%}"
+        f" | nahodne davky {padding_ratio(random_batches, lengths):.1%}"
+        f" | bucketing {padding_ratio(sampler.batches(rng=random.Random(0)), lengths):.1%}"
+    )
@@ -1,47 +1,211 @@
 import os
+import random
 
 import numpy as np
 import torch
 from torch.utils.data import Dataset
 
+from data_io.sample_cache import SharedSampleCache
+from utils.dataset_index import load_index, select_videos, video_matches
+from utils.feature_store import load_features
+from utils.label_cache import load_labels
+from utils.packed_store import PackedFeatures, packed_root_for
+
+
+def pad_sample(features, labels, max_len, transform=None, pad=True):
+    """
+    (C, T) features + labely -> tensory dlouhe `max_len` (padding 0 / -100) a skutecna delka.
+    S `pad=False` se jen orizne na max_len a doplni se az v davce (data_io.batching.pad_collate).
+    """
+    if transform is not None:
+        features = transform(features)
+
+    t_steps = features.shape[1]
+    t_eff = min(t_steps, max_len)
+    target_len = max_len if pad else t_eff
+
+    if t_steps < target_len:
+        pad_width = target_len - t_steps
+        features = np.pad(features, ((0, 0), (0, pad_width)), mode="constant")
+    else:
+        features = features[:, :target_len]
+    # Labely zvlast: jejich pocet se muze od poctu snimku features lisit.
+    labels = np.pad(labels[:target_len], (0, max(target_len - len(labels), 0)), mode="constant", constant_values=-100)
+
+    return torch.from_numpy(np.ascontiguousarray(features)).float(), torch.from_numpy(labels).long(), t_eff
+
 
 class InhalerDataset(Dataset):
-    def __init__(self, features_dir, labels_dir, max_len=2000):
+    """
+    `transform` (napr. data_io.transforms.build_transform) se aplikuje na features
+    (C, T) kazdeho vzorku hned po nacteni, pred paddingem.
+    `pad=False`: vzorky se nedoplnuji na max_len (pro pad_collate).
+    `cache` (data_io.sample_cache.SharedSampleCache): nactena videa se drzi ve sdilene
+    pameti pro vsechny DataLoader workery, dalsi epochy uz necetou disk.
+    Seznam videi je z indexu datasetu (utils/dataset_index.py), `filters` viz select_videos.
+    """
+
+    def __init__(self, features_dir, labels_dir, max_len=2000, transform=None, pad=True, cache=None, filters=None):
         self.features_dir = features_dir
         self.labels_dir = labels_dir
         self.max_len = max_len
-        self.data_list = self._get_data_list()
+        self.transform = transform
+        self.pad = pad
+        self.cache = cache
+        self.filters = filters or {}
+        self.data_list, self._frames, self._strides = self._get_data_list()
 
     def _get_data_list(self):
+        index = load_index(self.features_dir, self.labels_dir)
         samples = []
-        for root, _, files in os.walk(self.features_dir):
-            for file in files:
-                if file.endswith(".npy"):
-                    rel_path = os.path.relpath(os.path.join(root, file), self.features_dir)
-                    label_file = os.path.join(self.labels_dir, rel_path.replace(".npy", ".txt"))
-                    if os.path.exists(label_file):
-                        samples.append((os.path.join(root, file), label_file))
-        return samples
+        frames = []
+        strides = []
+        for rel, video in select_videos(index, **self.filters):
+            samples.append((os.path.join(self.features_dir, rel), os.path.join(self.labels_dir, video["label"])))
+            frames.append(video["frames"])
+            strides.append(video["frame_stride"])
+        return samples, frames, strides
 
     def __len__(self):
         return len(self.data_list)
 
-    def __getitem__(self, idx):
+    def frames(self):
+        """Pocet snimku kazdeho videa (bez orezu), z indexu bez nacteni features."""
+        return self._frames
+
+    def lengths(self):
+        """Delka kazdeho vzorku (snimky oriznute na max_len)."""
+        return [min(frames, self.max_len) for frames in self.frames()]
+
+    def load_window(self, idx, start, stop):
+        """Features (C, stop-start) a labely snimku [start, stop) videa `idx`, bez transformaci a paddingu."""
         feature_path, label_path = self.data_list[idx]
+        stride = self._strides[idx]
+
+        if self.cache is not None:
+            # V cache je cele video, aby ho sdilela vsechna okna.
+            cached = self.cache.get(idx)
+            if cached is None:
+                cached = (load_features(feature_path), load_labels(label_path)[::stride])
+                self.cache.put(idx, cached)
+            features, labels = cached
+            return features[start:stop].T, labels[start:stop]
+
+        features = load_features(feature_path, start, stop).T
+        labels = load_labels(label_path)[::stride][start:stop]
+        return features, labels
+
+    def __getitem__(self, idx):
+        features, labels = self.load_window(idx, 0, self.max_len)
+        return pad_sample(features, labels, self.max_len, self.transform, self.pad)
+
+
+class PackedInhalerDataset(Dataset):
+    """
+    Stejne vzorky jako InhalerDataset, ale ze zabaleneho datasetu (utils/packed_store.py):
+    vzorek je jen slice do mmap poli, zadne otevirani ani parsovani souboru v kazde epose.
+    """
 
-        features = np.load(feature_path).T
-        labels = np.loadtxt(label_path, dtype=np.int64)
+    def __init__(self, pack_root, max_len=2000, transform=None, pad=True, filters=None):
+        self.pack_root = pack_root
+        self.max_len = max_len
+        self.transform = transform
+        self.pad = pad
+        self.packed = PackedFeatures(pack_root)
+        self.samples = [
+            i
+            for i, entry in enumerate(self.packed.entries)
+            if video_matches(entry["video"], entry["frames"], **(filters or {}))
+        ]
+
+    def __len__(self):
+        return len(self.samples)
+
+    def frames(self):
+        return [self.packed.entries[i]["frames"] for i in self.samples]
+
+    def lengths(self):
+        return [min(frames, self.max_len) for frames in self.frames()]
+
+    def load_window(self, idx, start, stop):
+        # Jen pohled do mmap; kopie vznikne az pri paddingu/orezu.
+        features, labels = self.packed.sample(self.samples[idx])
+        return features[start:stop].T, labels[start:stop]
+
+    def __getitem__(self, idx):
+        features, labels = self.load_window(idx, 0, self.max_len)
+        return pad_sample(features, labels, self.max_len, self.transform, self.pad)
+
+
+class WindowedDataset(Dataset):
+    """
+    Okna delky `window` misto orezu videa na max_len, aby se trenovalo na vsech snimcich
+    pri stale stejne velikosti davky. Okna jsou jen polozky indexu (video, start), data
+    se ctou az v __getitem__ pres base.load_window.
+      mode="sliding": pevna okna s krokem `stride` (posledni okno konci koncem videa)
+      mode="random": ceil(T / window) polozek na video, start kazdeho okna je nahodny
+                     pri kazdem cteni (jina vyrez v kazde epose)
+    """
+
+    MODES = ("sliding", "random")
+
+    def __init__(self, base, window, mode="random", stride=None, pad=True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown window mode: {mode}. Use one of: {list(self.MODES)}")
+        self.base = base
+        self.window = window
+        self.mode = mode
+        self.stride = stride or window
+        self.pad = pad
+        self.windows = self._build_windows(base.frames())
+
+    def _build_windows(self, frames):
+        windows = []
+        for idx, total in enumerate(frames):
+            last = max(total - self.window, 0)
+            if self.mode == "random":
+                windows.extend((idx, None) for _ in range(max(-(-total // self.window), 1)))
+                continue
+            starts = list(range(0, last + 1, self.stride))
+            if starts[-1] != last:
+                starts.append(last)
+            windows.extend((idx, start) for start in starts)
+        return windows
+
+    def __len__(self):
+        return len(self.windows)
 
-        t_steps = features.shape[1]
+    def lengths(self):
+        frames = self.base.frames()
+        return [min(frames[idx] - (start or 0), self.window) for idx, start in self.windows]
 
-        if t_steps < self.max_len:
-            pad_width = self.max_len - t_steps
-            features = np.pad(features, ((0, 0), (0, pad_width)), mode="constant")
-            labels = np.pad(labels, (0, pad_width), mode="constant", constant_values=-100)
-        else:
-            features = features[:, : self.max_len]
-            labels = labels[: self.max_len]
+    def __getitem__(self, i):
+        idx, start = self.windows[i]
+        if start is None:
+            start = random.randint(0, max(self.base.frames()[idx] - self.window, 0))
+        features, labels = self.base.load_window(idx, start, start + self.window)
+        return pad_sample(features, labels, self.window, self.base.transform, self.pad)
 
-        t_eff = min(t_steps, self.max_len)
 
-        return torch.from_numpy(features).float(), torch.from_numpy(labels).long(), t_eff
+def make_dataset(
+    features_dir, labels_dir, max_len=2000, transform=None, packed=True, pad=True, cache_bytes=0, filters=None
+):
+    """
+    PackedInhalerDataset, pokud pro `features_dir` existuje zabaleny dataset
+    (<features_dir>_packed), `packed` je zapnute a dataset odpovida aktualnim features
+    a labelum (PackedFeatures.stale_reason), jinak InhalerDataset nad soubory,
+    s `cache_bytes` > 0 navic se sdilenou cache vzorku (zabaleny dataset ji nepotrebuje,
+    jeho mmap drzi v pameti uz page cache OS).
+    """
+    pack_root = packed_root_for(features_dir)
+    if packed and PackedFeatures.exists(pack_root):
+        reason = PackedFeatures(pack_root).stale_reason()
+        if reason is None:
+            print(f"Pouzit zabaleny dataset: {pack_root}")
+            return PackedInhalerDataset(pack_root, max_len=max_len, transform=transform, pad=pad, filters=filters)
+        print(f"VAROVANI: Zabaleny dataset {pack_root} je zastaraly ({reason}), ctu soubory.")
+        print("          Znovu zabalit: py src/utils/packed_store.py")
+    cache = SharedSampleCache(cache_bytes) if cache_bytes else None
+    return InhalerDataset(
+        features_dir, labels_dir, max_len=max_len, transform=transform, pad=pad, cache=cache, filters=filters
+    )
@@ -0,0 +1,207 @@
+import threading
+import weakref
+from multiprocessing import shared_memory
+from multiprocessing.managers import BaseManager
+
+import numpy as np
+
+# Cache nactenych vzorku ve sdilene pameti: jeden blok `budget_bytes` (multiprocessing.shared_memory)
+# vytvoreny v hlavnim procesu, do ktereho zapisuji a ze ktereho ctou vsechny DataLoader workery.
+# Index (kde ktery vzorek lezi, LRU poradi, citace) drzi objekt v procesu manageru,
+# takze je jeden pro vsechny workery i pri spawn (Windows).
+
+_ALIGN = 64
+
+
+class _CacheIndex:
+    """
+    Alokace v bloku pameti + LRU. Bezi v procesu manageru, volani z workeru chodi pres proxy.
+    Zaznam je behem cteni/zapisu "pripnuty" (pins > 0) a nesmi se vyhodit.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = {}
+        self.clock = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Najde hotovy zaznam a pripne ho; vraci (offset, layout) nebo None (miss)."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or not entry["ready"]:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            self.clock += 1
+            entry["used"] = self.clock
+            entry["pins"] += 1
+            return entry["offset"], entry["layout"]
+
+    def release(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["pins"] -= 1
+
+    def _find_gap(self, nbytes):
+        position = 0
+        for entry in sorted(self.entries.values(), key=lambda e: e["offset"]):
+            if entry["offset"] - position >= nbytes:
+                return position
+            position = _aligned(entry["offset"] + entry["nbytes"])
+        return position if self.capacity - position >= nbytes else None
+
+    def reserve(self, key, nbytes, layout):
+        """
+        Vyhradi misto pro novy zaznam (v pripade potreby vyhodi nejdele nepouzite).
+        Vraci offset, nebo None, kdyz se zaznam nevejde nebo uz ho zapisuje jiny worker.
+        """
+        with self._lock:
+            if key in self.entries or nbytes > self.capacity:
+                if nbytes > self.capacity:
+                    self.counters["rejected"] += 1
+                return None
+            offset = self._find_gap(nbytes)
+            while offset is None:
+                victims = [k for k, e in self.entries.items() if e["ready"] and e["pins"] == 0]
+                if not victims:
+                    self.counters["rejected"] += 1
+                    return None
+                del self.entries[min(victims, key=lambda k: self.entries[k]["used"])]
+                self.counters["evictions"] += 1
+                offset = self._find_gap(nbytes)
+            self.clock += 1
+            self.entries[key] = {
+                "offset": offset,
+                "nbytes": nbytes,
+                "layout": layout,
+                "used": self.clock,
+                "pins": 0,
+                "ready": False,
+            }
+            return offset
+
+    def commit(self, key):
+        with self._lock:
+            self.entries[key]["ready"] = True
+
+    def abort(self, key):
+        """Zrusi rezervaci, jejiz zapis selhal (jinak by misto i klic zustaly blokovane navzdy)."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and not entry["ready"]:
+                del self.entries[key]
+
+    def stats(self):
+        with self._lock:
+            used = sum(e["nbytes"] for e in self.entries.values())
+            return {**self.counters, "entries": len(self.entries), "bytes": used, "capacity": self.capacity}
+
+
+class _CacheManager(BaseManager):
+    pass
+
+
+_CacheManager.register("CacheIndex", _CacheIndex)
+
+
+def _aligned(value):
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _release(shm, manager):
+    shm.close()
+    shm.unlink()
+    manager.shutdown()
+
+
+class SharedSampleCache:
+    """
+    LRU cache vzorku (tuple NumPy poli) se spolecnym rozpoctem `budget_bytes` pro vsechny procesy.
+    Vytvari se v hlavnim procesu pred DataLoaderem; do workeru se predava picklem (jen jmeno
+    bloku a proxy indexu). get() vraci kopie poli, ktere jsou po navratu nezavisle na cache.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = int(budget_bytes)
+        self._manager = _CacheManager()
+        self._manager.start()
+        self._index = self._manager.CacheIndex(self.budget_bytes)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(self.budget_bytes, 1))
+        self.name = self._shm.name
+        self._finalizer = weakref.finalize(self, _release, self._shm, self._manager)
+
+    def __getstate__(self):
+        return {"budget_bytes": self.budget_bytes, "name": self.name, "_index": self._index}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+        self._manager = None
+        self._finalizer = None
+
+    def _buffer(self):
+        if self._shm is None:
+            # Workery sdili resource tracker s hlavnim procesem, blok smaze az hlavni proces (close / konec).
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return self._shm.buf
+
+    def get(self, key):
+        found = self._index.acquire(key)
+        if found is None:
+            return None
+        offset, layout = found
+        try:
+            buffer = self._buffer()
+            arrays = []
+            for shape, dtype, start, nbytes in layout:
+                view = np.frombuffer(buffer, dtype=dtype, count=nbytes // np.dtype(dtype).itemsize, offset=offset + start)
+                arrays.append(view.reshape(shape).copy())
+            return tuple(arrays)
+        finally:
+            self._index.release(key)
+
+    def put(self, key, arrays):
+        """Ulozi pole pod `key`; kdyz se nevejdou (nebo je prave uklada jiny worker), nic se nestane."""
+        arrays = [np.ascontiguousarray(a) for a in arrays]
+        layout = []
+        nbytes = 0
+        for array in arrays:
+            nbytes = _aligned(nbytes)
+            layout.append((array.shape, array.dtype.str, nbytes, array.nbytes))
+            nbytes += array.nbytes
+        offset = self._index.reserve(key, nbytes, layout)
+        if offset is None:
+            return False
+        try:
+            buffer = self._buffer()
+            for array, (_, _, start, size) in zip(arrays, layout):
+                buffer[offset + start : offset + start + size] = array.reshape(-1).view(np.uint8)
+        except BaseException:
+            self._index.abort(key)
+            raise
+        self._index.commit(key)
+        return True
+
+    def stats(self):
+        """Citace hits / misses / evictions / rejected a obsazenost (entries, bytes, capacity)."""
+        return self._index.stats()
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+        elif self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def format_cache_stats(stats):
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups if lookups else 0.0
+    return (
+        f"Cache vzorku: hit {stats['hits']} / miss {stats['misses']} ({hit_rate:.0%})"
+        f" | {stats['entries']} vzorku, {stats['bytes'] / 1e6:.0f}/{stats['capacity'] / 1e6:.0f} MB"
+        f" | vyhozeno {stats['evictions']}"
+    )
@@ -0,0 +1,167 @@
+import json
+import os
+
+import numpy as np
+
+from preprocessing.normalize_features import normalize_skeleton
+from utils.feature_stats import load_stats, stats_path_for, zscore_params
+
+# Transformace features az po nacteni (misto materializovanych kopii typu data/features_norm).
+# Pracuji s tvarem (..., C, T) jako vstup modelu: jeden vzorek z InhalerDataset (C, T)
+# i cela davka (B, C, T), NumPy i torch tensor (CPU i GPU). Trenink ulozi seznam
+# transformaci vedle checkpointu a inference/eval ho nacte, takze oba pouzivaji stejny kod.
+
+
+class Compose:
+    def __init__(self, transforms):
+        self.transforms = list(transforms)
+
+    def __call__(self, x):
+        for transform in self.transforms:
+            x = transform(x)
+        return x
+
+    def spec(self):
+        return [transform.spec() for transform in self.transforms]
+
+    def __repr__(self):
+        return f"Compose({self.transforms})"
+
+
+class NormalizeSkeleton:
+    """Centrovani na stred ramen a skalovani sirkou ramen (viz normalize_features.normalize_skeleton)."""
+
+    name = "normalize_skeleton"
+
+    def __call__(self, x):
+        return normalize_skeleton(x.swapaxes(-1, -2)).swapaxes(-1, -2)
+
+    def spec(self):
+        return {"name": self.name}
+
+    @classmethod
+    def from_spec(cls, spec):
+        return cls()
+
+    def __repr__(self):
+        return "NormalizeSkeleton()"
+
+
+class ZScore:
+    """
+    (x - mean) / std po kanalech ze statistik datasetu (compute_feature_stats.py).
+    Snimky, ktere jsou cele nulove (padding davky), zustavaji nulove.
+    Hodnoty mean/std jsou soucasti spec(), checkpoint tak nezavisi na souboru se statistikami.
+    """
+
+    name = "zscore"
+
+    def __init__(self, mean, std, stats_path=None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.stats_path = stats_path
+        self._device_params = {}
+
+    @classmethod
+    def from_stats(cls, stats_path):
+        mean, std = zscore_params(load_stats(stats_path))
+        return cls(mean, std, stats_path=stats_path)
+
+    @classmethod
+    def from_spec(cls, spec):
+        if "mean" in spec:
+            return cls(spec["mean"], spec["std"], stats_path=spec.get("stats"))
+        return cls.from_stats(spec["stats"])
+
+    def _params(self, x):
+        if isinstance(x, np.ndarray):
+            return self.mean[:, None], self.std[:, None]
+        # torch tensor: parametry se na zarizeni tensoru prenesou jen jednou.
+        key = (x.device, x.dtype)
+        if key not in self._device_params:
+            mean = x.new_tensor(self.mean)[:, None]
+            std = x.new_tensor(self.std)[:, None]
+            self._device_params[key] = (mean, std)
+        return self._device_params[key]
+
+    def __call__(self, x):
+        mean, std = self._params(x)
+        frame_used = (x != 0).any(-2)[..., None, :]
+        return (x - mean) / std * frame_used
+
+    def spec(self):
+        return {"name": self.name, "stats": self.stats_path, "mean": self.mean.tolist(), "std": self.std.tolist()}
+
+    def __repr__(self):
+        return f"ZScore(stats={self.stats_path!r})"
+
+
+TRANSFORMS = {
+    NormalizeSkeleton.name: NormalizeSkeleton,
+    ZScore.name: ZScore,
+}
+
+
+def build_transform(spec):
+    """
+    Z popisu [{"name": ...}, ...] (nebo jen seznamu jmen) sestavi Compose.
+    Prazdny popis -> None (features se pouziji tak, jak jsou ulozene).
+    """
+    if not spec:
+        return None
+    transforms = []
+    for item in spec:
+        if isinstance(item, str):
+            item = {"name": item}
+        if item["name"] not in TRANSFORMS:
+            raise ValueError(f"Unknown transform: {item['name']}. Use one of: {list(TRANSFORMS.keys())}")
+        transforms.append(TRANSFORMS[item["name"]].from_spec(item))
+    return Compose(transforms)
+
+
+def training_transform(features_root, base_spec, zscore=True):
+    """
+    Transformace pro trenink: `base_spec` a pri `zscore` navic z-score se statistikami
+    <features_root>_stats.json. Statistiky se pouziji jen kdyz byly spocitany
+    po stejnych transformacich jako `base_spec`.
+    """
+    base = build_transform(base_spec)
+    spec = base.spec() if base is not None else []
+    if zscore:
+        stats_path = stats_path_for(features_root)
+        if not os.path.exists(stats_path):
+            print(f"Statistiky features nenalezeny ({stats_path}), z-score se nepouzije.")
+            print("  Spocitat: py src/preprocessing/compute_feature_stats.py")
+        elif load_stats(stats_path).get("transforms") != spec:
+            print(f"Statistiky {stats_path} byly spocitany s jinymi transformacemi, z-score se nepouzije.")
+        else:
+            spec.append({"name": ZScore.name, "stats": stats_path})
+    return build_transform(spec)
+
+
+def describe_transform(transform):
+    """Text pro log: jmena pouzitych transformaci, nebo ze se features pouziji tak, jak jsou ulozene."""
+    if transform is None:
+        return "zadne (features tak, jak jsou ulozene)"
+    return " -> ".join(item["name"] for item in transform.spec())
+
+
+def checkpoint_transform_path(checkpoint_path):
+    """mstcn_v1.pth -> mstcn_v1.transform.json"""
+    return os.path.splitext(checkpoint_path)[0] + ".transform.json"
+
+
+def save_checkpoint_transform(checkpoint_path, transform):
+    """Ulozi transformace pouzite pri treninku vedle checkpointu (i prazdne, at je zrejme, ze zadne nebyly)."""
+    spec = transform.spec() if transform is not None else []
+    with open(checkpoint_transform_path(checkpoint_path), "w", encoding="utf-8") as f:
+        json.dump({"transforms": spec}, f, indent=1)
+
+
+def load_checkpoint_transform(checkpoint_path):
+    """Transformace, se kterymi byl checkpoint natrenovan; starsi checkpointy bez zaznamu -> None."""
+    path = checkpoint_transform_path(checkpoint_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return build_transform(json.load(f).get("transforms"))
@@ -8,28 +8,43 @@ import numpy as np
 import torch
 
 try:
+    from data_io.transforms import load_checkpoint_transform
     from models.registry import get_device, load_model
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import add_filter_args, filters_from_args, load_index, select_videos, video_matches
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
+    from utils.packed_store import PackedFeatures, packed_root_for
     from utils.paths import project_paths
 except ModuleNotFoundError:
     # Allow direct execution from src/evaluation and project root invocations.
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from data_io.transforms import load_checkpoint_transform
     from models.registry import get_device, load_model
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import add_filter_args, filters_from_args, load_index, select_videos, video_matches
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
+    from utils.packed_store import PackedFeatures, packed_root_for
     from utils.paths import project_paths
 
 
-def find_feature_label_pairs(features_dir, labels_dir):
-    pairs = []
-    for root, _, files in os.walk(features_dir):
-        for file_name in files:
-            if not file_name.endswith(".npy"):
-                continue
-            feat_path = os.path.join(root, file_name)
-            rel = os.path.relpath(feat_path, features_dir)
-            label_path = os.path.join(labels_dir, rel.replace(".npy", ".txt"))
-            if os.path.exists(label_path):
-                pairs.append((feat_path, label_path))
-    return pairs
+def find_feature_label_pairs(features_dir, labels_dir, filters=None):
+    """(features, labely) olabelovanych videi z indexu datasetu (utils/dataset_index.py), serazene."""
+    index = load_index(features_dir, labels_dir)
+    return [
+        (os.path.join(features_dir, rel), os.path.join(labels_dir, video["label"]))
+        for rel, video in select_videos(index, **(filters or {}))
+    ]
+
+
+def load_pair(feat_path, label_path, packed=None):
+    """(features (C, T), labely) jednoho videa; s `packed` ze zabaleneho datasetu misto souboru."""
+    if packed is not None:
+        feat, gt = packed.sample(packed.index_of(feat_path))
+        return np.ascontiguousarray(feat.T), np.array(gt)
+    return load_features(feat_path).T, align_labels(load_labels(label_path), feat_path)
 
 
 def collapse_segments(seq):
@@ -128,8 +143,9 @@ def infer_logits(model_name, model, x, device):
     return logits
 
 
-def evaluate_model(model_name, ckpt, pairs, device):
+def evaluate_model(model_name, ckpt, pairs, device, packed=None):
     model, ckpt_path = load_model(model_name, checkpoint_path=ckpt, device=device)
+    transform = load_checkpoint_transform(ckpt_path)
 
     total_correct = 0
     total_frames = 0
@@ -138,8 +154,7 @@ def evaluate_model(model_name, ckpt, pairs, device):
     edit_scores, f1_10_scores, f1_25_scores, f1_50_scores = [], [], [], []
 
     for feat_path, label_path in pairs:
-        feat = np.load(feat_path).T
-        gt = np.loadtxt(label_path, dtype=np.int64)
+        feat, gt = load_pair(feat_path, label_path, packed)
 
         t_steps = min(feat.shape[1], len(gt))
         if t_steps <= 1:
@@ -149,6 +164,8 @@ def evaluate_model(model_name, ckpt, pairs, device):
         gt = gt[:t_steps]
 
         x = torch.from_numpy(feat).float().unsqueeze(0).to(device)
+        if transform is not None:
+            x = transform(x)
         logits = infer_logits(model_name, model, x, device)
         pred = torch.argmax(logits, dim=1).squeeze(0).cpu().numpy()[:t_steps]
 
@@ -216,9 +233,35 @@ def main():
     parser.add_argument("--labels_dir", default=str(paths["labels"]))
     parser.add_argument("--asformer_ckpt", default="asformer_attention_v1.pth")
     parser.add_argument("--mstcn_ckpt", default="mstcn_v1.pth")
+    parser.add_argument(
+        "--packed",
+        nargs="?",
+        const="auto",
+        default=None,
+        help="Cist ze zabaleneho datasetu (utils/packed_store.py); bez hodnoty <features_dir>_packed.",
+    )
+    add_filter_args(parser)
     args = parser.parse_args()
-
-    pairs = find_feature_label_pairs(args.features_dir, args.labels_dir)
+    filters = filters_from_args(args)
+
+    packed = None
+    if args.packed:
+        pack_root = packed_root_for(args.features_dir) if args.packed == "auto" else args.packed
+        if not PackedFeatures.exists(pack_root):
+            print(f"CHYBA: Zabaleny dataset '{pack_root}' nebyl nalezen!")
+            return
+        packed = PackedFeatures(pack_root)
+        reason = packed.stale_reason()
+        if reason is not None:
+            print(f"CHYBA: Zabaleny dataset '{pack_root}' je zastaraly ({reason}), znovu: py src/utils/packed_store.py")
+            return
+        pairs = [
+            pair
+            for pair, entry in zip(packed.pairs(), packed.entries)
+            if video_matches(entry["video"], entry["frames"], **filters)
+        ]
+    else:
+        pairs = find_feature_label_pairs(args.features_dir, args.labels_dir, filters)
     if not pairs:
         print("Nebyly nalezeny zadne feature-label pary.")
         return
@@ -226,8 +269,8 @@ def main():
     device = get_device()
     print(f"Nalezeno paru: {len(pairs)} | device: {device}")
 
-    res_asformer = evaluate_model("asformer", args.asformer_ckpt, pairs, device)
-    res_mstcn = evaluate_model("mstcn", args.mstcn_ckpt, pairs, device)
+    res_asformer = evaluate_model("asformer", args.asformer_ckpt, pairs, device, packed)
+    res_mstcn = evaluate_model("mstcn", args.mstcn_ckpt, pairs, device, packed)
     print_table([res_asformer, res_mstcn])
 
 
@@ -10,12 +10,20 @@ import numpy as np
 import torch
 
 try:
+    from data_io.transforms import load_checkpoint_transform
     from models.registry import get_device, load_model
+    from utils.feature_meta import align_labels
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
 except ModuleNotFoundError:
     # Allow direct execution from src/inference and project root invocations.
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from data_io.transforms import load_checkpoint_transform
     from models.registry import get_device, load_model
+    from utils.feature_meta import align_labels
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
 
 
 PHASES_INFO = {
@@ -33,16 +41,18 @@ def pick_npy_file():
     root.withdraw()
     root.attributes("-topmost", True)
     path = filedialog.askopenfilename(
-        title="Vyber .npy soubor pro predikci",
-        filetypes=[("NumPy files", "*.npy")],
+        title="Vyber soubor s features pro predikci",
+        filetypes=[("Features", "*.npy *.npz"), ("NumPy files", "*.npy")],
     )
     root.destroy()
     return path
 
 
-def infer_one(model_name, model, feat_path, device):
-    features = np.load(feat_path).T
+def infer_one(model_name, model, feat_path, device, transform=None):
+    features = load_features(feat_path).T
     x = torch.from_numpy(features).float().unsqueeze(0).to(device)
+    if transform is not None:
+        x = transform(x)
 
     with torch.no_grad():
         if model_name == "asformer":
@@ -61,10 +71,10 @@ def infer_one(model_name, model, feat_path, device):
 
 
 def load_ground_truth(feat_path):
-    gt_path = feat_path.replace("features_enhanced", "labels").replace(".npy", ".txt")
+    gt_path = os.path.splitext(feat_path.replace("features_enhanced", "labels"))[0] + ".txt"
     if not os.path.exists(gt_path):
         return None, gt_path
-    gt = np.loadtxt(gt_path, dtype=int)
+    gt = align_labels(load_labels(gt_path), feat_path)
     return gt, gt_path
 
 
@@ -115,19 +125,20 @@ def main():
     parser = argparse.ArgumentParser(description="Unified predict pro ASFormer i MS-TCN")
     parser.add_argument("--model", choices=["asformer", "mstcn"], required=True, help="Ktery model pouzit")
     parser.add_argument("--ckpt", default=None, help="Cesta k checkpointu")
-    parser.add_argument("--input", default=None, help="Cesta k .npy (kdyz neni, otevre se dialog)")
+    parser.add_argument("--input", default=None, help="Cesta k features .npy / .npz (kdyz neni, otevre se dialog)")
     parser.add_argument("--no-plot", action="store_true", help="Nevykresluj graf")
     args = parser.parse_args()
 
     device = get_device()
     model, ckpt_path = load_model(args.model, checkpoint_path=args.ckpt, device=device)
+    transform = load_checkpoint_transform(ckpt_path)
 
     feat_path = args.input if args.input else pick_npy_file()
     if not feat_path:
         print("Nebyl vybran zadny .npy soubor.")
         return
 
-    prediction = infer_one(args.model, model, feat_path, device)
+    prediction = infer_one(args.model, model, feat_path, device, transform=transform)
     gt, gt_path = load_ground_truth(feat_path)
 
     print(f"Model: {args.model}")
@@ -0,0 +1,202 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+try:
+    from preprocessing.extract_features_enhanced import (
+        EXTRACT_DEFAULTS,
+        LANDMARK_SHAPES,
+        LIP_LANDMARKS,
+        VIDEO_EXTENSIONS,
+        _FrameDecoder,
+        _fill_frame_landmarks,
+        _new_timings,
+    )
+    from preprocessing.landmark_backends import LANDMARK_BACKENDS, create_landmarker
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/benchmark_landmark_conversion.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from preprocessing.extract_features_enhanced import (
+        EXTRACT_DEFAULTS,
+        LANDMARK_SHAPES,
+        LIP_LANDMARKS,
+        VIDEO_EXTENSIONS,
+        _FrameDecoder,
+        _fill_frame_landmarks,
+        _new_timings,
+    )
+    from preprocessing.landmark_backends import LANDMARK_BACKENDS, create_landmarker
+    from utils.paths import project_paths
+
+RESULT_FIELDS = ("pose_landmarks", "left_hand_landmarks", "right_hand_landmarks", "face_landmarks")
+
+
+# --- PUVODNI (PO ATRIBUTECH) PREVOD, REFERENCE PRO POROVNANI ---
+
+def _extract_frame_landmarks_loop(results):
+    pose = np.zeros((23, 4), dtype=np.float32)
+    left_hand = np.full((21, 3), np.nan, dtype=np.float32)
+    right_hand = np.full((21, 3), np.nan, dtype=np.float32)
+
+    face_detected = bool(results.face_landmarks)
+    left_detected = bool(results.left_hand_landmarks)
+    right_detected = bool(results.right_hand_landmarks)
+
+    if results.pose_landmarks:
+        for i, l in enumerate(results.pose_landmarks.landmark[:23]):
+            pose[i, 0] = l.x
+            pose[i, 1] = l.y
+            pose[i, 2] = l.z
+            pose[i, 3] = l.visibility
+    else:
+        pose[:, :3] = np.nan
+        pose[:, 3] = 0.0
+
+    if left_detected:
+        for i, l in enumerate(results.left_hand_landmarks.landmark):
+            left_hand[i, 0] = l.x
+            left_hand[i, 1] = l.y
+            left_hand[i, 2] = l.z
+
+    if right_detected:
+        for i, l in enumerate(results.right_hand_landmarks.landmark):
+            right_hand[i, 0] = l.x
+            right_hand[i, 1] = l.y
+            right_hand[i, 2] = l.z
+
+    lips = np.full((2, 3), np.nan, dtype=np.float32)
+    if face_detected:
+        for i, idx in enumerate(LIP_LANDMARKS):
+            l = results.face_landmarks.landmark[idx]
+            lips[i, 0] = l.x
+            lips[i, 1] = l.y
+            lips[i, 2] = l.z
+
+    return pose, left_hand, right_hand, lips, left_detected, right_detected, face_detected
+
+
+def record_results(video_path, frames, backend="holistic", face_stride=5):
+    """Spusti landmarker na prvnich `frames` snimcich videa a vrati jeho vysledky (protobuf zpravy)."""
+    landmarker = create_landmarker(backend, face_stride=face_stride)
+    decoder = _FrameDecoder(video_path, EXTRACT_DEFAULTS["queue_size"], _new_timings())
+    decoder.start()
+    recorded = []
+    try:
+        for frame_idx, rgb_frame in enumerate(decoder):
+            if frame_idx >= frames:
+                break
+            results = landmarker.process(rgb_frame, frame_idx)
+            # Vysledek Holisticu je namedtuple vytvoreny za behu (nejde picklovat).
+            recorded.append(SimpleNamespace(**{name: getattr(results, name) for name in RESULT_FIELDS}))
+    finally:
+        decoder.stop()
+        landmarker.close()
+    return recorded
+
+
+def load_or_record(results_path, video_path, frames, backend, face_stride):
+    if results_path and os.path.exists(results_path):
+        with open(results_path, "rb") as f:
+            return pickle.load(f)
+
+    print(f"Nahravam vysledky {backend}: {video_path} (max. {frames} snimku)")
+    recorded = record_results(video_path, frames, backend=backend, face_stride=face_stride)
+    if results_path:
+        os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+        with open(results_path, "wb") as f:
+            pickle.dump(recorded, f)
+        print(f"Vysledky ulozeny: {results_path}")
+    return recorded
+
+
+def _convert_loop(recorded):
+    return [_extract_frame_landmarks_loop(results) for results in recorded]
+
+
+def _convert_fast(recorded):
+    # Stejne jako _LandmarkChunks: predalokovana pole pro cele video, plnena po radcich.
+    t = len(recorded)
+    arrays = {name: np.empty((t,) + shape, dtype=dtype) for name, (shape, dtype) in LANDMARK_SHAPES.items()}
+    pose, left_hand, right_hand, lips = arrays["pose"], arrays["left_hand"], arrays["right_hand"], arrays["lips"]
+    for i, results in enumerate(recorded):
+        flags = _fill_frame_landmarks(results, pose[i], left_hand[i], right_hand[i], lips[i])
+        arrays["left_ok"][i], arrays["right_ok"][i], arrays["face_ok"][i] = flags
+    return arrays
+
+
+def _best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(recorded, repeats=5):
+    """Porovna puvodni a rychly prevod landmarku (cas + shoda). Vraci True pri shode."""
+    t = len(recorded)
+    ref = [np.asarray(values) for values in zip(*_convert_loop(recorded))]
+    out = _convert_fast(recorded)
+    ok = all(
+        np.array_equal(ref[i], out[name], equal_nan=True) for i, name in enumerate(LANDMARK_SHAPES)
+    )
+
+    t_loop = _best_time(lambda: _convert_loop(recorded), repeats)
+    t_fast = _best_time(lambda: _convert_fast(recorded), repeats)
+
+    print(f"Snimku: {t} | pose {(~np.isnan(out['pose'][:, 0, 0])).mean():.0%} | "
+          f"leva ruka {out['left_ok'].mean():.0%} | prava ruka {out['right_ok'].mean():.0%} | "
+          f"oblicej {out['face_ok'].mean():.0%}")
+    print(f"{'Prevod':<24} {'Celkem':>10} {'Na snimek':>12}")
+    print("-" * 48)
+    print(f"{'po atributech (puvodni)':<24} {t_loop * 1e3:>8.1f}ms {t_loop / t * 1e6:>10.1f}us")
+    print(f"{'serializace + frombuffer':<24} {t_fast * 1e3:>8.1f}ms {t_fast / t * 1e6:>10.1f}us")
+    print("-" * 48)
+    print(f"Zrychleni: {t_loop / t_fast:.1f}x")
+    print("Shoda s puvodni implementaci: " + ("OK" if ok else "CHYBA"))
+    return ok
+
+
+def _first_video(video_root):
+    for root, _, files in sorted(os.walk(video_root)):
+        for name in sorted(files):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                return os.path.join(root, name)
+    return None
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Benchmark prevodu landmarku MediaPipe -> NumPy na nahranych vysledcich")
+    parser.add_argument("--video", default=None, help="Video pro nahrani vysledku (vychozi: prvni video v data/raw_videos)")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--backend", choices=list(LANDMARK_BACKENDS.keys()), default=EXTRACT_DEFAULTS["backend"])
+    parser.add_argument("--face_stride", type=int, default=EXTRACT_DEFAULTS["face_stride"])
+    parser.add_argument(
+        "--results",
+        default=str(paths["results"] / "landmark_results.pkl"),
+        help="Nahrane vysledky landmarkeru; pokud soubor existuje, MediaPipe se nespousti.",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    video = args.video or _first_video(str(paths["raw_videos"]))
+    if video is None and not os.path.exists(args.results):
+        print(f"Nebylo nalezeno zadne video v: {paths['raw_videos']}")
+        sys.exit(1)
+
+    recorded = load_or_record(args.results, video, args.frames, args.backend, args.face_stride)
+    if not recorded:
+        print("Video neobsahuje zadny snimek.")
+        sys.exit(1)
+    ok = run_benchmark(recorded, repeats=args.repeats)
+    sys.exit(0 if ok else 1)
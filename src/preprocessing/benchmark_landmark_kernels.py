@@ -0,0 +1,149 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from preprocessing.extract_features_enhanced import _interpolate_nan_nd, _smooth_over_time
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/benchmark_landmark_kernels.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from preprocessing.extract_features_enhanced import _interpolate_nan_nd, _smooth_over_time
+
+
+# --- PUVODNI (PO KANALECH) IMPLEMENTACE, REFERENCE PRO POROVNANI ---
+
+def _interpolate_nan_1d_loop(values):
+    values = values.astype(np.float32, copy=True)
+    idx = np.arange(values.shape[0])
+    valid = ~np.isnan(values)
+
+    if not np.any(valid):
+        return np.zeros_like(values)
+    if np.any(~valid):
+        values[~valid] = np.interp(idx[~valid], idx[valid], values[valid])
+    return values
+
+
+def _interpolate_nan_nd_loop(data):
+    filled = data.astype(np.float32, copy=True)
+    t = filled.shape[0]
+    reshaped = filled.reshape(t, -1)
+    for c in range(reshaped.shape[1]):
+        reshaped[:, c] = _interpolate_nan_1d_loop(reshaped[:, c])
+    return reshaped.reshape(filled.shape)
+
+
+def _smooth_over_time_loop(data, max_window=11):
+    t = data.shape[0]
+    if t < 5:
+        return data
+
+    window = min(max_window, t)
+    if window % 2 == 0:
+        window -= 1
+    if window < 5:
+        return data
+
+    flat = data.reshape(t, -1)
+    smoothed = np.empty_like(flat)
+    pad = window // 2
+
+    for c in range(flat.shape[1]):
+        padded = np.pad(flat[:, c], (pad, pad), mode="edge")
+        smoothed[:, c] = np.convolve(padded, np.ones(window, dtype=np.float32) / window, mode="valid")
+
+    return smoothed.reshape(data.shape)
+
+
+def make_landmark_sequence(frames, joints, missing_rate, seed=0, scattered=False):
+    """
+    Syntetická sekvence landmarků s výpadky detekce celých snímků (jako MediaPipe).
+    `scattered` přidá i výpadky jednotlivých souřadnic (obecná cesta interpolace).
+    """
+    rng = np.random.default_rng(seed)
+    data = np.cumsum(rng.normal(0.0, 0.005, size=(frames, joints, 3)), axis=0).astype(np.float32) + 0.5
+
+    lost_frames = rng.random(frames) < missing_rate
+    data[lost_frames] = np.nan
+    data[: frames // 50] = np.nan
+    if scattered:
+        data[rng.random(data.shape) < missing_rate / 10] = np.nan
+    return data
+
+
+def _best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(frames=10000, repeats=5, missing_rate=0.2):
+    """Porovná vektorové a smyčkové kernely (čas + shoda výsledků). Vrací True při shodě."""
+    ok = True
+    print(f"Benchmark: {frames} snimku, {repeats} opakovani, vypadky {missing_rate:.0%}")
+    print(f"{'Kernel':<28} {'Smycka':>10} {'Vektor':>10} {'Zrychleni':>10} {'Max rozdil':>12}")
+    print("-" * 74)
+
+    cases = [
+        ("pose (23 bodu)", 23, False),
+        ("ruka (21 bodu)", 21, False),
+        ("ruka, rozptylene NaN", 21, True),
+    ]
+    for name, joints, scattered in cases:
+        data = make_landmark_sequence(frames, joints, missing_rate, scattered=scattered)
+
+        ref = _interpolate_nan_nd_loop(data)
+        out = _interpolate_nan_nd(data)
+        # Interpolace musí odpovídat np.interp bit po bitu.
+        match = np.array_equal(ref, out)
+        ok &= match
+        t_loop = _best_time(lambda: _interpolate_nan_nd_loop(data), repeats)
+        t_vec = _best_time(lambda: _interpolate_nan_nd(data), repeats)
+        diff = float(np.max(np.abs(ref - out)))
+        print(f"{'interp ' + name:<28} {t_loop * 1e3:>8.2f}ms {t_vec * 1e3:>8.2f}ms {t_loop / t_vec:>9.1f}x {diff:>12.2e}")
+
+        ref_s = _smooth_over_time_loop(ref)
+        out_s = _smooth_over_time(ref)
+        # Klouzavý průměr přes kumulativní součet se liší jen zaokrouhlením float32.
+        match = np.allclose(ref_s, out_s, rtol=1e-6, atol=1e-6)
+        ok &= match
+        t_loop = _best_time(lambda: _smooth_over_time_loop(ref), repeats)
+        t_vec = _best_time(lambda: _smooth_over_time(ref), repeats)
+        diff = float(np.max(np.abs(ref_s - out_s)))
+        print(f"{'smooth ' + name:<28} {t_loop * 1e3:>8.2f}ms {t_vec * 1e3:>8.2f}ms {t_loop / t_vec:>9.1f}x {diff:>12.2e}")
+
+    # Okrajové případy: prázdný kanál, krátké sekvence, bez výpadků.
+    edge_cases = [
+        np.full((12, 21, 3), np.nan, dtype=np.float32),
+        make_landmark_sequence(1, 21, 0.0),
+        make_landmark_sequence(4, 23, 0.5, seed=1),
+        make_landmark_sequence(9, 23, 0.5, seed=2, scattered=True),
+        make_landmark_sequence(200, 23, 0.0, seed=3),
+    ]
+    for data in edge_cases:
+        ref = _interpolate_nan_nd_loop(data)
+        out = _interpolate_nan_nd(data)
+        ok &= np.array_equal(ref, out)
+        ok &= np.allclose(_smooth_over_time_loop(ref), _smooth_over_time(ref), rtol=1e-6, atol=1e-6)
+
+    print("-" * 74)
+    print("Shoda s puvodni implementaci: " + ("OK" if ok else "CHYBA"))
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark interpolace a vyhlazeni landmarku")
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--missing_rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    ok = run_benchmark(frames=args.frames, repeats=args.repeats, missing_rate=args.missing_rate)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,122 @@
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from preprocessing.extract_features_enhanced import (
+        FEATURE_GROUPS,
+        VIDEO_EXTENSIONS,
+        _new_timings,
+        extract_video,
+    )
+    from preprocessing.landmark_backends import create_landmarker
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/compare_landmark_backends.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from preprocessing.extract_features_enhanced import (
+        FEATURE_GROUPS,
+        VIDEO_EXTENSIONS,
+        _new_timings,
+        extract_video,
+    )
+    from preprocessing.landmark_backends import create_landmarker
+    from utils.paths import project_paths
+
+
+def _collect_videos(video_root, limit=None):
+    videos = []
+    for root, _, files in os.walk(video_root):
+        for name in files:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(os.path.join(root, name))
+    videos.sort()
+    return videos[:limit] if limit else videos
+
+
+def compare_backends(videos, face_strides, output_csv=None):
+    """
+    Pro kazde video spusti referencni Holistic a backend pose_hands (pro kazdy
+    face_stride) a porovna rychlost (snimky/s MediaPipe faze) a prumernou
+    absolutni odchylku features po skupinach vuci Holisticu.
+    """
+    reference = create_landmarker("holistic")
+    candidates = [(f"pose_hands/face{stride}", create_landmarker("pose_hands", face_stride=stride)) for stride in face_strides]
+
+    rows = []
+    for video_path in videos:
+        name = os.path.basename(video_path)
+        print(f"Porovnavam: {name}")
+
+        ref_timings = _new_timings()
+        ref = extract_video(video_path, landmarker=reference, timings=ref_timings)
+        if ref is None:
+            print("  ⚠️ Prazdne video, preskakuji")
+            continue
+        ref_fps = ref_timings["frames"] / max(ref_timings["landmarks"], 1e-9)
+        rows.append({"video": name, "backend": "holistic", "fps": ref_fps, "speedup": 1.0})
+
+        for label, landmarker in candidates:
+            timings = _new_timings()
+            out = extract_video(video_path, landmarker=landmarker, timings=timings)
+            fps = timings["frames"] / max(timings["landmarks"], 1e-9)
+            row = {"video": name, "backend": label, "fps": fps, "speedup": fps / ref_fps}
+
+            t_steps = min(len(ref), len(out))
+            diff = np.abs(ref[:t_steps] - out[:t_steps])
+            for group, cols in FEATURE_GROUPS.items():
+                row[f"mae_{group}"] = float(np.mean(diff[:, cols]))
+            rows.append(row)
+
+    backends = ["holistic"] + [label for label, _ in candidates]
+    print("")
+    print("=" * 100)
+    print(f"{'Backend':<20} {'Snimky/s':>10} {'Zrychleni':>10} " + " ".join(f"{g[:10]:>10}" for g in FEATURE_GROUPS))
+    print("-" * 100)
+    for backend in backends:
+        sel = [r for r in rows if r["backend"] == backend]
+        if not sel:
+            continue
+        line = f"{backend:<20} {np.mean([r['fps'] for r in sel]):>10.1f} {np.mean([r['speedup'] for r in sel]):>9.2f}x "
+        if backend == "holistic":
+            line += " ".join(f"{'-':>10}" for _ in FEATURE_GROUPS)
+        else:
+            line += " ".join(f"{np.mean([r[f'mae_{g}'] for r in sel]):>10.4f}" for g in FEATURE_GROUPS)
+        print(line)
+    print("=" * 100)
+    print("Sloupce skupin = prumerna absolutni odchylka od Holisticu (uhly ve stupnich).")
+
+    if output_csv and rows:
+        os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+        fieldnames = ["video", "backend", "fps", "speedup"] + [f"mae_{g}" for g in FEATURE_GROUPS]
+        with open(output_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"CSV ulozeno: {output_csv}")
+
+    return rows
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Porovnani rychlosti a presnosti landmark backendu vuci Holisticu")
+    parser.add_argument("--video_root", default=str(paths["raw_videos"]))
+    parser.add_argument("--limit", type=int, default=10, help="Max. pocet porovnanych videi")
+    parser.add_argument("--face_strides", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument(
+        "--output_csv",
+        default=str(paths["results"] / "backend_comparison.csv"),
+    )
+    args = parser.parse_args()
+
+    videos = _collect_videos(args.video_root, limit=args.limit)
+    if not videos:
+        print(f"Nebyla nalezena zadna videa v: {args.video_root}")
+    else:
+        compare_backends(videos, args.face_strides, output_csv=args.output_csv)
@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing as mp_proc
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    from data_io.transforms import build_transform
+    from utils.feature_stats import ChannelStats, save_stats, stats_path_for
+    from utils.feature_store import is_feature_file, load_features
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/compute_feature_stats.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from data_io.transforms import build_transform
+    from utils.feature_stats import ChannelStats, save_stats, stats_path_for
+    from utils.feature_store import is_feature_file, load_features
+    from utils.paths import project_paths
+
+
+def _feature_files(features_root):
+    paths = []
+    for root, _, files in os.walk(features_root):
+        for name in sorted(files):
+            if is_feature_file(name):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def file_stats(path, transform_spec=None):
+    """Statistiky jednoho videa (po aplikaci transformaci, stejne jako pri treninku)."""
+    features = load_features(path)
+    transform = build_transform(transform_spec)
+    if transform is not None:
+        features = transform(features.T).T
+    stats = ChannelStats(features.shape[1])
+    stats.update(features)
+    return stats
+
+
+def _file_stats_job(args):
+    path, transform_spec = args
+    try:
+        return path, file_stats(path, transform_spec), None
+    except Exception as exc:
+        return path, None, f"{type(exc).__name__}: {exc}"
+
+
+def compute_stats(features_root, transform_spec=None, workers=1):
+    """
+    Jeden pruchod pres vsechny features: kazde video se nacte, zpracuje a zahodi,
+    dilci statistiky (i z workeru) se slouci (ChannelStats.merge). Vraci (stats, souboru, chyby).
+    """
+    paths = _feature_files(features_root)
+    jobs = [(path, transform_spec) for path in paths]
+    total = None
+    failures = []
+    done = 0
+
+    def consume(results):
+        nonlocal total, done
+        for path, stats, error in results:
+            done += 1
+            if error is not None:
+                failures.append((path, error))
+                continue
+            total = stats if total is None else total.merge(stats)
+            if done % 100 == 0 or done == len(jobs):
+                print(f"  {done}/{len(jobs)} videi")
+
+    if workers > 1 and len(jobs) > 1:
+        with mp_proc.get_context("spawn").Pool(min(workers, len(jobs))) as pool:
+            consume(pool.imap_unordered(_file_stats_job, jobs, chunksize=4))
+    else:
+        consume(map(_file_stats_job, jobs))
+    return total, len(paths) - len(failures), failures
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Statistiky features po kanalech (pro z-score normalizaci)")
+    parser.add_argument("--features_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument("--output", default=None, help="Vychozi: data/features_enhanced_stats.json")
+    parser.add_argument(
+        "--transform",
+        nargs="*",
+        default=["normalize_skeleton"],
+        help="Transformace pred vypoctem (stejne jako FEATURE_TRANSFORM v treninku); bez hodnot = zadne.",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.features_dir):
+        print(f"CHYBA: Slozka '{args.features_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    output = args.output or stats_path_for(args.features_dir)
+    transform = build_transform(args.transform)
+    transform_spec = transform.spec() if transform is not None else []
+
+    print(f"Statistiky features: {args.features_dir} | transformace: {args.transform or 'zadne'}")
+    start = time.perf_counter()
+    stats, files, failures = compute_stats(args.features_dir, transform_spec=transform_spec, workers=args.workers)
+    if stats is None:
+        print("CHYBA: Nebyly nalezeny zadne features.")
+        sys.exit(1)
+    save_stats(output, stats, transforms=transform_spec, files=files)
+
+    print("\n=== HOTOVO ===")
+    print(f"Videi: {files} | snimku: {int(stats.count.max())} | cas: {time.perf_counter() - start:.1f} s")
+    print(f"Statistiky ulozeny: {output}")
+    if failures:
+        print(f"Selhalo {len(failures)} souboru:")
+        for path, error in failures:
+            print(f"  ❌ {path}: {error}")
@@ -1,70 +1,216 @@
 import argparse
+import copy
 import cv2
-import mediapipe as mp
+import json
+import multiprocessing as mp_proc
 import numpy as np
+import operator
 import os
+import queue
+import shutil
 import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
 try:
+    from preprocessing import extraction_manifest, extraction_profile
+    from preprocessing.landmark_backends import LANDMARK_BACKENDS, create_landmarker, landmarker_settings
+    from utils.atomic_io import atomic_open, save_npz
+    from utils.feature_meta import feature_meta_path, write_feature_meta
+    from utils.feature_store import (
+        FEATURE_FORMATS,
+        feature_format,
+        feature_frames,
+        feature_path,
+        find_feature_file,
+        save_features,
+    )
     from utils.paths import project_paths
 except ModuleNotFoundError:
     # Allow running this file directly: py src/preprocessing/extract_features_enhanced.py
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from preprocessing import extraction_manifest, extraction_profile
+    from preprocessing.landmark_backends import LANDMARK_BACKENDS, create_landmarker, landmarker_settings
+    from utils.atomic_io import atomic_open, save_npz
+    from utils.feature_meta import feature_meta_path, write_feature_meta
+    from utils.feature_store import (
+        FEATURE_FORMATS,
+        feature_format,
+        feature_frames,
+        feature_path,
+        find_feature_file,
+        save_features,
+    )
     from utils.paths import project_paths
 
 # --- KONFIGURACE ---
-mp_holistic = mp.solutions.holistic
-holistic = mp_holistic.Holistic(
-    static_image_mode=False,        
-    model_complexity=2,           
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
-)
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
+
+# Zvysit pri kazde zmene vypoctu features (interpolace, vyhlazeni, distances/angles...),
+# manifest pak vynuti novou extrakci vsech videi.
+EXTRACTOR_VERSION = 1
+
+# Paralelni extrakce: worker, ktery tolik sekund nezpracoval zadny snimek, se ukonci
+# a jeho video selze (zaseknuty dekoder / MediaPipe); nezavisi na delce videa.
+STALL_TIMEOUT = 300.0
+
+# Vychozi nastaveni extrakce; `extract()` a workery dostavaji slovnik `options`.
+EXTRACT_DEFAULTS = {
+    "backend": "holistic",   # viz landmark_backends.LANDMARK_BACKENDS
+    "face_stride": 5,        # jen backend pose_hands: face mesh na kazdem N-tem snimku
+    "queue_size": 16,        # max. pocet dekodovanych snimku ve fronte
+    "target_fps": None,      # zpracovat jen kazdy N-ty snimek, aby vyslo priblizne tolik snimku/s
+    "max_side": None,        # zmensit snimek, aby delsi strana mela nejvyse tolik pixelu
+    "roi": False,            # MediaPipe jen na vyrezu kolem osoby z predchoziho snimku (RoiLandmarker)
+    "roi_padding": 0.25,     # okraj vyrezu kolem horni casti tela (podil delsi strany boxu)
+    "chunk_frames": 1000,    # landmarky po blocich tolika snimku (velikost checkpointu)
+    "checkpoint": True,      # plne bloky prubezne ukladat do <output_root>_partial, po padu pokracovat
+    "profile": False,        # casy fazi, detekce a pamet po videich do <output_root>_profile.jsonl
+    "feature_format": "float32",  # float16 / int16 = kompaktni .npz (viz utils.feature_store)
+    "compress": False,       # kompaktni format navic komprimovat po blocich
+}
+
+# Landmarker se vytvari az pri prvnim pouziti, aby import modulu (a spusteni
+# worker procesu na Windows pres spawn) nenacital model zbytecne.
+_landmarkers = {}
+
+
+def _resolve_options(options=None):
+    resolved = dict(EXTRACT_DEFAULTS)
+    if options:
+        resolved.update(options)
+    return resolved
+
+
+def _landmarker_kwargs(options):
+    return {
+        "face_stride": options["face_stride"],
+        "roi_padding": options["roi_padding"] if options["roi"] else None,
+    }
+
+
+def extractor_config(options):
+    """Vse, co ovlivnuje obsah vystupu (ne rychlost); uklada se do manifestu."""
+    config = {
+        "extractor_version": EXTRACTOR_VERSION,
+        "backend": options["backend"],
+        "landmarker": landmarker_settings(options["backend"], **_landmarker_kwargs(options)),
+    }
+    # Jen kdyz jsou nastavene, aby starsi manifesty zustaly platne.
+    for key in ("target_fps", "max_side"):
+        if options[key]:
+            config[key] = options[key]
+    return config
+
+
+def _get_landmarker(options):
+    """Vrati landmarker aktualniho procesu pro dane nastaveni (kazdy worker ma vlastni)."""
+    kwargs = _landmarker_kwargs(options)
+    key = (options["backend"],) + tuple(kwargs.values())
+    if key not in _landmarkers:
+        _landmarkers[key] = create_landmarker(options["backend"], **kwargs)
+    return _landmarkers[key]
+
+
+def _dot_last(a, b):
+    """Skalární součin po poslední ose; stejné zaokrouhlení jako np.dot pro 1D vektory."""
+    return np.matmul(a[..., None, :], b[..., :, None])[..., 0, 0]
+
 
 def calculate_angle(a, b, c):
     """
     Vypočítá úhel v bodě b mezi body a-b-c
     Vrací úhel ve stupních (0-180)
+    Funguje i pro dávky bodů tvaru (..., 3).
     """
     ba = a - b
     bc = c - b
     
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-8)
+    cosine_angle = _dot_last(ba, bc) / (np.sqrt(_dot_last(ba, ba)) * np.sqrt(_dot_last(bc, bc)) + 1e-8)
     angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
     return np.degrees(angle)
 
 def calculate_distance(a, b):
-    """Euklidovská vzdálenost mezi dvěma body"""
-    return np.linalg.norm(a - b)
+    """Euklidovská vzdálenost mezi dvěma body (i po dávkách tvaru (..., 3))"""
+    diff = a - b
+    return np.sqrt(_dot_last(diff, diff))
 
 
 def _interpolate_nan_1d(values):
     """Lineárně doplní chybějící hodnoty (NaN) v 1D vektoru."""
-    values = values.astype(np.float32, copy=True)
-    idx = np.arange(values.shape[0])
-    valid = ~np.isnan(values)
+    return _interpolate_nan_nd(np.asarray(values)[:, None])[:, 0]
+
 
-    if not np.any(valid):
-        return np.zeros_like(values)
-    if np.any(~valid):
-        values[~valid] = np.interp(idx[~valid], idx[valid], values[valid])
-    return values
+def _fill_gaps(flat, rows, cols, prev_idx, next_idx):
+    """Dopočítá flat[rows, cols] z nejbližšího platného snímku před/za mezerou (indexy -1 / T = chybí)."""
+    t = flat.shape[0]
+    has_prev = prev_idx >= 0
+    has_next = next_idx < t
+    inside = has_prev & has_next
+
+    # np.interp počítá ve float64, tady stejně kvůli shodnému zaokrouhlení.
+    prev_val = flat[np.clip(prev_idx, 0, t - 1), cols].astype(np.float64)
+    next_val = flat[np.clip(next_idx, 0, t - 1), cols].astype(np.float64)
+
+    slope = (next_val - prev_val) / np.where(inside, next_idx - prev_idx, 1)
+    interp = slope * (rows - prev_idx) + prev_val
+    result = np.where(inside, interp, np.where(has_prev, prev_val, next_val))
+    result = np.where(has_prev | has_next, result, 0.0)
+
+    flat[rows, cols] = result
 
 
 def _interpolate_nan_nd(data):
-    """Aplikuje interpolaci NaN po časové ose pro každý kanál zvlášť."""
+    """
+    Lineárně doplní NaN po časové ose ve všech kanálech najednou.
+    Okraje se doplní nejbližší platnou hodnotou, kanál bez platné hodnoty nulami
+    (stejně jako np.interp po kanálech).
+    """
     filled = data.astype(np.float32, copy=True)
     t = filled.shape[0]
-    reshaped = filled.reshape(t, -1)
-    for c in range(reshaped.shape[1]):
-        reshaped[:, c] = _interpolate_nan_1d(reshaped[:, c])
-    return reshaped.reshape(filled.shape)
+    flat = filled.reshape(t, -1)
+    missing = np.isnan(flat)
+    row_missing = missing.any(axis=1)
+    if not row_missing.any():
+        return filled
+
+    if np.array_equal(row_missing, missing.all(axis=1)):
+        # Běžný případ: výpadek detekce zasáhne celý snímek, mezery jsou ve všech kanálech stejné.
+        valid_rows = np.flatnonzero(~row_missing)
+        rows = np.flatnonzero(row_missing)
+        pos = np.searchsorted(valid_rows, rows)
+        padded_rows = np.concatenate([[-1], valid_rows, [t]])
+        prev_idx = padded_rows[pos]
+        next_idx = padded_rows[pos + 1]
+        _fill_gaps(
+            flat,
+            rows[:, None],
+            np.arange(flat.shape[1])[None, :],
+            prev_idx[:, None],
+            next_idx[:, None],
+        )
+        return filled
+
+    idx = np.arange(t, dtype=np.int32)[:, None]
+    prev_idx = np.where(missing, np.int32(-1), idx)
+    np.maximum.accumulate(prev_idx, axis=0, out=prev_idx)
+    next_idx = np.where(missing, np.int32(t), idx)[::-1]
+    np.minimum.accumulate(next_idx, axis=0, out=next_idx)
+
+    rows, cols = np.nonzero(missing)
+    _fill_gaps(flat, rows, cols, prev_idx[rows, cols], next_idx[t - 1 - rows, cols])
+    return filled
 
 
 def _smooth_over_time(data, max_window=11, polyorder=2):
-    """Volitelné vyhlazení po čase; zachová tvar dat (bez SciPy)."""
+    """
+    Volitelné vyhlazení po čase klouzavým průměrem; zachová tvar dat (bez SciPy).
+    Všechny kanály najednou přes kumulativní součet.
+    """
     t = data.shape[0]
     if t < 5:
         return data
@@ -76,73 +222,154 @@ def _smooth_over_time(data, max_window=11, polyorder=2):
         return data
 
     flat = data.reshape(t, -1)
-    smoothed = np.empty_like(flat)
     pad = window // 2
+    padded = np.pad(flat, ((pad, pad), (0, 0)), mode="edge")
 
-    for c in range(flat.shape[1]):
-        channel = flat[:, c]
-        padded = np.pad(channel, (pad, pad), mode="edge")
-        smoothed[:, c] = np.convolve(padded, np.ones(window, dtype=np.float32) / window, mode="valid")
+    # Součty ve float64, aby se chyba na dlouhých videích nenasčítávala.
+    csum = np.zeros((padded.shape[0] + 1, flat.shape[1]), dtype=np.float64)
+    np.cumsum(padded, axis=0, out=csum[1:])
+    smoothed = (csum[window:] - csum[:-window]) / window
 
-    return smoothed.reshape(data.shape)
+    return smoothed.astype(data.dtype).reshape(data.shape)
 
 
-def _extract_frame_landmarks(results):
-    """Vrátí landmarky jednoho snímku + příznaky detekce."""
-    pose = np.zeros((23, 4), dtype=np.float32)
-    left_hand = np.full((21, 3), np.nan, dtype=np.float32)
-    right_hand = np.full((21, 3), np.nan, dtype=np.float32)
+LIP_LANDMARKS = (13, 14)
+LANDMARK_KEYS = ("pose", "left_hand", "right_hand", "lips", "left_ok", "right_ok", "face_ok")
+# Tvar a typ raw landmarku jednoho snimku (viz _fill_frame_landmarks).
+LANDMARK_SHAPES = {
+    "pose": ((23, 4), np.float32),
+    "left_hand": ((21, 3), np.float32),
+    "right_hand": ((21, 3), np.float32),
+    "lips": ((2, 3), np.float32),
+    "left_ok": ((), bool),
+    "right_ok": ((), bool),
+    "face_ok": ((), bool),
+}
+
+
+# Serializovana NormalizedLandmarkList je posloupnost zaznamu pevne delky:
+# 0x0A, delka, a pro kazde pole (x, y, z, visibility, presence) tag + float32.
+_LANDMARK_FIELD_TAGS = (0x0D, 0x15, 0x1D, 0x25, 0x2D)
+_XYZ = operator.attrgetter("x", "y", "z")
+_XYZV = operator.attrgetter("x", "y", "z", "visibility")
 
-    face_detected = bool(results.face_landmarks)
-    left_detected = bool(results.left_hand_landmarks)
-    right_detected = bool(results.right_hand_landmarks)
 
+@lru_cache(maxsize=None)
+def _landmark_record_dtype(fields):
+    return np.dtype([("head", "u1", (2,)), ("fields", [("tag", "u1"), ("value", "<f4")], (fields,))])
+
+
+def _copy_landmarks_serialized(landmark_list, out):
+    """
+    Zkopiruje prvnich len(out) landmarku (x, y, z[, visibility]) do `out` jednim
+    np.frombuffer nad serializovanou zpravou, bez cteni atributu po jednom.
+    Vraci False, pokud zprava nema ocekavany tvar (chybejici pole, jina delka).
+    """
+    data = landmark_list.SerializeToString()
+    if len(data) < 2:
+        return False
+    size = data[1]
+    record = size + 2
+    fields = size // 5
+    count = len(data) // record
+    if data[0] != 0x0A or size % 5 or fields < out.shape[1] or count * record != len(data) or count < len(out):
+        return False
+    if data[0::record] != b"\n" * count or data[1::record] != bytes((size,)) * count:
+        return False
+    for j in range(fields):
+        if data[2 + 5 * j :: record] != bytes((_LANDMARK_FIELD_TAGS[j],)) * count:
+            return False
+    records = np.frombuffer(data, dtype=_landmark_record_dtype(fields), count=len(out))
+    out[:] = records["fields"]["value"][:, : out.shape[1]]
+    return True
+
+
+def _copy_landmarks(landmark_list, out):
+    """Zapise landmarky do predalokovaneho `out` (N, 3) nebo (N, 4 s visibility)."""
+    if hasattr(landmark_list, "SerializeToString") and _copy_landmarks_serialized(landmark_list, out):
+        return
+    # Obecna cesta (jiny tvar zpravy, neprotobufove vysledky).
+    getter = _XYZV if out.shape[1] == 4 else _XYZ
+    rows = [getter(l) for l in landmark_list.landmark[: len(out)]]
+    out[: len(rows)] = rows
+    out[len(rows) :] = np.nan
+
+
+def _fill_frame_landmarks(results, pose, left_hand, right_hand, lips):
+    """
+    Zapise landmarky jednoho snimku primo do predalokovanych radku
+    pose (23, 4), left_hand/right_hand (21, 3) a lips (2, 3).
+    Nedetekovane casti jsou NaN (visibility pozy 0). Vraci priznaky detekce.
+    Vysledek z vyrezu (atribut `roi`, viz RoiLandmarker) se prevede do souradnic celeho snimku.
+    """
     if results.pose_landmarks:
-        for i, l in enumerate(results.pose_landmarks.landmark[:23]):
-            pose[i, 0] = l.x
-            pose[i, 1] = l.y
-            pose[i, 2] = l.z
-            pose[i, 3] = l.visibility
+        _copy_landmarks(results.pose_landmarks, pose)
     else:
         pose[:, :3] = np.nan
         pose[:, 3] = 0.0
 
+    left_detected = bool(results.left_hand_landmarks)
     if left_detected:
-        for i, l in enumerate(results.left_hand_landmarks.landmark):
-            left_hand[i, 0] = l.x
-            left_hand[i, 1] = l.y
-            left_hand[i, 2] = l.z
+        _copy_landmarks(results.left_hand_landmarks, left_hand)
+    else:
+        left_hand[:] = np.nan
 
+    right_detected = bool(results.right_hand_landmarks)
     if right_detected:
-        for i, l in enumerate(results.right_hand_landmarks.landmark):
-            right_hand[i, 0] = l.x
-            right_hand[i, 1] = l.y
-            right_hand[i, 2] = l.z
+        _copy_landmarks(results.right_hand_landmarks, right_hand)
+    else:
+        right_hand[:] = np.nan
 
-    mouth_distance = np.nan
+    # Z obliceje se uklada jen horni (13) a dolni (14) ret.
+    face_detected = bool(results.face_landmarks)
     if face_detected:
-        upper_lip = np.array(
-            [
-                results.face_landmarks.landmark[13].x,
-                results.face_landmarks.landmark[13].y,
-                results.face_landmarks.landmark[13].z,
-            ],
-            dtype=np.float32,
-        )
-        lower_lip = np.array(
-            [
-                results.face_landmarks.landmark[14].x,
-                results.face_landmarks.landmark[14].y,
-                results.face_landmarks.landmark[14].z,
-            ],
-            dtype=np.float32,
-        )
-        mouth_distance = calculate_distance(upper_lip, lower_lip)
+        face = results.face_landmarks.landmark
+        for i, idx in enumerate(LIP_LANDMARKS):
+            lips[i] = _XYZ(face[idx])
+    else:
+        lips[:] = np.nan
 
-    return pose, left_hand, right_hand, mouth_distance, left_detected, right_detected, face_detected
+    roi = getattr(results, "roi", None)
+    if roi is not None:
+        x0, y0, sx, sy = roi
+        scale = np.array([sx, sy, sx], dtype=np.float32)
+        offset = np.array([x0, y0, 0.0], dtype=np.float32)
+        for xyz in (pose[:, :3], left_hand, right_hand, lips):
+            xyz *= scale
+            xyz += offset
 
+    return left_detected, right_detected, face_detected
 
-def _build_features_from_clean_landmarks(
+
+def _extract_frame_landmarks(results):
+    """Vrátí landmarky jednoho snímku + příznaky detekce."""
+    pose = np.empty((23, 4), dtype=np.float32)
+    left_hand = np.empty((21, 3), dtype=np.float32)
+    right_hand = np.empty((21, 3), dtype=np.float32)
+    lips = np.empty((2, 3), dtype=np.float32)
+    left_detected, right_detected, face_detected = _fill_frame_landmarks(results, pose, left_hand, right_hand, lips)
+    return pose, left_hand, right_hand, lips, left_detected, right_detected, face_detected
+
+
+FINGER_TIPS = [4, 8, 12, 16, 20]
+
+
+def _hand_config_sequence(hand_xyz, detected):
+    """Konfigurace prstů (T, 3); nedetekované snímky mají nuly."""
+    tips_dist = calculate_distance(hand_xyz[:, :1], hand_xyz[:, FINGER_TIPS])
+    config = np.stack(
+        [
+            np.mean(tips_dist, axis=1),
+            calculate_distance(hand_xyz[:, 4], hand_xyz[:, 8]),
+            calculate_distance(hand_xyz[:, 4], hand_xyz[:, 12]),
+        ],
+        axis=1,
+    )
+    config[~np.asarray(detected, dtype=bool)] = 0.0
+    return config
+
+
+def _build_features_sequence(
     pose_xyz,
     pose_vis,
     left_hand_xyz,
@@ -151,192 +378,964 @@ def _build_features_from_clean_landmarks(
     left_detected,
     right_detected,
 ):
-    """Sestaví 243D feature vektor ze stabilizovaných landmarků."""
-    distances = []
-    distances.append(calculate_distance(pose_xyz[15], pose_xyz[10]))
-    distances.append(calculate_distance(pose_xyz[16], pose_xyz[10]))
-    distances.append(calculate_distance(pose_xyz[15], pose_xyz[0]))
-    distances.append(calculate_distance(pose_xyz[16], pose_xyz[0]))
-    distances.append(calculate_distance(pose_xyz[11], pose_xyz[12]))
-    distances.append(pose_xyz[0, 1] - pose_xyz[11, 1])
-    distances.append(pose_xyz[0, 1] - pose_xyz[12, 1])
-    distances.append(calculate_distance(pose_xyz[11], pose_xyz[13]))
-    distances.append(calculate_distance(pose_xyz[12], pose_xyz[14]))
-    distances.append(calculate_distance(pose_xyz[13], pose_xyz[15]))
-    distances.append(mouth_distance)
-
-    angles = []
-    angles.append(calculate_angle(pose_xyz[11], pose_xyz[13], pose_xyz[15]))
-    angles.append(calculate_angle(pose_xyz[12], pose_xyz[14], pose_xyz[16]))
-
-    torso_center = (pose_xyz[11] + pose_xyz[12]) / 2
-    angles.append(calculate_angle(torso_center, pose_xyz[11], pose_xyz[13]))
-    angles.append(calculate_angle(torso_center, pose_xyz[12], pose_xyz[14]))
-
-    if pose_vis[10] > 0.5 and pose_vis[0] > 0.5:
-        neck_point = (pose_xyz[11] + pose_xyz[12]) / 2
-        angles.append(calculate_angle(neck_point, pose_xyz[0], pose_xyz[10]))
-    else:
-        angles.append(90.0)
+    """
+    Sestaví 243D feature vektory pro celou sekvenci najednou.
+    pose_xyz (T, 23, 3), pose_vis (T, 23), ruce (T, 21, 3), ostatní (T,).
+    """
+    t = pose_xyz.shape[0]
+    p = pose_xyz
 
-    wrist_to_shoulder_l = pose_xyz[15] - pose_xyz[11]
-    wrist_angle_l = np.degrees(np.arctan2(wrist_to_shoulder_l[1], wrist_to_shoulder_l[0]))
-    angles.append(wrist_angle_l)
+    distances = np.stack(
+        [
+            calculate_distance(p[:, 15], p[:, 10]),
+            calculate_distance(p[:, 16], p[:, 10]),
+            calculate_distance(p[:, 15], p[:, 0]),
+            calculate_distance(p[:, 16], p[:, 0]),
+            calculate_distance(p[:, 11], p[:, 12]),
+            p[:, 0, 1] - p[:, 11, 1],
+            p[:, 0, 1] - p[:, 12, 1],
+            calculate_distance(p[:, 11], p[:, 13]),
+            calculate_distance(p[:, 12], p[:, 14]),
+            calculate_distance(p[:, 13], p[:, 15]),
+            np.asarray(mouth_distance, dtype=np.float32),
+        ],
+        axis=1,
+    )
 
-    wrist_to_shoulder_r = pose_xyz[16] - pose_xyz[12]
-    wrist_angle_r = np.degrees(np.arctan2(wrist_to_shoulder_r[1], wrist_to_shoulder_r[0]))
-    angles.append(wrist_angle_r)
+    torso_center = (p[:, 11] + p[:, 12]) / 2
+    neck_visible = (pose_vis[:, 10] > 0.5) & (pose_vis[:, 0] > 0.5)
+    neck_angle = np.where(neck_visible, calculate_angle(torso_center, p[:, 0], p[:, 10]), 90.0)
 
-    angles.append(calculate_angle(pose_xyz[11], pose_xyz[12], pose_xyz[14]))
+    wrist_to_shoulder_l = p[:, 15] - p[:, 11]
+    wrist_to_shoulder_r = p[:, 16] - p[:, 12]
 
-    hand_config = []
-    if left_detected:
-        finger_tips_l = [4, 8, 12, 16, 20]
-        avg_finger_dist_l = np.mean([calculate_distance(left_hand_xyz[0], left_hand_xyz[i]) for i in finger_tips_l])
-        hand_config.append(avg_finger_dist_l)
-        hand_config.append(calculate_distance(left_hand_xyz[4], left_hand_xyz[8]))
-        hand_config.append(calculate_distance(left_hand_xyz[4], left_hand_xyz[12]))
-    else:
-        hand_config.extend([0.0, 0.0, 0.0])
+    angles = np.stack(
+        [
+            calculate_angle(p[:, 11], p[:, 13], p[:, 15]),
+            calculate_angle(p[:, 12], p[:, 14], p[:, 16]),
+            calculate_angle(torso_center, p[:, 11], p[:, 13]),
+            calculate_angle(torso_center, p[:, 12], p[:, 14]),
+            neck_angle,
+            np.degrees(np.arctan2(wrist_to_shoulder_l[:, 1], wrist_to_shoulder_l[:, 0])),
+            np.degrees(np.arctan2(wrist_to_shoulder_r[:, 1], wrist_to_shoulder_r[:, 0])),
+            calculate_angle(p[:, 11], p[:, 12], p[:, 14]),
+        ],
+        axis=1,
+    )
 
-    if right_detected:
-        finger_tips_r = [4, 8, 12, 16, 20]
-        avg_finger_dist_r = np.mean([calculate_distance(right_hand_xyz[0], right_hand_xyz[i]) for i in finger_tips_r])
-        hand_config.append(avg_finger_dist_r)
-        hand_config.append(calculate_distance(right_hand_xyz[4], right_hand_xyz[8]))
-        hand_config.append(calculate_distance(right_hand_xyz[4], right_hand_xyz[12]))
-    else:
-        hand_config.extend([0.0, 0.0, 0.0])
+    hand_config = np.concatenate(
+        [
+            _hand_config_sequence(left_hand_xyz, left_detected),
+            _hand_config_sequence(right_hand_xyz, right_detected),
+        ],
+        axis=1,
+    )
 
-    pose_4d = np.concatenate([pose_xyz, pose_vis[:, None]], axis=1)
+    pose_4d = np.concatenate([pose_xyz, pose_vis[:, :, None]], axis=2)
     combined = np.concatenate(
         [
-            pose_4d.flatten(),
-            left_hand_xyz.flatten(),
-            right_hand_xyz.flatten(),
-            np.array(distances, dtype=np.float32),
-            np.array(angles, dtype=np.float32),
-            np.array(hand_config, dtype=np.float32),
-        ]
+            pose_4d.reshape(t, -1),
+            left_hand_xyz.reshape(t, -1),
+            right_hand_xyz.reshape(t, -1),
+            distances.astype(np.float32),
+            angles.astype(np.float32),
+            hand_config.astype(np.float32),
+        ],
+        axis=1,
     )
     return combined.astype(np.float32)
 
+
+def _build_features_from_clean_landmarks(
+    pose_xyz,
+    pose_vis,
+    left_hand_xyz,
+    right_hand_xyz,
+    mouth_distance,
+    left_detected,
+    right_detected,
+):
+    """Sestaví 243D feature vektor ze stabilizovaných landmarků jednoho snímku."""
+    return _build_features_sequence(
+        pose_xyz=pose_xyz[None, ...],
+        pose_vis=pose_vis[None, ...],
+        left_hand_xyz=left_hand_xyz[None, ...],
+        right_hand_xyz=right_hand_xyz[None, ...],
+        mouth_distance=np.array([mouth_distance], dtype=np.float32),
+        left_detected=np.array([left_detected], dtype=bool),
+        right_detected=np.array([right_detected], dtype=bool),
+    )[0]
+
 def extract_enhanced_features(results):
     """
     Zachovaná logika 243D features pro jeden snímek.
     Tato funkce se hodí pro rychlý jednotkový test/preview.
     """
-    pose, left_hand, right_hand, mouth, left_ok, right_ok, _ = _extract_frame_landmarks(results)
+    pose, left_hand, right_hand, lips, left_ok, right_ok, face_ok = _extract_frame_landmarks(results)
+    landmarks = {
+        "pose": pose[None, ...],
+        "left_hand": left_hand[None, ...],
+        "right_hand": right_hand[None, ...],
+        "lips": lips[None, ...],
+        "left_ok": np.array([left_ok], dtype=bool),
+        "right_ok": np.array([right_ok], dtype=bool),
+        "face_ok": np.array([face_ok], dtype=bool),
+    }
+    return features_from_landmarks(landmarks)[0]
+
+
+def features_from_landmarks(landmarks, timings=None):
+    """
+    Z raw landmarku celeho videa (viz detect_landmarks) sestavi features (T, 243):
+    interpolace vypadku, vyhlazeni v case a odvozene features.
+    S `timings` se do nej pricitaji casy fazi interpolate / smooth / build.
+    """
+    pose_seq = landmarks["pose"]
+    lips = landmarks["lips"]
 
-    pose_xyz = _interpolate_nan_nd(pose[:, :3][None, ...])[0]
-    left_xyz = _interpolate_nan_nd(left_hand[None, ...])[0]
-    right_xyz = _interpolate_nan_nd(right_hand[None, ...])[0]
-    mouth_val = _interpolate_nan_1d(np.array([mouth], dtype=np.float32))[0]
+    start = time.perf_counter()
+    pose_xyz = _interpolate_nan_nd(pose_seq[:, :, :3])
+    left_hand_xyz = _interpolate_nan_nd(landmarks["left_hand"])
+    right_hand_xyz = _interpolate_nan_nd(landmarks["right_hand"])
+    mouth_seq = _interpolate_nan_1d(calculate_distance(lips[:, 0], lips[:, 1]))
+    interpolated = time.perf_counter()
 
-    return _build_features_from_clean_landmarks(
+    pose_xyz = _smooth_over_time(pose_xyz)
+    left_hand_xyz = _smooth_over_time(left_hand_xyz)
+    right_hand_xyz = _smooth_over_time(right_hand_xyz)
+    mouth_seq = _smooth_over_time(mouth_seq[:, None])[:, 0]
+    smoothed = time.perf_counter()
+
+    features = _build_features_sequence(
         pose_xyz=pose_xyz,
-        pose_vis=pose[:, 3],
-        left_hand_xyz=left_xyz,
-        right_hand_xyz=right_xyz,
-        mouth_distance=mouth_val,
-        left_detected=left_ok,
-        right_detected=right_ok,
+        pose_vis=pose_seq[:, :, 3],
+        left_hand_xyz=left_hand_xyz,
+        right_hand_xyz=right_hand_xyz,
+        mouth_distance=mouth_seq,
+        left_detected=landmarks["left_ok"],
+        right_detected=landmarks["right_ok"],
     )
+    if timings is not None:
+        timings["interpolate"] += interpolated - start
+        timings["smooth"] += smoothed - interpolated
+        timings["build"] += time.perf_counter() - smoothed
+    return features
+
+
+def checkpoint_root_for(output_root):
+    """Rozpracovane landmarky (checkpointy) lezi vedle features: data/features_enhanced -> data/features_enhanced_partial."""
+    return os.path.normpath(output_root) + "_partial"
+
 
-def extract(input_root, output_root, overwrite=False):
+def _iter_video_jobs(
+    input_root, output_root, manifest, config, overwrite=False, landmarks_root=None, shard=None, feature_format="float32"
+):
     """
-    Extrahuje ROZŠÍŘENÉ features pro temporal action segmentation
+    Projde vstupni strom a vrati ulohy (video, vystup, cache landmarku, checkpoint, popisek).
+    Video se preskoci, pokud ho manifest eviduje se stejnym obsahem i konfiguraci
+    a vystup existuje. Pokud se zmenil jen vypocet features a raw landmarky jsou
+    v cache, patri video mezi `rebuild_jobs` (bez MediaPipe).
+    Se `shard` = (index, pocet) se berou jen videa tohoto shardu (ostatni se ani nehashuji).
+    Vystup v jinem formatu ulozeni (`feature_format`) se za zastaraly nepovazuje
+    (prevod bez nove extrakce: utils/feature_store.py).
+    Vraci (jobs, rebuild_jobs, otisky videi popisek -> (size, mtime, sha256)).
     """
-    if not os.path.exists(input_root):
-        print(f"CHYBA: Slozka '{input_root}' nebyla nalezena!")
-        return
-
-    print(f"Startuji ROZSIŘENOU extrakci features z: {input_root}")
-    print(f"Features: 243 hodnot (raw 218 + distances 11 + angles 8 + hand config 6)")
+    jobs = []
+    rebuild_jobs = []
+    fingerprints = {}
+    videos = manifest["videos"]
 
     for root, dirs, files in os.walk(input_root):
-        for video_name in files:
-            if video_name.lower().endswith((".mp4", ".avi", ".mov")):
+        for video_name in sorted(files):
+            if video_name.lower().endswith(VIDEO_EXTENSIONS):
                 video_path = os.path.join(root, video_name)
                 rel_path = os.path.relpath(root, input_root)
+                label = os.path.relpath(video_path, input_root).replace("\\", "/")
+                if shard and not extraction_manifest.in_shard(label, *shard):
+                    continue
                 target_folder = os.path.join(output_root, rel_path)
                 os.makedirs(target_folder, exist_ok=True)
-                
-                output_path = os.path.join(target_folder, os.path.splitext(video_name)[0] + ".npy")
 
-                if os.path.exists(output_path) and not overwrite:
-                    print(f"Preskakuji (hotovo): {video_name}")
-                    continue
+                output_path = feature_path(os.path.join(target_folder, video_name), feature_format)
+                landmarks_path = None
+                if landmarks_root:
+                    landmarks_path = os.path.join(landmarks_root, os.path.splitext(label)[0] + ".npz")
 
-                print(f"Zpracovavam: {rel_path}/{video_name}")
-                cap = cv2.VideoCapture(video_path)
-                pose_seq = []
-                left_hand_seq = []
-                right_hand_seq = []
-                mouth_seq = []
-                left_ok_seq = []
-                right_ok_seq = []
-                
-                while cap.isOpened():
+                entry = videos.get(label)
+                size, mtime, sha256 = extraction_manifest.fingerprint_video(video_path, previous=entry)
+                fingerprints[label] = (size, mtime, sha256)
+                checkpoint_dir = os.path.join(checkpoint_root_for(output_root), os.path.splitext(label)[0])
+                job = (video_path, output_path, landmarks_path, checkpoint_dir, label)
+
+                if not overwrite:
+                    if extraction_manifest.is_up_to_date(entry, size, sha256, config, output_path):
+                        # Obsah stejny, jen se zmenilo mtime (napr. kopie) -> priste bez hashovani.
+                        entry["mtime"] = mtime
+                        print(f"Preskakuji (beze zmeny): {label}")
+                        continue
+                    if extraction_manifest.can_rebuild_from_landmarks(entry, size, sha256, config, landmarks_path):
+                        rebuild_jobs.append(job)
+                        continue
+                    existing = find_feature_file(output_path)
+                    if entry is None and existing:
+                        # Vystup z doby pred manifestem: prevezme se se soucasnou konfiguraci.
+                        frames = feature_frames(existing)
+                        output_rel = os.path.relpath(existing, output_root).replace("\\", "/")
+                        videos[label] = extraction_manifest.make_entry(size, mtime, sha256, config, output_rel, frames)
+                        print(f"Preskakuji (hotovo, doplneno do manifestu): {label}")
+                        continue
+
+                jobs.append(job)
+    return jobs, rebuild_jobs, fingerprints
+
+
+def _remove_deleted_videos(manifest, output_root, present_labels, landmarks_root=None, shard=None):
+    """Smaze features (a cache landmarku) videi, ktera uz ve vstupni slozce nejsou (jen videa shardu)."""
+    removed = []
+    for label in sorted(set(manifest["videos"]) - set(present_labels)):
+        if shard and not extraction_manifest.in_shard(label, *shard):
+            continue
+        entry = manifest["videos"].pop(label)
+        stale_paths = []
+        if entry.get("output"):
+            output_path = os.path.join(output_root, entry["output"])
+            stale_paths.append(find_feature_file(output_path))
+            stale_paths.append(feature_meta_path(output_path))
+        if entry.get("landmarks") and landmarks_root:
+            stale_paths.append(os.path.join(landmarks_root, entry["landmarks"]))
+        for stale_path in stale_paths:
+            if stale_path and os.path.exists(stale_path):
+                os.remove(stale_path)
+        shutil.rmtree(os.path.join(checkpoint_root_for(output_root), os.path.splitext(label)[0]), ignore_errors=True)
+        removed.append(label)
+        print(f"Odstraneno (video smazano): {label}")
+    return removed
+
+
+def _frame_stride(source_fps, target_fps):
+    """Krok mezi zpracovanymi snimky pro cilove fps (1 = kazdy snimek)."""
+    if not target_fps or source_fps <= 0:
+        return 1
+    return max(1, int(round(source_fps / target_fps)))
+
+
+class _FrameDecoder(threading.Thread):
+    """
+    Dekóduje snímky videa ve vlastním vlákně a plní omezenou frontu RGB snímků.
+    OpenCV při dekódování uvolňuje GIL, takže dekódování běží souběžně s MediaPipe;
+    velikost fronty omezuje paměť.
+    S `target_fps` se vynechane snimky jen `grab()`-nou (bez prevodu do obrazu),
+    s `max_side` se snimek pred MediaPipe zmensi.
+    `resume_frames` = pocet uz zpracovanych snimku (checkpoint), ty se preskoci.
+    """
+
+    _END = object()
+
+    def __init__(self, video_path, queue_size, timings, target_fps=None, max_side=None, resume_frames=0):
+        super().__init__(daemon=True)
+        self.video_path = video_path
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.timings = timings
+        self.target_fps = target_fps
+        self.max_side = max_side
+        self.resume_frames = resume_frames
+        self.source_fps = 0.0
+        self.frame_stride = 1
+        self.source_frames = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            self.source_fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+            self.frame_stride = _frame_stride(self.source_fps, self.target_fps)
+
+            # Pokracovani z checkpointu: snimky do konce posledniho ulozeneho bloku se jen grab()-nou
+            # (presne i u kodeku, kde CAP_PROP_POS_FRAMES skace na klicove snimky).
+            start = time.perf_counter()
+            skip = self.resume_frames * self.frame_stride
+            while self.source_frames < skip and not self._stop_event.is_set() and cap.grab():
+                self.source_frames += 1
+            self.timings["decode"] += time.perf_counter() - start
+
+            while cap.isOpened() and not self._stop_event.is_set():
+                start = time.perf_counter()
+                if self.source_frames % self.frame_stride == 0:
                     ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = holistic.process(rgb_frame)
-
-                    pose, left_hand, right_hand, mouth, left_ok, right_ok, _ = _extract_frame_landmarks(results)
-                    pose_seq.append(pose)
-                    left_hand_seq.append(left_hand)
-                    right_hand_seq.append(right_hand)
-                    mouth_seq.append(mouth)
-                    left_ok_seq.append(left_ok)
-                    right_ok_seq.append(right_ok)
-                
-                cap.release()
-                
-                # --- ČIŠTĚNÍ DAT ---
-                if len(pose_seq) == 0:
-                    print(f"  ⚠️ Prazdne video, preskakuji")
+                else:
+                    ret, frame = cap.grab(), None
+                decoded = time.perf_counter()
+                self.timings["decode"] += decoded - start
+                if not ret:
+                    break
+                self.source_frames += 1
+                if frame is None:
                     continue
 
-                pose_seq = np.asarray(pose_seq, dtype=np.float32)
-                left_hand_seq = np.asarray(left_hand_seq, dtype=np.float32)
-                right_hand_seq = np.asarray(right_hand_seq, dtype=np.float32)
-                mouth_seq = np.asarray(mouth_seq, dtype=np.float32)
-                left_ok_seq = np.asarray(left_ok_seq, dtype=bool)
-                right_ok_seq = np.asarray(right_ok_seq, dtype=bool)
-
-                pose_xyz = _interpolate_nan_nd(pose_seq[:, :, :3])
-                left_hand_xyz = _interpolate_nan_nd(left_hand_seq)
-                right_hand_xyz = _interpolate_nan_nd(right_hand_seq)
-                mouth_seq = _interpolate_nan_1d(mouth_seq)
-
-                pose_xyz = _smooth_over_time(pose_xyz)
-                left_hand_xyz = _smooth_over_time(left_hand_xyz)
-                right_hand_xyz = _smooth_over_time(right_hand_xyz)
-                mouth_seq = _smooth_over_time(mouth_seq[:, None])[:, 0]
-
-                final_data = []
-                for t in range(pose_seq.shape[0]):
-                    final_data.append(
-                        _build_features_from_clean_landmarks(
-                            pose_xyz=pose_xyz[t],
-                            pose_vis=pose_seq[t, :, 3],
-                            left_hand_xyz=left_hand_xyz[t],
-                            right_hand_xyz=right_hand_xyz[t],
-                            mouth_distance=mouth_seq[t],
-                            left_detected=left_ok_seq[t],
-                            right_detected=right_ok_seq[t],
-                        )
-                    )
-
-                final_data = np.asarray(final_data, dtype=np.float32)
-                
-                np.save(output_path, final_data)
-                print(f"  ✓ Ulozeno: {final_data.shape[0]} snimku × {final_data.shape[1]} features")
+                frame = self._resize(frame)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                self.timings["convert"] += time.perf_counter() - decoded
+                self._put(rgb_frame)
+        except Exception as exc:
+            self._put(exc)
+        finally:
+            cap.release()
+            self._put(self._END)
+
+    def _resize(self, frame):
+        if not self.max_side:
+            return frame
+        h, w = frame.shape[:2]
+        scale = self.max_side / max(h, w)
+        if scale >= 1.0:
+            return frame
+        # MediaPipe vraci normalizovane souradnice, zmenseni se do nich neprojevi.
+        return cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+    def meta(self):
+        """Metadata extrakce; frame_stride je nutny k zarovnani per-frame labelu."""
+        return {
+            "frame_stride": self.frame_stride,
+            "source_fps": self.source_fps,
+            "fps": self.source_fps / self.frame_stride if self.source_fps > 0 else 0.0,
+            "source_frames": self.source_frames,
+            "max_side": self.max_side,
+        }
+
+    def _put(self, item):
+        # Konzument mohl skončit chybou; nečekej na místo ve frontě donekonečna.
+        while not self._stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        while True:
+            wait_start = time.perf_counter()
+            item = self.frames.get()
+            self.timings["wait"] += time.perf_counter() - wait_start
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _new_timings():
+    # features = interpolate + smooth + build
+    return {
+        "decode": 0.0,
+        "convert": 0.0,
+        "wait": 0.0,
+        "landmarks": 0.0,
+        "features": 0.0,
+        "interpolate": 0.0,
+        "smooth": 0.0,
+        "build": 0.0,
+        "save": 0.0,
+        "frames": 0,
+    }
+
+
+def format_timings(timings):
+    """Jednoradkovy souhrn casu jednotlivych fazi extrakce."""
+    busy = timings["wait"] + timings["landmarks"] + timings["features"]
+    fps = timings["frames"] / busy if busy > 0 else 0.0
+    return (
+        f"decode {timings['decode']:.1f} s | cvtColor {timings['convert']:.1f} s | "
+        f"cekani na snimky {timings['wait']:.1f} s | landmarky {timings['landmarks']:.1f} s | "
+        f"features {timings['features']:.2f} s | {fps:.1f} snimku/s"
+    )
+
+
+CHECKPOINT_STATE = "state.json"
+
+
+class _LandmarkChunks:
+    """
+    Raw landmarky videa po blocich `chunk_frames` snimku v predalokovanych polich
+    (misto seznamu malych poli pro kazdy snimek). S `checkpoint_dir` se kazdy plny
+    blok hned zapise na disk (chunk_000000.npz, ...) a jeho pamet se pouzije znovu,
+    takze behem MediaPipe pamet neroste s delkou videa. Po padu extrakce `resume()`
+    vrati pocet snimku v ulozenych blocich a extrakce pokracuje za nimi.
+    `key` (otisk videa + nastaveni) zajisti, ze se nenavaze na checkpoint jineho obsahu.
+    """
+
+    def __init__(self, chunk_frames, checkpoint_dir=None, key=None):
+        self.chunk_frames = max(1, int(chunk_frames))
+        self.checkpoint_dir = checkpoint_dir
+        self.key = key
+        self.saved_chunks = []   # pocty snimku bloku ulozenych na disku
+        self.memory_chunks = []  # plne bloky, kdyz se neukladaji na disk
+        self.frames_done = 0     # snimky v plnych blocich
+        self.fill = 0
+        self.block = self._new_block()
+
+    def _new_block(self):
+        return {
+            name: np.empty((self.chunk_frames,) + shape, dtype=dtype)
+            for name, (shape, dtype) in LANDMARK_SHAPES.items()
+        }
+
+    def __len__(self):
+        return self.frames_done + self.fill
+
+    def _chunk_path(self, index):
+        return os.path.join(self.checkpoint_dir, f"chunk_{index:06d}.npz")
 
+    def resume(self):
+        """Navaze na ulozene bloky; vraci pocet hotovych snimku (0 = zacit od zacatku)."""
+        state_path = os.path.join(self.checkpoint_dir, CHECKPOINT_STATE)
+        state = None
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        if state is None or state.get("key") != self.key:
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+            return 0
+
+        for index, frames in enumerate(state.get("chunks", [])):
+            if not os.path.exists(self._chunk_path(index)):
+                break
+            self.saved_chunks.append(int(frames))
+        self.frames_done = sum(self.saved_chunks)
+        return self.frames_done
+
+    def append_results(self, results):
+        """Zapise landmarky snimku (vysledek landmarkeru) rovnou do dalsiho radku bloku."""
+        i = self.fill
+        block = self.block
+        left_ok, right_ok, face_ok = _fill_frame_landmarks(
+            results, block["pose"][i], block["left_hand"][i], block["right_hand"][i], block["lips"][i]
+        )
+        block["left_ok"][i] = left_ok
+        block["right_ok"][i] = right_ok
+        block["face_ok"][i] = face_ok
+        self.fill += 1
+        if self.fill == self.chunk_frames:
+            self._flush()
+
+    def _flush(self):
+        if self.checkpoint_dir:
+            # Atomicky zapis: pad behem zapisu nezanecha poskozeny blok.
+            path = self._chunk_path(len(self.saved_chunks))
+            save_npz(path, compressed=False, **{name: values[: self.fill] for name, values in self.block.items()})
+            self.saved_chunks.append(self.fill)
+            self._write_state()
+        else:
+            self.memory_chunks.append(self.block)
+            self.block = self._new_block()
+        self.frames_done += self.fill
+        self.fill = 0
+
+    def _write_state(self):
+        state_path = os.path.join(self.checkpoint_dir, CHECKPOINT_STATE)
+        with atomic_open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "chunks": self.saved_chunks}, f)
+
+    def _parts(self):
+        for index in range(len(self.saved_chunks)):
+            with np.load(self._chunk_path(index)) as data:
+                yield {name: data[name] for name in LANDMARK_KEYS}
+        yield from self.memory_chunks
+        yield {name: values[: self.fill] for name, values in self.block.items()}
+
+    def finish(self):
+        """Vsechny landmarky videa jako souvisla pole (T, ...); bloky se kopiruji rovnou na misto."""
+        total = len(self)
+        landmarks = {
+            name: np.empty((total,) + shape, dtype=dtype) for name, (shape, dtype) in LANDMARK_SHAPES.items()
+        }
+        pos = 0
+        for part in self._parts():
+            n = len(part["pose"])
+            for name in LANDMARK_KEYS:
+                landmarks[name][pos : pos + n] = part[name]
+            pos += n
+        return landmarks
+
+
+def _checkpoint_key(video_path, options):
+    """Otisk videa a nastaveni, ktera ovlivnuji raw landmarky (bez hashovani celeho videa)."""
+    stat = os.stat(video_path)
+    config = extraction_manifest._landmark_config(extractor_config(options))
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "config": config}
+
+
+def detect_landmarks(video_path, landmarker=None, options=None, timings=None, checkpoint_dir=None, heartbeat=None):
+    """
+    Spusti MediaPipe na vsech snimcich videa a vrati raw landmarky:
+    pose (T, 23, 4), left_hand/right_hand (T, 21, 3), lips (T, 2, 3) a priznaky
+    detekce left_ok/right_ok/face_ok (T,). Nedetekovane body jsou NaN.
+    Pod klicem "meta" je frame_stride a fps (viz _FrameDecoder.meta).
+    Dekódování běží ve vlákně (_FrameDecoder) souběžně s MediaPipe, fronta má
+    nejvýše `options["queue_size"]` snímků. Časy fází se přičítají do `timings`.
+    S `checkpoint_dir` se landmarky prubezne ukladaji po `options["chunk_frames"]`
+    snimcich a prerusena extrakce pokracuje od posledniho ulozeneho bloku
+    (checkpoint po uspesnem ulozeni vystupu maze _process_video_job).
+    `heartbeat()` se vola po kazdem zpracovanem snimku (hlidani zaseknuti v _run_parallel).
+    Vraci None, pokud video neobsahuje zadny snimek.
+    """
+    options = _resolve_options(options)
+    if landmarker is None:
+        landmarker = _get_landmarker(options)
+    if timings is None:
+        timings = _new_timings()
+
+    key = _checkpoint_key(video_path, options) if checkpoint_dir else None
+    chunks = _LandmarkChunks(options["chunk_frames"], checkpoint_dir=checkpoint_dir, key=key)
+    resume_frames = chunks.resume() if checkpoint_dir else 0
+    if resume_frames:
+        print(f"    ↻ Pokracuji z checkpointu od snimku {resume_frames}")
+
+    decoder = _FrameDecoder(
+        video_path,
+        options["queue_size"],
+        timings,
+        target_fps=options["target_fps"],
+        max_side=options["max_side"],
+        resume_frames=resume_frames,
+    )
+    decoder.start()
+    try:
+        for frame_idx, rgb_frame in enumerate(decoder, start=resume_frames):
+            start = time.perf_counter()
+            results = landmarker.process(rgb_frame, frame_idx)
+            chunks.append_results(results)
+            timings["landmarks"] += time.perf_counter() - start
+            if heartbeat is not None:
+                heartbeat()
+    finally:
+        decoder.stop()
+
+    # Do rychlosti se pocitaji jen snimky zpracovane v tomto behu.
+    timings["frames"] = len(chunks) - resume_frames
+    if len(chunks) == 0:
+        return None
+
+    landmarks = chunks.finish()
+    landmarks["meta"] = decoder.meta()
+    return landmarks
+
+
+def save_landmarks(path, landmarks):
+    """Ulozi raw landmarky videa jako komprimovane .npz (cache pro rebuild features bez MediaPipe)."""
+    arrays = {key: landmarks[key] for key in LANDMARK_KEYS}
+    save_npz(path, meta=np.array(json.dumps(landmarks.get("meta", {}))), **arrays)
+
+
+def load_landmarks(path):
+    with np.load(path) as data:
+        landmarks = {key: data[key] for key in LANDMARK_KEYS}
+        landmarks["meta"] = json.loads(str(data["meta"])) if "meta" in data.files else {}
+    return landmarks
+
+
+def extract_video(video_path, landmarker=None, options=None, timings=None):
+    """
+    Extrahuje 243D features z jednoho videa.
+    Vraci pole (T, 243) nebo None, pokud video neobsahuje zadny snimek.
+    """
+    if timings is None:
+        timings = _new_timings()
+    landmarks = detect_landmarks(video_path, landmarker=landmarker, options=options, timings=timings)
+    if landmarks is None:
+        return None
+
+    start = time.perf_counter()
+    final_data = features_from_landmarks(landmarks, timings=timings)
+    timings["features"] += time.perf_counter() - start
+    return final_data
+
+
+def _process_video_job(video_path, output_path, landmarks_path, checkpoint_dir, landmarker, options, heartbeat=None):
+    """
+    Extrahuje a ulozi jedno video (features + pripadne raw landmarky do cache).
+    Checkpoint rozpracovanych landmarku se smaze az po ulozeni vystupu.
+    Vraci (tvar ulozenych dat nebo None, casy fazi). S `options["profile"]`
+    obsahuji casy i celkovy cas, miru detekce a spicku RSS (extraction_profile).
+    """
+    options = _resolve_options(options)
+    if not options["checkpoint"]:
+        checkpoint_dir = None
+    timings = _new_timings()
+    if options["profile"]:
+        extraction_profile.reset_peak_rss()
+    job_start = time.perf_counter()
+    landmarks = detect_landmarks(
+        video_path,
+        landmarker=landmarker,
+        options=options,
+        timings=timings,
+        checkpoint_dir=checkpoint_dir,
+        heartbeat=heartbeat,
+    )
+    if landmarks is None:
+        if checkpoint_dir:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        return None, timings
+
+    start = time.perf_counter()
+    final_data = features_from_landmarks(landmarks, timings=timings)
+    saving = time.perf_counter()
+    timings["features"] += saving - start
+    if heartbeat is not None:
+        heartbeat()
+
+    if landmarks_path:
+        save_landmarks(landmarks_path, landmarks)
+    output_path = save_features(output_path, final_data, fmt=options["feature_format"], compressed=options["compress"])
+    write_feature_meta(output_path, landmarks["meta"])
+    if checkpoint_dir:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    timings["save"] += time.perf_counter() - saving
+
+    if options["profile"]:
+        timings["wall"] = time.perf_counter() - job_start
+        timings["detected"] = extraction_profile.detection_counts(landmarks)
+        timings["peak_rss_mb"] = extraction_profile.peak_rss_mb()
+    return final_data.shape, timings
+
+
+def rebuild_video_features(landmarks_path, output_path, fmt=None, compressed=False):
+    """
+    Prepocita features (T, 243) z cache raw landmarku bez MediaPipe. Vraci tvar.
+    Bez `fmt` se zachova format existujiciho vystupu (jinak float32).
+    """
+    landmarks = load_landmarks(landmarks_path)
+    final_data = features_from_landmarks(landmarks)
+    if fmt is None:
+        existing = find_feature_file(output_path)
+        fmt = feature_format(existing) if existing else "float32"
+    output_path = save_features(output_path, final_data, fmt=fmt, compressed=compressed)
+    if landmarks["meta"]:
+        write_feature_meta(output_path, landmarks["meta"])
+    return final_data.shape
+
+
+def _extract_worker(worker_id, task_queue, result_queue, options, progress):
+    """
+    Worker proces: vlastni landmarker (MediaPipe), ulohy dostava z hlavniho procesu.
+    `progress` (sdileny citac) zvysuje po kazdem snimku, hlavni proces podle nej pozna zaseknuti.
+    """
+    # OpenCV vlakna by se mezi workery jen pretahovala o jadra.
+    cv2.setNumThreads(1)
+    landmarker = _get_landmarker(options)
+
+    def heartbeat():
+        progress.value += 1
+
+    while True:
+        job = task_queue.get()
+        if job is None:
+            break
+
+        video_path, output_path, landmarks_path, checkpoint_dir, label = job
+        heartbeat()
+        try:
+            shape, timings = _process_video_job(
+                video_path, output_path, landmarks_path, checkpoint_dir, landmarker, options, heartbeat=heartbeat
+            )
+            result_queue.put((worker_id, shape, timings, None))
+        except Exception as exc:
+            result_queue.put((worker_id, None, None, f"{type(exc).__name__}: {exc}"))
+
+
+def _report_result(label, shape, error, failures, timings=None):
+    if error is not None:
+        failures.append((label, error))
+        print(f"  ❌ Chyba: {label} ({error})")
+    elif shape is None:
+        print(f"  ⚠️ Prazdne video, preskakuji: {label}")
+    else:
+        print(f"  ✓ Ulozeno: {label} ({shape[0]} snimku × {shape[1]} features)")
+    if timings is not None and timings["frames"] > 0:
+        print(f"    ⏱ {format_timings(timings)}")
+
+
+def _run_serial(jobs, on_result, options, claim_job=None):
+    landmarker = _get_landmarker(options)
+    for job in jobs:
+        if claim_job is not None and not claim_job(job):
+            continue
+        video_path, output_path, landmarks_path, checkpoint_dir, label = job
+        print(f"Zpracovavam: {label}")
+        try:
+            shape, timings = _process_video_job(
+                video_path, output_path, landmarks_path, checkpoint_dir, landmarker, options
+            )
+            on_result(label, shape, None, timings)
+        except Exception as exc:
+            on_result(label, None, f"{type(exc).__name__}: {exc}", None)
+
+
+def _run_parallel(
+    jobs, on_result, workers, options, video_timeout=None, stall_timeout=STALL_TIMEOUT, claim_job=None
+):
+    """
+    Rozdeli videa mezi `workers` procesu; volny worker si vzdy vezme dalsi video.
+    Padle nebo zaseknute video selze samo, jeho worker se ukonci a nahradi novym.
+    Zaseknuti = `stall_timeout` s bez jedineho zpracovaneho snimku (nezavisi na delce videa),
+    volitelne i celkovy limit `video_timeout` s na video.
+    `claim_job(job)` (rezim --claim) se vola tesne pred predanim videa workeru;
+    video, ktere zabral jiny stroj, se preskoci.
+    """
+    ctx = mp_proc.get_context("spawn")
+    result_queue = ctx.Queue()
+    pending_jobs = deque(jobs)
+
+    def start_worker(worker_id):
+        task_queue = ctx.Queue()
+        progress = ctx.RawValue("Q", 0)
+        proc = ctx.Process(
+            target=_extract_worker,
+            args=(worker_id, task_queue, result_queue, options, progress),
+            daemon=True,
+        )
+        proc.start()
+        return proc, task_queue, progress
+
+    procs = {}
+    running = {}  # worker_id -> [job, start_time, posledni stav citace, cas posledniho posunu]
+    for wid in range(min(workers, len(jobs))):
+        procs[wid] = start_worker(wid)
+    next_id = len(procs)
+
+    while pending_jobs or running:
+        for wid, (_, task_queue, progress) in procs.items():
+            while wid not in running and pending_jobs:
+                job = pending_jobs.popleft()
+                if claim_job is not None and not claim_job(job):
+                    continue
+                now = time.monotonic()
+                running[wid] = [job, now, progress.value, now]
+                task_queue.put(job)
+                print(f"Zpracovavam: {job[-1]} (worker {wid})")
+
+        try:
+            wid, shape, timings, error = result_queue.get(timeout=1.0)
+            # Vysledek workeru, ktery byl mezitim ukoncen, uz je zapocitany.
+            if wid in running:
+                job = running.pop(wid)[0]
+                on_result(job[-1], shape, error, timings)
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for wid, (proc, _, progress) in list(procs.items()):
+            current = running.get(wid)
+            error = None
+            if current is not None:
+                if progress.value != current[2]:
+                    current[2], current[3] = progress.value, now
+                if stall_timeout and now - current[3] > stall_timeout:
+                    error = f"zadny posun {stall_timeout:.0f} s (zaseknute dekodovani / MediaPipe)"
+                elif video_timeout and now - current[1] > video_timeout:
+                    error = f"timeout po {video_timeout:.0f} s"
+            if proc.is_alive() and error is None:
+                continue
+
+            if error is not None:
+                proc.terminate()
+            proc.join()
+
+            if current is not None:
+                running.pop(wid)
+                if error is None:
+                    error = f"worker spadl (exit code {proc.exitcode})"
+                on_result(current[0][-1], None, error, None)
+
+            del procs[wid]
+            if pending_jobs:
+                procs[next_id] = start_worker(next_id)
+                next_id += 1
+
+    for _, task_queue, _ in procs.values():
+        task_queue.put(None)
+    for proc, _, _ in procs.values():
+        proc.join()
+
+
+def extract(
+    input_root,
+    output_root,
+    overwrite=False,
+    workers=1,
+    video_timeout=None,
+    stall_timeout=STALL_TIMEOUT,
+    options=None,
+    landmarks_root=None,
+    shard_index=0,
+    shard_count=1,
+    claim=False,
+    claim_stale_after=900.0,
+):
+    """
+    Extrahuje ROZŠÍŘENÉ features pro temporal action segmentation.
+    S `workers` > 1 bezi videa paralelne v samostatnych procesech; video, jehoz worker
+    `stall_timeout` s nezpracoval zadny snimek (nebo bezi dele nez `video_timeout` s), selze.
+    `options` doplnuje EXTRACT_DEFAULTS (backend, face_stride, queue_size,
+    target_fps, max_side, roi, roi_padding, chunk_frames, checkpoint, profile,
+    feature_format, compress). K features se uklada
+    <video>.meta.json s frame_stride. Rozpracovane landmarky se prubezne ukladaji
+    do <output_root>_partial, po padu extrakce video pokracuje od posledniho bloku.
+    S `landmarks_root` se ukladaji i raw landmarky (.npz), ze kterych jde
+    features prepocitat bez MediaPipe (rebuild_features.py).
+
+    Vice stroju nad sdilenym diskem: `shard_index`/`shard_count` rozdeli videa
+    pevne podle popisku, s `claim` si stroje videa zabiraji pres <output_root>_claims
+    (claim neobnoveny `claim_stale_after` s prevezme jiny stroj). Vystupy se zapisuji
+    atomicky a manifest se uklada pod zamkem jen se zaznamy zmenenymi timto behem.
+    """
+    options = _resolve_options(options)
+    if not os.path.exists(input_root):
+        print(f"CHYBA: Slozka '{input_root}' nebyla nalezena!")
+        return
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        print(f"CHYBA: Neplatny shard {shard_index}/{shard_count} (plati 0 <= shard_index < shard_count)!")
+        return
+    shard = (shard_index, shard_count) if shard_count > 1 else None
+
+    print(f"Startuji ROZSIŘENOU extrakci features z: {input_root}")
+    print(f"Features: 243 hodnot (raw 218 + distances 11 + angles 8 + hand config 6)")
+    print(f"Landmark backend: {options['backend']}")
+    if options["roi"]:
+        print(f"Vyrez kolem osoby: okraj {options['roi_padding']:.0%}, pri ztrate trackingu cely snimek")
+    if options["target_fps"] or options["max_side"]:
+        print(f"Cilove fps: {options['target_fps'] or 'puvodni'} | max. strana: {options['max_side'] or 'puvodni'} px")
+    if shard:
+        print(f"Shard {shard_index + 1}/{shard_count}")
+
+    config = extractor_config(options)
+    manifest_path = extraction_manifest.manifest_path_for(output_root)
+    manifest = extraction_manifest.load_manifest(manifest_path)
+    videos_before = copy.deepcopy(manifest["videos"])
+
+    jobs, rebuild_jobs, fingerprints = _iter_video_jobs(
+        input_root,
+        output_root,
+        manifest,
+        config,
+        overwrite=overwrite,
+        landmarks_root=landmarks_root,
+        shard=shard,
+        feature_format=options["feature_format"],
+    )
+    _remove_deleted_videos(manifest, output_root, fingerprints.keys(), landmarks_root=landmarks_root, shard=shard)
+    extraction_manifest.merge_manifest(
+        manifest_path, manifest, extraction_manifest.changed_labels(videos_before, manifest["videos"])
+    )
+
+    failures = []
+    profiler = None
+    if options["profile"]:
+        all_jobs = rebuild_jobs + jobs
+        profiler = extraction_profile.ExtractionProfiler(
+            extraction_profile.profile_path_for(output_root),
+            total_videos=len(all_jobs),
+            total_bytes=sum(fingerprints[job[-1]][0] for job in all_jobs),
+        )
+
+    heartbeat = None
+    if claim:
+        claims_root = extraction_manifest.claims_root_for(output_root)
+        heartbeat = extraction_manifest.ClaimHeartbeat(claims_root, interval_s=max(1.0, claim_stale_after / 4))
+        heartbeat.start()
+
+        def claim_job(job):
+            _, output_path, _, _, label = job
+            if not extraction_manifest.try_claim(claims_root, label, claim_stale_after):
+                print(f"Preskakuji (zpracovava jiny stroj): {label}")
+                if profiler is not None:
+                    profiler.skip(fingerprints[label][0])
+                return False
+            # Seznam uloh vznikl na zacatku behu; video mezitim mohl dokoncit jiny stroj.
+            entry = extraction_manifest.load_manifest(manifest_path)["videos"].get(label)
+            size, _, sha256 = fingerprints[label]
+            if not overwrite and extraction_manifest.is_up_to_date(entry, size, sha256, config, output_path):
+                extraction_manifest.release_claim(claims_root, label)
+                manifest["videos"][label] = entry
+                print(f"Preskakuji (hotovo jinym strojem): {label}")
+                if profiler is not None:
+                    profiler.skip(fingerprints[label][0])
+                return False
+            heartbeat.add(label)
+            return True
+
+    else:
+        claim_job = None
+
+    def on_result(label, shape, error, timings):
+        _report_result(label, shape, error, failures, timings=timings)
+        if profiler is not None:
+            profiler.record(label, fingerprints[label][0], shape, error, timings)
+        if claim:
+            heartbeat.discard(label)
+            extraction_manifest.release_claim(claims_root, label)
+        if error is not None:
+            return
+        # Manifest se uklada po kazdem videu, prerusena extrakce tak nezacina od nuly.
+        size, mtime, sha256 = fingerprints[label]
+        output_rel = feature_path(label, options["feature_format"])
+        frames = 0 if shape is None else int(shape[0])
+        stale_output = os.path.join(output_root, output_rel)
+        if frames == 0:
+            for stale_path in (find_feature_file(stale_output), feature_meta_path(stale_output)):
+                if stale_path and os.path.exists(stale_path):
+                    os.remove(stale_path)
+        landmarks_rel = None
+        if landmarks_root and frames:
+            landmarks_rel = os.path.splitext(label)[0] + ".npz"
+        manifest["videos"][label] = extraction_manifest.make_entry(
+            size, mtime, sha256, config, output_rel if frames else None, frames, landmarks_rel=landmarks_rel
+        )
+        extraction_manifest.merge_manifest(manifest_path, manifest, [label])
+
+    try:
+        for job in rebuild_jobs:
+            if claim_job is not None and not claim_job(job):
+                continue
+            video_path, output_path, landmarks_path, _, label = job
+            print(f"Prepocitavam z cache landmarku: {label}")
+            try:
+                shape = rebuild_video_features(
+                    landmarks_path, output_path, fmt=options["feature_format"], compressed=options["compress"]
+                )
+                on_result(label, shape, None, None)
+            except Exception as exc:
+                on_result(label, None, f"{type(exc).__name__}: {exc}", None)
+
+        if jobs:
+            if workers > 1:
+                print(f"Paralelni extrakce: {min(workers, len(jobs))} workeru, {len(jobs)} videi")
+                _run_parallel(
+                    jobs,
+                    on_result,
+                    workers,
+                    options,
+                    video_timeout=video_timeout,
+                    stall_timeout=stall_timeout,
+                    claim_job=claim_job,
+                )
+            else:
+                _run_serial(jobs, on_result, options, claim_job=claim_job)
+    finally:
+        if heartbeat is not None:
+            heartbeat.stop()
+
+    if profiler is not None:
+        profiler.summary()
     print("\n=== HOTOVO ===")
+    if failures:
+        print(f"Selhalo {len(failures)} videi:")
+        for label, error in failures:
+            print(f"  ❌ {label}: {error}")
     print("Extrahované features obsahují:")
     print("  • Raw coordinates (218): základní pozice bodů")
     print("  • Distances (11): klíčové vzdálenosti (ruka-ústa, mouth distance, etc.)")
@@ -349,12 +1348,153 @@ if __name__ == "__main__":
     parser.add_argument(
         "--overwrite",
         action="store_true",
-        help="Prepise jiz existujici .npy soubory (bez nutnosti mazat slozky).",
+        help="Prepise vsechny .npy soubory, i kdyz se video ani konfigurace nezmenily.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Pocet paralelnich procesu (kazdy s vlastni MediaPipe instanci).",
+    )
+    parser.add_argument(
+        "--video_timeout",
+        type=float,
+        default=None,
+        help="Max. doba zpracovani jednoho videa v s (jen pro --workers > 1, vychozi bez limitu).",
+    )
+    parser.add_argument(
+        "--stall_timeout",
+        type=float,
+        default=STALL_TIMEOUT,
+        help="Video selze, kdyz jeho worker tolik s nezpracuje zadny snimek (jen pro --workers > 1, 0 = vypnuto).",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=int,
+        default=EXTRACT_DEFAULTS["queue_size"],
+        help="Max. pocet dekodovanych snimku cekajicich na MediaPipe (omezuje pamet).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(LANDMARK_BACKENDS.keys()),
+        default=EXTRACT_DEFAULTS["backend"],
+        help="holistic = puvodni Holistic s face mesh; pose_hands = Pose + Hands, face mesh jen kvuli rtum.",
+    )
+    parser.add_argument(
+        "--face_stride",
+        type=int,
+        default=EXTRACT_DEFAULTS["face_stride"],
+        help="Jen pro --backend pose_hands: face mesh na kazdem N-tem snimku (0 = vypnout).",
+    )
+    parser.add_argument(
+        "--target_fps",
+        type=float,
+        default=None,
+        help="Zpracovat jen kazdy N-ty snimek (N = round(fps videa / target_fps)); labely se zarovnaji pri nacteni.",
+    )
+    parser.add_argument(
+        "--max_side",
+        type=int,
+        default=None,
+        help="Zmensit snimky pred MediaPipe tak, aby delsi strana mela nejvyse tolik pixelu.",
+    )
+    parser.add_argument(
+        "--roi",
+        action="store_true",
+        help="MediaPipe jen na vyrezu kolem osoby podle pozy z predchoziho snimku (staticke zabery, mala osoba v obraze).",
+    )
+    parser.add_argument(
+        "--roi_padding",
+        type=float,
+        default=EXTRACT_DEFAULTS["roi_padding"],
+        help="Okraj vyrezu kolem horni casti tela jako podil delsi strany boxu (jen s --roi).",
+    )
+    parser.add_argument(
+        "--feature_format",
+        choices=list(FEATURE_FORMATS),
+        default=EXTRACT_DEFAULTS["feature_format"],
+        help="float32 = .npy; float16 / int16 = kompaktni .npz (2-4x mensi, loadery ho ctou samy).",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Kompaktni format navic komprimovat (po blocich radku).",
+    )
+    parser.add_argument(
+        "--chunk_frames",
+        type=int,
+        default=EXTRACT_DEFAULTS["chunk_frames"],
+        help="Landmarky se drzi a checkpointuji po blocich tolika snimku.",
+    )
+    parser.add_argument(
+        "--no_checkpoint",
+        action="store_true",
+        help="Neukladat rozpracovane landmarky prubezne na disk (po padu se video zpracuje znovu od zacatku).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Casy fazi, snimky/s, miry detekce a spicka RSS po videich do data/features_enhanced_profile.jsonl + souhrn s ETA.",
+    )
+    parser.add_argument(
+        "--shard_index",
+        type=int,
+        default=0,
+        help="Index tohoto stroje (0..shard_count-1) pri rozdeleni videi mezi vice stroju.",
+    )
+    parser.add_argument(
+        "--shard_count",
+        type=int,
+        default=1,
+        help="Pocet stroju, mezi ktere se videa pevne rozdeli podle cesty.",
+    )
+    parser.add_argument(
+        "--claim",
+        action="store_true",
+        help="Stroje si videa zabiraji pres lock soubory v data/features_enhanced_claims (bez pevneho rozdeleni).",
+    )
+    parser.add_argument(
+        "--claim_stale_after",
+        type=float,
+        default=900.0,
+        help="Claim neobnoveny tolik s (spadly stroj) muze prevzit jiny stroj.",
+    )
+    parser.add_argument(
+        "--no_landmark_cache",
+        action="store_true",
+        help="Neukladat raw landmarky do data/landmarks_raw (rebuild features pak neni mozny).",
     )
     args = parser.parse_args()
 
     paths = project_paths(__file__)
     input_dir = str(paths["raw_videos"])
     output_dir = str(paths["features_enhanced"])
+    landmarks_dir = None if args.no_landmark_cache else str(paths["landmarks_raw"])
     
-    extract(input_dir, output_dir, overwrite=args.overwrite)
+    extract(
+        input_dir,
+        output_dir,
+        overwrite=args.overwrite,
+        workers=args.workers,
+        video_timeout=args.video_timeout,
+        stall_timeout=args.stall_timeout,
+        options={
+            "backend": args.backend,
+            "face_stride": args.face_stride,
+            "queue_size": args.queue_size,
+            "target_fps": args.target_fps,
+            "max_side": args.max_side,
+            "roi": args.roi,
+            "roi_padding": args.roi_padding,
+            "chunk_frames": args.chunk_frames,
+            "checkpoint": not args.no_checkpoint,
+            "profile": args.profile,
+            "feature_format": args.feature_format,
+            "compress": args.compress,
+        },
+        landmarks_root=landmarks_dir,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        claim=args.claim,
+        claim_stale_after=args.claim_stale_after,
+    )
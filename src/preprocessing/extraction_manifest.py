@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from utils.atomic_io import atomic_open
+from utils.feature_store import find_feature_file
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+# Zamek manifestu starsi nez tohle patri procesu, ktery spadl.
+MANIFEST_LOCK_STALE_S = 60.0
+
+
+def manifest_path_for(output_root):
+    """Manifest lezi vedle slozky s features: data/features_enhanced -> data/features_enhanced_manifest.json."""
+    return os.path.normpath(output_root) + "_manifest.json"
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "videos": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest.setdefault("videos", {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """Zapise manifest atomicky (docasny soubor + rename), aby prerusenim nevznikl poskozeny JSON."""
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def _create_exclusive(path, payload):
+    """Vytvori soubor, jen pokud jeste neexistuje (O_EXCL je atomicke i na NFS). Vraci True pri uspechu."""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    return True
+
+
+# Identita tohoto procesu v zamcich a claimech (pid se muze opakovat po restartu nebo na jinem stroji).
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def _owner():
+    """
+    Obsah zamku/claimu. `time` je cas zabrani (obnovuje ho ClaimHeartbeat) z hodin stroje,
+    ktery zamek drzi; mtime souboru na sdilenem disku nastavuje server a jeho hodiny se
+    od lokalnich mohou lisit.
+    """
+    return {"host": socket.gethostname(), "pid": os.getpid(), "token": _PROCESS_TOKEN, "time": time.time()}
+
+
+def _read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _parse_owner(text):
+    try:
+        return json.loads(text) if text else None
+    except ValueError:
+        return None
+
+
+def _read_owner(path):
+    """Obsah zamku/claimu, nebo None (soubor neexistuje nebo se prave zapisuje)."""
+    return _parse_owner(_read_text(path))
+
+
+def _is_own(owner):
+    return owner is not None and owner.get("token") == _PROCESS_TOKEN
+
+
+def _is_stale(path, text, stale_after):
+    owner = _parse_owner(text)
+    if owner is not None:
+        return time.time() - float(owner.get("time", 0.0)) > stale_after
+    # Prazdny/poskozeny soubor (proces spadl mezi O_EXCL a zapisem obsahu): jen zde podle mtime.
+    try:
+        return time.time() - os.path.getmtime(path) > stale_after
+    except FileNotFoundError:
+        return False
+
+
+def _break_stale(path, stale_after):
+    """
+    Odstrani zamek/claim procesu, ktery spadl. Zamek se nejdriv prejmenuje (ze dvou procesu
+    uspeje jen jeden) a presunuty obsah se porovna s tim, ktery byl posouzen jako stary:
+    mezitim ho mohl jiny stroj odstranit a zalozit novy, ten se pak vrati zpet.
+    """
+    text = _read_text(path)
+    if text is None or not _is_stale(path, text, stale_after):
+        return
+    stale_path = f"{path}.{socket.gethostname()}.{os.getpid()}.stale"
+    try:
+        os.rename(path, stale_path)
+    except FileNotFoundError:
+        return
+    if _read_text(stale_path) == text:
+        os.remove(stale_path)
+        return
+    # Presunuli jsme cizi cerstvy zamek: vratit ho, pokud mezitim nevznikl dalsi.
+    try:
+        os.link(stale_path, path)
+    except FileExistsError:
+        pass
+    except OSError:
+        # Disk bez hardlinku (FAT, nektera SMB): rename by existujici zamek prepsal, proto jen kdyz chybi.
+        if not os.path.exists(path):
+            os.rename(stale_path, path)
+            return
+    os.remove(stale_path)
+
+
+def _release(path):
+    """Smaze zamek/claim, jen pokud patri tomuto procesu (mohl ho prevzit jiny stroj)."""
+    if _is_own(_read_owner(path)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def manifest_lock(path, poll_s=0.05):
+    """Zamek <manifest>.lock pro soubezne extrakce (vice procesu/stroju nad stejnym manifestem)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock_path = path + ".lock"
+    while not _create_exclusive(lock_path, _owner()):
+        _break_stale(lock_path, MANIFEST_LOCK_STALE_S)
+        time.sleep(poll_s)
+    try:
+        yield
+    finally:
+        _release(lock_path)
+
+
+def merge_manifest(path, manifest, labels):
+    """
+    Ulozi do manifestu na disku jen zaznamy `labels` z `manifest` (chybejici = smazany).
+    Manifest se pod zamkem znovu nacte, takze extrakce bezici soubezne na jinych
+    strojich (--shard_index / --claim) si navzajem neprepisuji vysledky.
+    Vraci aktualni manifest z disku.
+    """
+    with manifest_lock(path):
+        current = load_manifest(path)
+        for label in labels:
+            if label in manifest["videos"]:
+                current["videos"][label] = manifest["videos"][label]
+            else:
+                current["videos"].pop(label, None)
+        save_manifest(path, current)
+    return current
+
+
+def changed_labels(before, after):
+    """Popisky videi, jejichz zaznam se mezi dvema stavy manifestu["videos"] lisi."""
+    return sorted(label for label in set(before) | set(after) if before.get(label) != after.get(label))
+
+
+def in_shard(label, shard_index, shard_count):
+    """Deterministicke rozdeleni videi mezi stroje podle popisku (stejne na vsech strojich i behach)."""
+    return zlib.crc32(label.encode("utf-8")) % shard_count == shard_index
+
+
+def claims_root_for(output_root):
+    """Claimy rozpracovanych videi: data/features_enhanced -> data/features_enhanced_claims."""
+    return os.path.normpath(output_root) + "_claims"
+
+
+def claim_path(claims_root, label):
+    return os.path.join(claims_root, os.path.splitext(label)[0] + ".claim")
+
+
+def try_claim(claims_root, label, stale_after):
+    """
+    Zabere video pro tento proces (soubor <label>.claim vytvoreny s O_EXCL).
+    Claim, jehoz cas se dele nez `stale_after` s neobnovil (ClaimHeartbeat), patri
+    stroji, ktery spadl, a muze ho prevzit jiny. Vraci True, pokud se video zabralo.
+    """
+    path = claim_path(claims_root, label)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if _create_exclusive(path, _owner()):
+        return True
+    _break_stale(path, stale_after)
+    return _create_exclusive(path, _owner())
+
+
+def release_claim(claims_root, label):
+    _release(claim_path(claims_root, label))
+
+
+class ClaimHeartbeat(threading.Thread):
+    """Prubezne obnovuje cas v drzenych claimech, aby je jine stroje nepovazovaly za opustene."""
+
+    def __init__(self, claims_root, interval_s):
+        super().__init__(daemon=True)
+        self.claims_root = claims_root
+        self.interval_s = interval_s
+        self.labels = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def add(self, label):
+        with self._lock:
+            self.labels.add(label)
+
+    def discard(self, label):
+        with self._lock:
+            self.labels.discard(label)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            with self._lock:
+                labels = list(self.labels)
+            for label in labels:
+                path = claim_path(self.claims_root, label)
+                # Claim prevzaty jinym strojem se neprepisuje.
+                if _is_own(_read_owner(path)):
+                    with atomic_open(path, "w", encoding="utf-8") as f:
+                        json.dump(_owner(), f)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_video(video_path, previous=None):
+    """
+    Vrati (size, mtime, sha256) videa. Pokud se velikost ani mtime oproti
+    `previous` nezmenily, hash se neprepocitava (cteni 13 GB kazdou noc by trvalo).
+    """
+    stat = os.stat(video_path)
+    size = stat.st_size
+    mtime = stat.st_mtime
+    if previous and previous.get("size") == size and previous.get("mtime") == mtime and previous.get("sha256"):
+        return size, mtime, previous["sha256"]
+    return size, mtime, hash_file(video_path)
+
+
+def is_up_to_date(entry, size, sha256, config, output_path):
+    """
+    Video se nemusi znovu extrahovat: stejny obsah, stejna konfigurace extraktoru
+    a vystup existuje (v libovolnem formatu ulozeni, viz utils.feature_store).
+    """
+    if not entry:
+        return False
+    if entry.get("size") != size or entry.get("sha256") != sha256:
+        return False
+    if entry.get("config") != config:
+        return False
+    # Prazdne video nema vystup, ale je zpracovane.
+    return entry.get("frames") == 0 or find_feature_file(output_path) is not None
+
+
+def _landmark_config(config):
+    """Cast konfigurace, ktera ovlivnuje raw landmarky (vse krome verze vypoctu features)."""
+    return {key: value for key, value in (config or {}).items() if key != "extractor_version"}
+
+
+def can_rebuild_from_landmarks(entry, size, sha256, config, landmarks_path):
+    """
+    Features jsou zastarale jen kvuli zmene vypoctu features (EXTRACTOR_VERSION),
+    video i nastaveni MediaPipe jsou stejne a raw landmarky jsou v cache
+    -> staci prepocitat features bez MediaPipe.
+    """
+    if not entry or not landmarks_path:
+        return False
+    if entry.get("size") != size or entry.get("sha256") != sha256:
+        return False
+    if _landmark_config(entry.get("config")) != _landmark_config(config):
+        return False
+    return bool(entry.get("landmarks")) and os.path.exists(landmarks_path)
+
+
+def make_entry(size, mtime, sha256, config, output_rel, frames, landmarks_rel=None):
+    return {
+        "size": size,
+        "mtime": mtime,
+        "sha256": sha256,
+        "config": config,
+        "output": output_rel,
+        "landmarks": landmarks_rel,
+        "frames": frames,
+    }
@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+# Faze extrakce v poradi zpracovani; decode/convert bezi ve vlakne dekoderu
+# soubezne s MediaPipe, wait je cas, kdy MediaPipe cekal na snimek.
+PROFILE_STAGES = ("decode", "convert", "wait", "landmarks", "interpolate", "smooth", "build", "save")
+DETECTION_PARTS = ("pose", "left", "right", "face")
+
+
+def profile_path_for(output_root):
+    """Profil extrakce lezi vedle features: data/features_enhanced -> data/features_enhanced_profile.jsonl."""
+    return os.path.normpath(output_root) + "_profile.jsonl"
+
+
+def reset_peak_rss():
+    """Vynuluje spicku RSS procesu (Linux: /proc/self/clear_refs), aby se merila po videich."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """
+    Spicka RSS procesu v MB. Na Linuxu od posledniho reset_peak_rss(),
+    jinde od startu procesu. None, pokud ji nejde zjistit.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS vraci bajty, Linux kB.
+        return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024.0 * 1024.0)
+    except ImportError:
+        return None
+
+
+def detection_counts(landmarks):
+    """Pocty snimku s detekovanou pozou / levou / pravou rukou / obliceje (viz detect_landmarks)."""
+    return {
+        "frames": int(len(landmarks["pose"])),
+        "pose": int(np.count_nonzero(~np.isnan(landmarks["pose"][:, 0, 0]))),
+        "left": int(np.count_nonzero(landmarks["left_ok"])),
+        "right": int(np.count_nonzero(landmarks["right_ok"])),
+        "face": int(np.count_nonzero(landmarks["face_ok"])),
+    }
+
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+class ExtractionProfiler:
+    """
+    Zapisuje profil kazdeho videa (casy fazi, snimky/s, miry detekce, spicka RSS)
+    jako jeden radek JSONL a prubezne tiskne postup celeho datasetu s ETA.
+    ETA se odhaduje z objemu zbyvajicich videi (bajty) a dosavadni propustnosti.
+    """
+
+    def __init__(self, path, total_videos, total_bytes):
+        self.path = path
+        self.total_videos = total_videos
+        self.total_bytes = total_bytes
+        self.done_videos = 0
+        self.done_bytes = 0
+        self.failed = 0
+        self.frames = 0
+        self.stages = dict.fromkeys(PROFILE_STAGES, 0.0)
+        self.detected = dict.fromkeys(DETECTION_PARTS, 0)
+        self.detected_frames = 0
+        self.peak_rss_mb = 0.0
+        self.host = socket.gethostname()
+        self.start = time.perf_counter()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def skip(self, size):
+        """Video zpracoval jiny stroj (--claim): nepocita se do postupu ani ETA."""
+        self.total_videos -= 1
+        self.total_bytes -= size
+
+    def record(self, label, size, shape, error, timings):
+        """Zapise profil jednoho videa a vytiskne postup."""
+        self.done_videos += 1
+        self.done_bytes += size
+        row = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": self.host,
+            "video": label,
+            "size_mb": round(size / (1024.0 * 1024.0), 2),
+            "status": "error" if error is not None else ("empty" if shape is None else "ok"),
+            "error": error,
+            "frames": None if shape is None else int(shape[0]),
+        }
+        if error is not None:
+            self.failed += 1
+
+        if timings is not None and timings["frames"] > 0:
+            busy = timings["wait"] + timings["landmarks"] + timings["features"]
+            row.update({f"{stage}_s": round(timings[stage], 4) for stage in PROFILE_STAGES})
+            row["wall_s"] = round(timings.get("wall", 0.0), 4)
+            row["fps"] = round(timings["frames"] / busy, 2) if busy > 0 else None
+            self.frames += timings["frames"]
+            for stage in PROFILE_STAGES:
+                self.stages[stage] += timings[stage]
+
+            detected = timings.get("detected")
+            if detected and detected["frames"]:
+                for part in DETECTION_PARTS:
+                    row[f"{part}_rate"] = round(detected[part] / detected["frames"], 4)
+                    self.detected[part] += detected[part]
+                self.detected_frames += detected["frames"]
+
+            peak = timings.get("peak_rss_mb")
+            if peak is not None:
+                row["peak_rss_mb"] = round(peak, 1)
+                self.peak_rss_mb = max(self.peak_rss_mb, peak)
+
+        # Jeden radek na zapis (O_APPEND), soubezne behy na vice strojich se neprekryji.
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._print_progress()
+
+    def _print_progress(self):
+        elapsed = time.perf_counter() - self.start
+        line = f"    📊 {self.done_videos}/{self.total_videos} videi | {self.frames / max(elapsed, 1e-9):.1f} snimku/s"
+        if 0 < self.done_bytes < self.total_bytes:
+            eta = (self.total_bytes - self.done_bytes) * elapsed / self.done_bytes
+            line += f" | ETA {_format_duration(eta)}"
+        print(line)
+
+    def summary(self):
+        """Souhrn za cely beh: podil fazi na case, propustnost, miry detekce, spicka pameti."""
+        elapsed = time.perf_counter() - self.start
+        print("\n=== PROFIL EXTRAKCE ===")
+        print(f"Videi: {self.done_videos} (chyb {self.failed}) | snimku: {self.frames} | cas: {_format_duration(elapsed)}")
+        if self.frames:
+            print(f"Propustnost: {self.frames / max(elapsed, 1e-9):.1f} snimku/s (celkovy cas behu)")
+        total = sum(self.stages.values())
+        if total > 0:
+            print(f"{'Faze':<14} {'Cas [s]':>10} {'Podil':>8} {'ms/snimek':>10}")
+            for stage in PROFILE_STAGES:
+                seconds = self.stages[stage]
+                per_frame = seconds / self.frames * 1e3 if self.frames else 0.0
+                print(f"{stage:<14} {seconds:>10.1f} {seconds / total:>7.1%} {per_frame:>10.2f}")
+            print("(decode/convert bezi soubezne s landmarky; wait = cekani MediaPipe na snimek)")
+        if self.detected_frames:
+            rates = " | ".join(f"{part} {self.detected[part] / self.detected_frames:.1%}" for part in DETECTION_PARTS)
+            print(f"Detekce: {rates}")
+        if self.peak_rss_mb:
+            print(f"Spicka RSS (max. pres videa): {self.peak_rss_mb:.0f} MB")
+        print(f"Profil po videich: {self.path}")
@@ -0,0 +1,314 @@
+from functools import partial
+from types import SimpleNamespace
+
+import mediapipe as mp
+import numpy as np
+
+# --- KONFIGURACE ---
+HOLISTIC_SETTINGS = {
+    "static_image_mode": False,
+    "model_complexity": 2,
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+}
+POSE_SETTINGS = dict(HOLISTIC_SETTINGS)
+HANDS_SETTINGS = {
+    "static_image_mode": False,
+    "max_num_hands": 2,
+    "model_complexity": 1,
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+}
+FACE_MESH_SETTINGS = {
+    "static_image_mode": False,
+    "max_num_faces": 1,
+    "refine_landmarks": False,
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+}
+
+# Vyrez kolem osoby (RoiLandmarker): okraj kolem boxu horni casti tela jako podil
+# jeho delsi strany, rezerva pri novem vyrezu (aby drobny pohyb nemenil vyrez),
+# a podil plochy snimku, nad ktery se vyplati zpracovat rovnou cely snimek.
+ROI_SETTINGS = {
+    "padding": 0.25,
+    "slack": 0.15,
+    "max_area": 0.8,
+}
+
+# Indexy zapesti v pose modelu (leve / prave z pohledu osoby).
+POSE_LEFT_WRIST = 15
+POSE_RIGHT_WRIST = 16
+# Horni cast tela = prvnich 23 bodu pozy (hlava, ramena, lokty, zapesti, prsty).
+POSE_UPPER_BODY = 23
+RESULT_FIELDS = ("pose_landmarks", "left_hand_landmarks", "right_hand_landmarks", "face_landmarks")
+
+
+class HolisticLandmarker:
+    """Puvodni backend: MediaPipe Holistic (pose + ruce + plny face mesh) na kazdem snimku."""
+
+    name = "holistic"
+
+    @staticmethod
+    def settings(face_stride=1):
+        return {"holistic": HOLISTIC_SETTINGS}
+
+    def __init__(self, face_stride=1):
+        self.holistic = mp.solutions.holistic.Holistic(**HOLISTIC_SETTINGS)
+
+    def process(self, rgb_frame, frame_idx):
+        return self.holistic.process(rgb_frame)
+
+    def close(self):
+        self.holistic.close()
+
+
+class PoseHandsLandmarker:
+    """
+    Rychlejsi backend bez face meshe na kazdem snimku: Pose + Hands a face mesh
+    jen na kazdem `face_stride`-tem snimku (z obliceje se pouzivaji jen rty,
+    mezilehle snimky dopocita interpolace). `face_stride=0` face mesh vypne uplne,
+    vzdalenost rtu je pak nulova.
+
+    Vysledek ma stejne atributy jako vysledek Holisticu (pose_landmarks,
+    left_hand_landmarks, right_hand_landmarks, face_landmarks).
+    """
+
+    name = "pose_hands"
+
+    @staticmethod
+    def settings(face_stride=5):
+        return {
+            "pose": POSE_SETTINGS,
+            "hands": HANDS_SETTINGS,
+            "face_mesh": FACE_MESH_SETTINGS if face_stride > 0 else None,
+            "face_stride": face_stride,
+        }
+
+    def __init__(self, face_stride=5):
+        self.face_stride = face_stride
+        self.pose = mp.solutions.pose.Pose(**POSE_SETTINGS)
+        self.hands = mp.solutions.hands.Hands(**HANDS_SETTINGS)
+        self.face = mp.solutions.face_mesh.FaceMesh(**FACE_MESH_SETTINGS) if face_stride > 0 else None
+
+    def process(self, rgb_frame, frame_idx):
+        pose_result = self.pose.process(rgb_frame)
+        hands_result = self.hands.process(rgb_frame)
+        left_hand, right_hand = _assign_hands(hands_result, pose_result.pose_landmarks)
+
+        face_landmarks = None
+        if self.face is not None and frame_idx % self.face_stride == 0:
+            face_result = self.face.process(rgb_frame)
+            if face_result.multi_face_landmarks:
+                face_landmarks = face_result.multi_face_landmarks[0]
+
+        return SimpleNamespace(
+            pose_landmarks=pose_result.pose_landmarks,
+            left_hand_landmarks=left_hand,
+            right_hand_landmarks=right_hand,
+            face_landmarks=face_landmarks,
+        )
+
+    def close(self):
+        self.pose.close()
+        self.hands.close()
+        if self.face is not None:
+            self.face.close()
+
+
+def _sq_dist_2d(a, b):
+    return (a.x - b.x) ** 2 + (a.y - b.y) ** 2
+
+
+def _assign_hands(hands_result, pose_landmarks):
+    """
+    Priradi detekovane ruce k leve/prave ruce osoby.
+    S pozou podle vzdalenosti k zapesti (jako Holistic, ktery ruce hleda od zapesti),
+    bez pozy podle handedness z Hands. Ta predpoklada zrcadleny (selfie) obraz,
+    nase videa zrcadlena nejsou, proto je label prohozeny.
+    """
+    if not hands_result.multi_hand_landmarks:
+        return None, None
+
+    hands = list(hands_result.multi_hand_landmarks)[:2]
+
+    if pose_landmarks is not None:
+        lw = pose_landmarks.landmark[POSE_LEFT_WRIST]
+        rw = pose_landmarks.landmark[POSE_RIGHT_WRIST]
+        if len(hands) == 1:
+            wrist = hands[0].landmark[0]
+            if _sq_dist_2d(wrist, lw) <= _sq_dist_2d(wrist, rw):
+                return hands[0], None
+            return None, hands[0]
+
+        a, b = hands
+        keep = _sq_dist_2d(a.landmark[0], lw) + _sq_dist_2d(b.landmark[0], rw)
+        swap = _sq_dist_2d(a.landmark[0], rw) + _sq_dist_2d(b.landmark[0], lw)
+        return (a, b) if keep <= swap else (b, a)
+
+    left_hand, right_hand = None, None
+    for hand, handedness in zip(hands, hands_result.multi_handedness):
+        label = handedness.classification[0].label
+        if label == "Right" and left_hand is None:
+            left_hand = hand
+        elif label == "Left" and right_hand is None:
+            right_hand = hand
+    return left_hand, right_hand
+
+
+def _pad_box(box, padding, width, height):
+    """Rozsiri box (x0, y0, x1, y1) v pixelech o `padding` * delsi strana a orizne ho na snimek."""
+    x0, y0, x1, y1 = box
+    margin = padding * max(x1 - x0, y1 - y0)
+    return (
+        max(0, int(x0 - margin)),
+        max(0, int(y0 - margin)),
+        min(width, int(x1 + margin + 1)),
+        min(height, int(y1 + margin + 1)),
+    )
+
+
+def _box_area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+class RoiLandmarker:
+    """
+    Obal libovolneho backendu, ktery misto celeho snimku posila do MediaPipe jen
+    vyrez kolem osoby: box horni casti tela z pozy predchoziho snimku rozsireny
+    o `padding`. U statickych zaberu, kde pacient zabira malou cast obrazu, to
+    vyrazne zmensi obraz, nad kterym MediaPipe pocita.
+
+    Vyrez se meni jen kdyz z nej osoba vybehne nebo je zbytecne velky. Kdyz se ve
+    vyrezu poza nenajde (ztraceny tracking), zpracuje se tentyz snimek znovu cely
+    a dalsi snimky cele, dokud se poza znovu nenajde. Stejne tak prvni snimek videa.
+
+    MediaPipe (static_image_mode=False) si mezi snimky drzi tracking v souradnicich
+    obrazu, ktery dostava. Cele snimky proto zpracovava vlastni instance `factory()`
+    a vyrezy druha instance, ktera se vytvori znovu pri kazde zmene vyrezu (a po
+    ztrate pozy ve vyrezu); tracking tak nikdy neprechazi mezi ruznymi souradnicemi
+    ani nedostane tentyz snimek dvakrat.
+
+    Vysledek ma navic atribut `roi` = (x0, y0, sx, sy): souradnice landmarku jsou
+    normalizovane k vyrezu a do celeho snimku se prevedou jako x0 + sx * x,
+    y0 + sy * y, sx * z (viz extract_features_enhanced._fill_frame_landmarks).
+    Bez vyrezu je `roi` None.
+    """
+
+    def __init__(self, factory, padding=ROI_SETTINGS["padding"]):
+        self.factory = factory
+        self.full = factory()
+        self.cropped = None
+        self._cropped_box = None
+        self.padding = padding
+        self.name = f"{self.full.name}+roi"
+        self.counts = {"roi": 0, "full": 0, "fallback": 0, "roi_resets": 0}
+        self._reset()
+
+    def _reset(self, shape=None):
+        self._box = None
+        self._shape = shape
+        self._last_idx = None
+        self._drop_cropped()
+
+    def _drop_cropped(self):
+        if self.cropped is not None:
+            self.cropped.close()
+        self.cropped = None
+        self._cropped_box = None
+
+    def _cropped_landmarker(self, box):
+        """Instance pro vyrez `box`; pri jinem vyrezu nova (tracking ze stareho vyrezu by nesedel)."""
+        if self.cropped is None or self._cropped_box != box:
+            self._drop_cropped()
+            self.cropped = self.factory()
+            self._cropped_box = box
+            self.counts["roi_resets"] += 1
+        return self.cropped
+
+    def process(self, rgb_frame, frame_idx):
+        height, width = rgb_frame.shape[:2]
+        # Novy snimek neni pokracovanim predchoziho (dalsi video, resume): vyrez neplati.
+        if self._last_idx is None or frame_idx != self._last_idx + 1 or self._shape != rgb_frame.shape:
+            self._reset(rgb_frame.shape)
+        self._last_idx = frame_idx
+
+        box = self._box
+        results = None
+        if box is not None:
+            # MediaPipe chce souvisly buffer; kopie vyrezu je mensi nez cely snimek.
+            crop = np.ascontiguousarray(rgb_frame[box[1] : box[3], box[0] : box[2]])
+            results = self._cropped_landmarker(box).process(crop, frame_idx)
+            if results.pose_landmarks:
+                self.counts["roi"] += 1
+            else:
+                self.counts["fallback"] += 1
+                box = results = self._box = None
+                self._drop_cropped()
+
+        if results is None:
+            self.counts["full"] += 1
+            results = self.full.process(rgb_frame, frame_idx)
+            box = (0, 0, width, height)
+
+        self._update_box(results.pose_landmarks, box, width, height)
+        roi = None
+        if box != (0, 0, width, height):
+            roi = (box[0] / width, box[1] / height, (box[2] - box[0]) / width, (box[3] - box[1]) / height)
+        return SimpleNamespace(roi=roi, **{name: getattr(results, name) for name in RESULT_FIELDS})
+
+    def _update_box(self, pose_landmarks, box, width, height):
+        """Vyrez pro dalsi snimek z pozy tohoto snimku (souradnice `box`, ve kterem byla nalezena)."""
+        if not pose_landmarks:
+            self._box = None
+            return
+        bw, bh = box[2] - box[0], box[3] - box[1]
+        points = [(l.x, l.y) for l in pose_landmarks.landmark[:POSE_UPPER_BODY]]
+        xs = [box[0] + x * bw for x, _ in points]
+        ys = [box[1] + y * bh for _, y in points]
+        body = (min(xs), min(ys), max(xs), max(ys))
+
+        needed = _pad_box(body, self.padding, width, height)
+        current = self._box
+        if current is not None and _contains(current, needed) and _box_area(current) <= 2 * _box_area(needed):
+            return
+        candidate = _pad_box(body, self.padding + ROI_SETTINGS["slack"], width, height)
+        if _box_area(candidate) <= 0 or _box_area(candidate) >= ROI_SETTINGS["max_area"] * width * height:
+            # Osoba zabira skoro cely snimek (nebo je mimo nej): vyrez by nic neusetril.
+            self._box = None
+            return
+        self._box = candidate
+
+    def close(self):
+        self._drop_cropped()
+        self.full.close()
+
+
+LANDMARK_BACKENDS = {
+    HolisticLandmarker.name: HolisticLandmarker,
+    PoseHandsLandmarker.name: PoseHandsLandmarker,
+}
+
+
+def create_landmarker(backend="holistic", face_stride=5, roi_padding=None):
+    """`roi_padding` (napr. 0.25) zapne vyrez kolem osoby (RoiLandmarker), None = cely snimek."""
+    if backend not in LANDMARK_BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Use one of: {list(LANDMARK_BACKENDS.keys())}")
+    factory = partial(LANDMARK_BACKENDS[backend], face_stride=face_stride)
+    if roi_padding is not None:
+        return RoiLandmarker(factory, padding=roi_padding)
+    return factory()
+
+
+def landmarker_settings(backend="holistic", face_stride=5, roi_padding=None):
+    """Nastaveni modelu backendu (pro manifest extrakce: zmena = nutna nova extrakce)."""
+    if backend not in LANDMARK_BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Use one of: {list(LANDMARK_BACKENDS.keys())}")
+    settings = LANDMARK_BACKENDS[backend].settings(face_stride=face_stride)
+    if roi_padding is not None:
+        settings = dict(settings, roi=dict(ROI_SETTINGS, padding=roi_padding))
+    return settings
@@ -1,79 +1,271 @@
+import argparse
+import multiprocessing as mp_proc
 import numpy as np
 import os
 import sys
+import time
 from pathlib import Path
 
 try:
+    from utils.feature_layout import (
+        BASIC_FEATURE_DIM,
+        DISTANCE_NAMES,
+        FEATURE_DIM,
+        FEATURE_GROUPS,
+        HAND_JOINTS,
+        LEFT_SHOULDER,
+        LEGACY_POSE_DIM,
+        POSE_JOINTS,
+        RIGHT_SHOULDER,
+    )
+    from preprocessing.extraction_manifest import fingerprint_video, load_manifest, manifest_path_for, save_manifest
+    from utils.feature_meta import feature_meta_path, read_feature_meta, write_feature_meta
+    from utils.feature_store import (
+        feature_compressed,
+        feature_format,
+        find_feature_file,
+        is_feature_file,
+        load_features,
+        save_features,
+    )
     from utils.paths import project_paths
 except ModuleNotFoundError:
     # Allow direct execution from src/preprocessing.
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from utils.feature_layout import (
+        BASIC_FEATURE_DIM,
+        DISTANCE_NAMES,
+        FEATURE_DIM,
+        FEATURE_GROUPS,
+        HAND_JOINTS,
+        LEFT_SHOULDER,
+        LEGACY_POSE_DIM,
+        POSE_JOINTS,
+        RIGHT_SHOULDER,
+    )
+    from preprocessing.extraction_manifest import fingerprint_video, load_manifest, manifest_path_for, save_manifest
+    from utils.feature_meta import feature_meta_path, read_feature_meta, write_feature_meta
+    from utils.feature_store import (
+        feature_compressed,
+        feature_format,
+        find_feature_file,
+        is_feature_file,
+        load_features,
+        save_features,
+    )
     from utils.paths import project_paths
 
+# Zvysit pri zmene normalize_skeleton, aby se materializovana kopie prepocitala.
+NORMALIZE_VERSION = 2
+MANIFEST_SAVE_EVERY = 50
+
+# Vzdalenosti, ktere se deli sirkou ramen jako souradnice. Sirka ramen sama
+# zustava v puvodnich jednotkach (nese velikost osoby v obraze, po vydeleni by byla 1).
+SCALED_DISTANCE_COLUMNS = [
+    FEATURE_GROUPS["distances"].start + i for i, name in enumerate(DISTANCE_NAMES) if name != "shoulder_width"
+]
+
+
+def _copy(data):
+    return data.clone() if hasattr(data, "clone") else data.copy()
+
+
+def _shoulder_frame(pose_xyz):
+    """Stred ramen (..., 3) a sirka ramen (...) pro kazdy snimek; nulova sirka -> 1."""
+    left = pose_xyz[..., LEFT_SHOULDER, :]
+    right = pose_xyz[..., RIGHT_SHOULDER, :]
+    center = (left + right) / 2
+    width = ((left - right) ** 2).sum(-1) ** 0.5
+    width = width + (width == 0)
+    return center, width
+
+
 def normalize_skeleton(data):
     """
-    Provede prostorovou normalizaci na cele video.
-    data: tvar (pocet_snimku, 132)
+    Provede prostorovou normalizaci na cele video najednou (bez smycek pres snimky).
+    Souradnice se posunou do stredu ramen a vydeli sirkou ramen daneho snimku,
+    visibility se nemeni.
+
+    data: tvar (..., pocet_snimku, 243) - pose 23×4, ruce 2×21×3 a odvozene features
+          (viz utils.feature_layout), (..., pocet_snimku, 218) bez odvozenych features,
+          nebo puvodni (..., pocet_snimku, 132) = 33 bodu × 4.
+    U 243D se vzdalenosti a konfigurace prstu (delky v souradnicich obrazu) take
+    vydeli sirkou ramen, uhly (nezavisle na posunu i meritku) zustavaji beze zmeny.
+    Ruka, ktera ve snimku nema zadne souradnice (nuly = nedetekovana, padding), zustava nulova.
+
+    Funguje pro NumPy pole i torch tensory (i na GPU, libovolne vedouci osy = davka);
+    stejnou funkci pouziva i data_io.transforms, trenink a inference tak normalizuji stejne.
     """
-    # Prevedeni na (pocet_snimku, 33 bodu, 4 hodnoty) pro snazsi pocitani
-    sequence = data.reshape(-1, 33, 4)
-    normalized_sequence = np.zeros_like(sequence)
-
-    for f in range(len(sequence)): 
-        frame = sequence[f]
-
-        # bod 11 je leve rameno, 12 prave
-        # vypocitame stred mezi rameny
-        shoulder_mid_x = (frame[11, 0] + frame[12, 0]) / 2
-        shoulder_mid_y = (frame[11, 1] + frame[12, 1]) / 2
-        shoulder_mid_z = (frame[11, 2] + frame[12, 2]) / 2
-
-        # vypocitani vzdalenosti ramen pro skalovani
-        shoulder_dist = np.sqrt((frame[11, 0] - frame[12, 0])**2 + 
-                               (frame[11, 1] - frame[12, 1])**2 + 
-                               (frame[11, 2] - frame[12, 2])**2)
-
-        # osetreni nulove vzdalenosti
-        if shoulder_dist == 0:
-            shoulder_dist = 1.0
-        
-        # provedeme posun a skalovani u vsech bodu
-        for i in range(33):
-            # centrovani
-            normalized_sequence[f, i, 0] = (frame[i, 0] - shoulder_mid_x) / shoulder_dist
-            normalized_sequence[f, i, 1] = (frame[i, 1] - shoulder_mid_y) / shoulder_dist
-            normalized_sequence[f, i, 2] = (frame[i, 2] - shoulder_mid_z) / shoulder_dist
-            # visibility bez zmeny
-            normalized_sequence[f, i, 3] = frame[i, 3]
-
-    # vratime zpet do puvodniho tvaru
-    return normalized_sequence.reshape(-1, 132)
-
-def proces_all_features(input_root, output_root):
+    if not hasattr(data, "clone"):
+        data = np.asarray(data, dtype=np.float32)
+    width = data.shape[-1]
+    lead = tuple(data.shape[:-1])
+    if width == LEGACY_POSE_DIM:
+        sequence = _copy(data).reshape(lead + (33, 4))
+        center, scale = _shoulder_frame(sequence[..., :3])
+        sequence[..., :3] = (sequence[..., :3] - center[..., None, :]) / scale[..., None, None]
+        return sequence.reshape(lead + (LEGACY_POSE_DIM,))
+    if width not in (BASIC_FEATURE_DIM, FEATURE_DIM):
+        raise ValueError(f"Neznamy format features: {width} sloupcu (ocekavano 243, 218 nebo 132)")
+
+    out = _copy(data)
+    pose = out[..., FEATURE_GROUPS["pose"]].reshape(lead + (POSE_JOINTS, 4))
+    center, scale = _shoulder_frame(pose[..., :3])
+    pose[..., :3] = (pose[..., :3] - center[..., None, :]) / scale[..., None, None]
+    out[..., FEATURE_GROUPS["pose"]] = pose.reshape(lead + (-1,))
+
+    for group in ("left_hand", "right_hand"):
+        hand = out[..., FEATURE_GROUPS[group]].reshape(lead + (HAND_JOINTS, 3))
+        missing = ~(hand != 0).any(-1).any(-1)
+        normalized = (hand - center[..., None, :]) / scale[..., None, None]
+        normalized[missing] = hand[missing]
+        out[..., FEATURE_GROUPS[group]] = normalized.reshape(lead + (-1,))
+
+    if width == FEATURE_DIM:
+        out[..., SCALED_DISTANCE_COLUMNS] = out[..., SCALED_DISTANCE_COLUMNS] / scale[..., None]
+        out[..., FEATURE_GROUPS["hand_config"]] = out[..., FEATURE_GROUPS["hand_config"]] / scale[..., None]
+    return out
+
+def _normalize_file_job(args):
+    """
+    Worker: nacte, normalizuje a atomicky ulozi jeden soubor ve stejnem formatu
+    a komprimaci jako vstup, vcetne <video>.meta.json (frame_stride pro zarovnani labelu).
+    """
+    input_path, output_path = args
+    try:
+        raw_data = load_features(input_path)
+        norm_data = normalize_skeleton(raw_data)
+        config = {
+            "format": feature_format(input_path),
+            "compressed": feature_compressed(input_path),
+            "meta": read_feature_meta(input_path),
+        }
+        saved_path = save_features(output_path, norm_data, fmt=config["format"], compressed=config["compressed"])
+        if config["meta"]:
+            write_feature_meta(saved_path, config["meta"])
+        elif os.path.exists(feature_meta_path(saved_path)):
+            os.remove(feature_meta_path(saved_path))
+        return input_path, saved_path, len(norm_data), config, None
+    except Exception as exc:
+        return input_path, None, 0, None, f"{type(exc).__name__}: {exc}"
+
+
+def _is_normalized(entry, size, sha256, meta, output_path):
+    if not entry or entry.get("version") != NORMALIZE_VERSION:
+        return False
+    if entry.get("size") != size or entry.get("sha256") != sha256:
+        return False
+    # Format a komprimace jsou soucasti vstupu (sha256), meta.json je vedle nej.
+    if entry.get("config", {}).get("meta") != meta:
+        return False
+    return find_feature_file(output_path) is not None
+
+
+def proces_all_features(input_root, output_root, workers=1, force=False):
+    """
+    Normalizuje vsechny features z `input_root` do `output_root` (stejna struktura slozek).
+    Soubory, jejichz vstup se od minula nezmenil (velikost+mtime, pri zmene sha256)
+    a vystup existuje, se preskoci; stav je v <output_root>_manifest.json. Vystup ma format,
+    komprimaci a <video>.meta.json vstupu, zmena meta.json vynuti novou normalizaci.
+    Vystupy se zapisuji atomicky, preruseny beh tak nezanecha poskozene soubory.
+    Vraci souhrn {"normalized", "skipped", "failed", "frames", "bytes", "seconds"}.
+    """
+    start = time.perf_counter()
+    manifest_path = manifest_path_for(output_root)
+    manifest = load_manifest(manifest_path)
+    entries = manifest["videos"]
+    summary = {"normalized": 0, "skipped": 0, "failed": 0, "frames": 0, "bytes": 0, "seconds": 0.0}
+
+    jobs = []
+    pending = {}
+    seen = set()
     for root, dirs, files in os.walk(input_root):
-        for file in files:
-            if file.endswith(".npy"):
-                input_path = os.path.join(root, file)
+        for file in sorted(files):
+            if not is_feature_file(file):
+                continue
+            input_path = os.path.join(root, file)
+            rel = os.path.relpath(input_path, input_root).replace("\\", "/")
+            output_path = os.path.join(output_root, rel)
+            # Klic bez pripony: prevod vstupu do jineho formatu (feature_store) je zmena souboru, ne nove video.
+            key = os.path.splitext(rel)[0]
+            seen.add(key)
+            entry = entries.get(key)
+            size, mtime, sha256 = fingerprint_video(input_path, previous=entry)
+            meta = read_feature_meta(input_path)
+            if not force and _is_normalized(entry, size, sha256, meta, output_path):
+                entry["mtime"] = mtime
+                summary["skipped"] += 1
+                continue
+            jobs.append((input_path, output_path))
+            pending[input_path] = (key, size, mtime, sha256)
 
-                # nacteme data
-                raw_data = np.load(input_path)
+    # Vstupy, ktere zmizely: odstranit i jejich normalizovanou kopii.
+    for key in sorted(set(entries) - seen):
+        output_path = os.path.join(output_root, entries[key]["output"])
+        for path in (find_feature_file(output_path), feature_meta_path(output_path)):
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+        del entries[key]
 
-                # spustime normalizaci
-                norm_data = normalize_skeleton(raw_data)
+    def consume(results):
+        for done, (input_path, saved_path, frames, config, error) in enumerate(results, start=1):
+            key, size, mtime, sha256 = pending[input_path]
+            rel = os.path.relpath(input_path, input_root).replace("\\", "/")
+            if error is not None:
+                summary["failed"] += 1
+                print(f"  ❌ {rel}: {error}")
+                continue
+            entries[key] = {
+                "size": size,
+                "mtime": mtime,
+                "sha256": sha256,
+                "version": NORMALIZE_VERSION,
+                "output": os.path.relpath(saved_path, output_root).replace("\\", "/"),
+                "frames": frames,
+                "config": config,
+            }
+            summary["normalized"] += 1
+            summary["frames"] += frames
+            summary["bytes"] += size
+            print(f"Normalizovano: {rel}")
+            # Prubezne ulozeni manifestu, at se po preruseni nezpracovava vse znovu.
+            if done % MANIFEST_SAVE_EVERY == 0:
+                save_manifest(manifest_path, manifest)
 
-                # ulozime do nove slozky
-                rel_path = os.path.relpath(root, input_root)
-                target_dir = os.path.join(output_root, rel_path)
-                os.makedirs(target_dir, exist_ok=True)
+    if workers > 1 and len(jobs) > 1:
+        with mp_proc.get_context("spawn").Pool(min(workers, len(jobs))) as pool:
+            consume(pool.imap_unordered(_normalize_file_job, jobs, chunksize=2))
+    else:
+        consume(map(_normalize_file_job, jobs))
+    save_manifest(manifest_path, manifest)
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
 
-                np.save(os.path.join(target_dir, file), norm_data)
-                print(f"Normalizovano: {file}") # Opraveno: print
 
 if __name__ == "__main__":
     paths = project_paths(__file__)
-    input_dir = str(paths["features_enhanced"])
-    output_dir = os.path.join(str(paths["data"]), "features_norm")
-    
-    proces_all_features(input_dir, output_dir)
-    print("Vsechna data byla centrovana a normalizovana")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Centrovani a normalizace features do materializovane kopie (data/features_norm)")
+    parser.add_argument("--input_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument("--output_dir", default=os.path.join(str(paths["data"]), "features_norm"))
+    parser.add_argument("--workers", type=int, default=1, help="Pocet paralelnich procesu")
+    parser.add_argument("--force", action="store_true", help="Normalizovat i nezmenene soubory")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_dir):
+        print(f"CHYBA: Slozka '{args.input_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    summary = proces_all_features(args.input_dir, args.output_dir, workers=args.workers, force=args.force)
+    seconds = max(summary["seconds"], 1e-9)
+    print("\n=== HOTOVO ===")
+    print(
+        f"Normalizovano: {summary['normalized']} | preskoceno (beze zmeny): {summary['skipped']}"
+        f" | selhalo: {summary['failed']}"
+    )
+    print(
+        f"Cas: {summary['seconds']:.1f} s | {summary['normalized'] / seconds:.1f} souboru/s"
+        f" | {summary['frames'] / seconds:.0f} snimku/s | {summary['bytes'] / 1e6 / seconds:.1f} MB/s"
+    )
+    print("Vsechna data byla centrovana a normalizovana" if not summary["failed"] else "Nektere soubory selhaly, viz vyse.")
@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    from preprocessing import extraction_manifest
+    from preprocessing.extract_features_enhanced import EXTRACTOR_VERSION, rebuild_video_features
+    from utils.feature_store import FEATURE_FORMATS, find_feature_file
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/rebuild_features.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from preprocessing import extraction_manifest
+    from preprocessing.extract_features_enhanced import EXTRACTOR_VERSION, rebuild_video_features
+    from utils.feature_store import FEATURE_FORMATS, find_feature_file
+    from utils.paths import project_paths
+
+
+def _cached_videos(manifest, landmarks_root):
+    """(popisek videa, relativni cesta .npz) pro vsechna videa s raw landmarky v cache."""
+    items = []
+    for label, entry in sorted(manifest["videos"].items()):
+        if entry.get("landmarks"):
+            items.append((label, entry["landmarks"]))
+
+    if not items:
+        # Bez manifestu (napr. cache zkopirovana odjinud): projdi primo slozku s .npz.
+        for root, _, files in os.walk(landmarks_root):
+            for name in sorted(files):
+                if name.endswith(".npz"):
+                    rel = os.path.relpath(os.path.join(root, name), landmarks_root).replace("\\", "/")
+                    items.append((None, rel))
+    return items
+
+
+def rebuild_all(landmarks_root, output_root, include_substring=None, feature_format=None, compress=False):
+    """
+    Prepocita vsechny 243D features z cache raw landmarku (bez MediaPipe)
+    a v manifestu oznaci, ze odpovidaji aktualni verzi vypoctu features.
+    Bez `feature_format` zustava format ulozeni kazdeho videa stejny.
+    """
+    if not os.path.exists(landmarks_root):
+        print(f"CHYBA: Slozka s raw landmarky '{landmarks_root}' nebyla nalezena!")
+        return
+
+    manifest_path = extraction_manifest.manifest_path_for(output_root)
+    manifest = extraction_manifest.load_manifest(manifest_path)
+    items = _cached_videos(manifest, landmarks_root)
+    if include_substring:
+        needle = include_substring.lower()
+        items = [(label, rel) for label, rel in items if needle in rel.lower()]
+
+    print(f"Prepocet features z cache: {len(items)} videi (verze features {EXTRACTOR_VERSION})")
+    start = time.perf_counter()
+    rebuilt_labels = []
+    rebuilt = 0
+    failures = []
+
+    for label, landmarks_rel in items:
+        landmarks_path = os.path.join(landmarks_root, landmarks_rel)
+        output_path = os.path.join(output_root, os.path.splitext(landmarks_rel)[0] + ".npy")
+        if not os.path.exists(landmarks_path):
+            failures.append((landmarks_rel, "chybi .npz"))
+            continue
+
+        try:
+            shape = rebuild_video_features(landmarks_path, output_path, fmt=feature_format, compressed=compress)
+        except Exception as exc:
+            failures.append((landmarks_rel, f"{type(exc).__name__}: {exc}"))
+            continue
+
+        rebuilt += 1
+        print(f"  ✓ {landmarks_rel}: {shape[0]} snimku × {shape[1]} features")
+        if label is not None:
+            entry = manifest["videos"][label]
+            entry["config"] = dict(entry.get("config") or {}, extractor_version=EXTRACTOR_VERSION)
+            entry["frames"] = int(shape[0])
+            entry["output"] = os.path.relpath(find_feature_file(output_path), output_root).replace("\\", "/")
+            rebuilt_labels.append(label)
+
+    if rebuilt_labels:
+        extraction_manifest.merge_manifest(manifest_path, manifest, rebuilt_labels)
+
+    elapsed = time.perf_counter() - start
+    print("\n=== HOTOVO ===")
+    print(f"Prepocitano: {rebuilt} videi za {elapsed:.1f} s")
+    if failures:
+        print(f"Selhalo {len(failures)} videi:")
+        for rel, error in failures:
+            print(f"  ❌ {rel}: {error}")
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Prepocet 243D features z cache raw landmarku (bez MediaPipe)")
+    parser.add_argument("--landmarks_dir", default=str(paths["landmarks_raw"]))
+    parser.add_argument("--features_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument(
+        "--include_substring",
+        default=None,
+        help="Prepocitat jen videa, jejichz relativni cesta obsahuje tento text.",
+    )
+    parser.add_argument(
+        "--feature_format",
+        choices=list(FEATURE_FORMATS),
+        default=None,
+        help="Format ulozeni prepocitanych features (vychozi: stejny jako dosud, nova videa float32).",
+    )
+    parser.add_argument("--compress", action="store_true", help="Kompaktni format navic komprimovat.")
+    args = parser.parse_args()
+
+    rebuild_all(
+        args.landmarks_dir,
+        args.features_dir,
+        include_substring=args.include_substring,
+        feature_format=args.feature_format,
+        compress=args.compress,
+    )
@@ -0,0 +1,353 @@
+import argparse
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    from preprocessing.extract_features_enhanced import (
+        EXTRACT_DEFAULTS,
+        LANDMARK_SHAPES,
+        _build_features_sequence,
+        _fill_frame_landmarks,
+        _get_landmarker,
+        _interpolate_nan_nd,
+        _landmarker_kwargs,
+        _resolve_options,
+        calculate_distance,
+        extract_video,
+        features_from_landmarks,
+    )
+    from preprocessing.landmark_backends import create_landmarker
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/preprocessing/streaming_features.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from preprocessing.extract_features_enhanced import (
+        EXTRACT_DEFAULTS,
+        LANDMARK_SHAPES,
+        _build_features_sequence,
+        _fill_frame_landmarks,
+        _get_landmarker,
+        _interpolate_nan_nd,
+        _landmarker_kwargs,
+        _resolve_options,
+        calculate_distance,
+        extract_video,
+        features_from_landmarks,
+    )
+    from preprocessing.landmark_backends import create_landmarker
+
+STREAM_MODES = ("offline", "causal")
+# Kanaly, ktere se interpoluji a vyhlazuji: pose xyz, leva ruka, prava ruka, vzdalenost rtu.
+_GROUP_SIZES = (23 * 3, 21 * 3, 21 * 3, 1)
+
+
+class _GapFiller:
+    """
+    Doplnovani vypadku detekce jedne skupiny kanalu po snimcich.
+    offline: mezera se doplni az s prvnim dalsim platnym snimkem stejnou linearni
+    interpolaci jako _interpolate_nan_nd (bit po bitu); na zacatku kopii prvni
+    platne hodnoty, na konci streamu posledni (flush).
+    causal: chybejici snimek hned dostane posledni platnou hodnotu (na zacatku nuly).
+    """
+
+    def __init__(self, channels, causal):
+        self.channels = channels
+        self.causal = causal
+        self.last_valid = None
+        self.pending = 0
+        self.ready = deque()
+
+    def push(self, values):
+        valid = not np.isnan(values).any()
+        if self.causal:
+            if valid:
+                self.last_valid = values
+            self.ready.append(self.last_valid if self.last_valid is not None else np.zeros_like(values))
+            return
+
+        if not valid:
+            self.pending += 1
+            return
+        if self.pending:
+            # Usek [posledni platny, mezera..., novy platny] ma stejne sousedy jako v celem videu.
+            rows = [] if self.last_valid is None else [self.last_valid]
+            rows += [np.full(self.channels, np.nan, dtype=np.float32)] * self.pending + [values]
+            filled = _interpolate_nan_nd(np.stack(rows))
+            self.ready.extend(filled[len(filled) - self.pending - 1 : -1])
+            self.pending = 0
+        self.ready.append(values)
+        self.last_valid = values
+
+    def flush(self):
+        if self.pending:
+            fill = self.last_valid if self.last_valid is not None else np.zeros(self.channels, dtype=np.float32)
+            self.ready.extend([fill] * self.pending)
+            self.pending = 0
+
+
+class _WindowMean:
+    """
+    Klouzavy prumer `window` snimku pres kumulativni soucet ve float64 ve stejnem
+    poradi scitani jako _smooth_over_time (pocatecni okraj = `pad_front` kopii prvniho
+    snimku, koncovy = flush s `pad_back` kopiemi posledniho), takze offline vysledek
+    sedi bit po bitu. Drzi jen `window` + 1 poslednich souctu.
+    """
+
+    def __init__(self, window, pad_front, pad_back):
+        self.window = window
+        self.pad_front = pad_front
+        self.pad_back = pad_back
+        self.csums = deque(maxlen=window + 1)
+        self.last = None
+
+    def _add(self, row):
+        self.csums.append(self.csums[-1] + row)
+
+    def push(self, row):
+        """Prida snimek; vrati vyhlazeny snimek, pokud je jeho okno uplne, jinak None."""
+        row64 = row.astype(np.float64)
+        if self.last is None:
+            self.csums.append(np.zeros_like(row64))
+            for _ in range(self.pad_front):
+                self._add(row64)
+        self.last = row64
+        self._add(row64)
+        return self._pop()
+
+    def _pop(self):
+        if len(self.csums) < self.window + 1:
+            return None
+        return ((self.csums[-1] - self.csums[0]) / self.window).astype(np.float32)
+
+    def flush(self):
+        out = []
+        if self.last is None:
+            return out
+        for _ in range(self.pad_back):
+            self._add(self.last)
+            out.append(self._pop())
+        return out
+
+
+class StreamingFeatureExtractor:
+    """
+    Online extrakce 243D features po snimcich (kamera, RTSP) s omezenou pameti.
+
+    mode="offline": vystup je shodny s extract() / features_from_landmarks na celem
+        videu. Snimek t se vyda, jakmile jsou doplnene snimky do t + window//2;
+        behem vypadku detekce se ceka, dokud se ruka/poza/oblicej znovu neobjevi
+        (interpolace potrebuje dalsi platny snimek). Latence = window//2 snimku + delka mezery.
+    mode="causal": mezery se drzi na posledni platne hodnote a okno prumeru konci
+        `lookahead` snimku za vydavanym snimkem. Latence je vzdy `lookahead` snimku
+        (0 = bez zpozdeni), vystup se od offline features lisi.
+
+    Buffer drzi jen okno prumeru a rozpracovanou mezeru (prvnich `max_window`
+    snimku v offline modu, protoze kratsi video se vyhlazuje mensim oknem).
+    """
+
+    def __init__(self, mode="offline", lookahead=0, max_window=11, landmarker=None, options=None):
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unknown mode: {mode}. Use one of: {list(STREAM_MODES)}")
+        if max_window % 2 == 0 or max_window < 5:
+            raise ValueError("max_window must be odd and >= 5")
+        pad = max_window // 2
+        if mode == "offline":
+            lookahead = pad
+        elif not 0 <= lookahead <= pad:
+            raise ValueError(f"lookahead must be between 0 and {pad}")
+
+        self.mode = mode
+        self.lookahead = lookahead
+        self.max_window = max_window
+        self.options = _resolve_options(options)
+        self._landmarker = landmarker
+        self._fillers = [_GapFiller(size, causal=mode == "causal") for size in _GROUP_SIZES]
+        self._smoother = _WindowMean(max_window, pad_front=max_window - 1 - lookahead, pad_back=lookahead)
+        # Pose visibility a priznaky detekce rukou se nevyhlazuji, cekaji na vyhlazene souradnice.
+        self._raw = deque()
+        # Offline: dokud neprijde `max_window` snimku, neni jasne, jakym oknem vyhlazovat
+        # (kratke video se vyhlazuje mensim oknem), raw snimky a vystup se zatim drzi.
+        self._head = [] if mode == "offline" else None
+        self._held = []
+        self.frames_in = 0
+        self.frames_out = 0
+
+    @property
+    def latency_frames(self):
+        """Pocet prijatych snimku, ke kterym jeste nebyly vydany features."""
+        return self.frames_in - self.frames_out
+
+    def push_frame(self, rgb_frame):
+        """Spusti landmarker na RGB snimku a vrati seznam hotovych 243D vektoru (muze byt prazdny)."""
+        if self._landmarker is None:
+            self._landmarker = _get_landmarker(self.options)
+        results = self._landmarker.process(rgb_frame, self.frames_in)
+        row = {name: np.empty(shape, dtype=dtype) for name, (shape, dtype) in LANDMARK_SHAPES.items()}
+        left_ok, right_ok, _ = _fill_frame_landmarks(results, row["pose"], row["left_hand"], row["right_hand"], row["lips"])
+        return self.push_landmarks(row["pose"], row["left_hand"], row["right_hand"], row["lips"], left_ok, right_ok)
+
+    def push_landmarks(self, pose, left_hand, right_hand, lips, left_ok, right_ok):
+        """Prida raw landmarky jednoho snimku (viz detect_landmarks) a vrati hotove 243D vektory."""
+        self.frames_in += 1
+        if self._head is not None:
+            self._head.append((pose, left_hand, right_hand, lips, left_ok, right_ok))
+            if self.frames_in >= self.max_window:
+                self._head = None
+
+        mouth = calculate_distance(lips[None, 0], lips[None, 1])
+        values = (pose[:, :3].reshape(-1), left_hand.reshape(-1), right_hand.reshape(-1), mouth)
+        for filler, group in zip(self._fillers, values):
+            filler.push(group.astype(np.float32, copy=False))
+        self._raw.append((pose[:, 3].copy(), bool(left_ok), bool(right_ok)))
+        return self._drain()
+
+    def _drain(self):
+        smoothed = []
+        while all(filler.ready for filler in self._fillers):
+            row = np.concatenate([filler.ready.popleft() for filler in self._fillers])
+            out = self._smoother.push(row)
+            if out is not None:
+                smoothed.append(out)
+        return self._emit(smoothed)
+
+    def _emit(self, smoothed):
+        self._held.extend(smoothed)
+        if not self._held or self._head is not None:
+            return []
+        smoothed, self._held = self._held, []
+
+        t = len(smoothed)
+        values = np.stack(smoothed)
+        raw = [self._raw.popleft() for _ in range(t)]
+        o1, o2, o3 = _GROUP_SIZES[0], _GROUP_SIZES[0] + _GROUP_SIZES[1], _GROUP_SIZES[0] + _GROUP_SIZES[1] + _GROUP_SIZES[2]
+        features = _build_features_sequence(
+            pose_xyz=values[:, :o1].reshape(t, 23, 3),
+            pose_vis=np.stack([r[0] for r in raw]),
+            left_hand_xyz=values[:, o1:o2].reshape(t, 21, 3),
+            right_hand_xyz=values[:, o2:o3].reshape(t, 21, 3),
+            mouth_distance=values[:, o3],
+            left_detected=np.array([r[1] for r in raw], dtype=bool),
+            right_detected=np.array([r[2] for r in raw], dtype=bool),
+        )
+        self.frames_out += t
+        return list(features)
+
+    def flush(self):
+        """Konec streamu: doplni zbyvajici mezery a vrati features vsech zbyvajicich snimku."""
+        if self._head is not None:
+            if not self._head:
+                return []
+            # Kratky stream: stejne jako offline vypocet pres cele (kratke) video.
+            names = ("pose", "left_hand", "right_hand", "lips", "left_ok", "right_ok")
+            landmarks = {
+                name: np.asarray([frame[i] for frame in self._head], dtype=LANDMARK_SHAPES[name][1])
+                for i, name in enumerate(names)
+            }
+            features = features_from_landmarks(landmarks)
+            self.frames_out += len(features)
+            self._head = []
+            return list(features)
+
+        for filler in self._fillers:
+            filler.flush()
+        smoothed = []
+        while all(filler.ready for filler in self._fillers):
+            row = np.concatenate([filler.ready.popleft() for filler in self._fillers])
+            out = self._smoother.push(row)
+            if out is not None:
+                smoothed.append(out)
+        smoothed += self._smoother.flush()
+        return self._emit(smoothed)
+
+
+def stream_features(frames, mode="offline", lookahead=0, landmarker=None, options=None):
+    """Generator (index snimku, 243D vektor) nad iterovatelnymi RGB snimky."""
+    extractor = StreamingFeatureExtractor(mode=mode, lookahead=lookahead, landmarker=landmarker, options=options)
+    idx = 0
+    for rgb_frame in frames:
+        for vector in extractor.push_frame(rgb_frame):
+            yield idx, vector
+            idx += 1
+    for vector in extractor.flush():
+        yield idx, vector
+        idx += 1
+
+
+def capture_frames(source, max_frames=None):
+    """RGB snimky z kamery (cislo zarizeni), RTSP/HTTP URL nebo souboru."""
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    try:
+        count = 0
+        while cap.isOpened() and (max_frames is None or count < max_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            count += 1
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        cap.release()
+
+
+def check_offline_equivalence(video_path, options=None):
+    """Porovna offline mode streamu s extract_video na stejnem videu. Vraci max. absolutni rozdil."""
+    options = _resolve_options(options)
+    # Pro oba behy novy landmarker, aby tracking MediaPipe zacinal ze stejneho stavu.
+    reference = extract_video(
+        video_path, landmarker=create_landmarker(options["backend"], **_landmarker_kwargs(options)), options=options
+    )
+    landmarker = create_landmarker(options["backend"], **_landmarker_kwargs(options))
+    streamed = [vec for _, vec in stream_features(capture_frames(video_path), landmarker=landmarker, options=options)]
+    if reference is None:
+        return 0.0 if not streamed else float("inf")
+    if len(streamed) != len(reference):
+        return float("inf")
+    return float(np.max(np.abs(np.stack(streamed) - reference)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online extrakce 243D features z kamery / RTSP / videa")
+    parser.add_argument("--source", default="0", help="Cislo kamery, RTSP/HTTP URL nebo cesta k videu")
+    parser.add_argument("--mode", choices=list(STREAM_MODES), default="offline")
+    parser.add_argument("--lookahead", type=int, default=0, help="Jen --mode causal: zpozdeni v snimcich (0-5)")
+    parser.add_argument("--max_frames", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Ulozit features streamu jako .npy")
+    parser.add_argument(
+        "--check_video",
+        default=None,
+        help="Misto streamu overit, ze offline mode dava na tomto videu stejne features jako extract().",
+    )
+    parser.add_argument("--backend", default=EXTRACT_DEFAULTS["backend"])
+    parser.add_argument("--roi", action="store_true", help="MediaPipe jen na vyrezu kolem osoby (viz extract --roi)")
+    args = parser.parse_args()
+    options = {"backend": args.backend, "roi": args.roi}
+
+    if args.check_video:
+        diff = check_offline_equivalence(args.check_video, options=options)
+        print(f"Max. rozdil stream (offline mode) vs extract(): {diff:.3e}")
+        sys.exit(0 if diff == 0.0 else 1)
+
+    extractor = StreamingFeatureExtractor(mode=args.mode, lookahead=args.lookahead, options=options)
+    collected = []
+    start = time.perf_counter()
+    last_report = start
+    try:
+        for rgb_frame in capture_frames(args.source, max_frames=args.max_frames):
+            collected.extend(extractor.push_frame(rgb_frame))
+            now = time.perf_counter()
+            if now - last_report >= 1.0:
+                fps = extractor.frames_in / (now - start)
+                print(f"snimku {extractor.frames_in} | {fps:.1f} snimku/s | zpozdeni {extractor.latency_frames} snimku")
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    collected.extend(extractor.flush())
+
+    print(f"Hotovo: {len(collected)} vektoru features")
+    if args.output and collected:
+        np.save(args.output, np.stack(collected))
+        print(f"Ulozeno: {args.output}")
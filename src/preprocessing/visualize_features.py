@@ -8,10 +8,12 @@ import os
 from pathlib import Path
 
 try:
+    from utils.feature_store import load_features
     from utils.paths import project_paths
 except ModuleNotFoundError:
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
+    from utils.feature_store import load_features
     from utils.paths import project_paths
 
 # --- DEFINICE PROPOJENÍ PRO HORNÍ POLOVINU TĚLA ---
@@ -208,7 +210,7 @@ def save_pre_post_smoothing_figure(data, out_path):
 
 
 def export_thesis_figures(file_path, output_dir, frame_idx=None):
-    data = np.load(file_path)
+    data = load_features(file_path)
     os.makedirs(output_dir, exist_ok=True)
 
     fig4 = os.path.join(output_dir, "fig_04_skeleton_distances.png")
@@ -234,15 +236,15 @@ def select_feature_file():
     root.withdraw()
     root.attributes('-topmost', True)
     file_path = filedialog.askopenfilename(
-        title="Vyber .npy soubor (218 basic / 243 enhanced)",
-        filetypes=[("NumPy files", "*.npy")]
+        title="Vyber soubor s features (218 basic / 243 enhanced)",
+        filetypes=[("Features", "*.npy *.npz"), ("NumPy files", "*.npy")]
     )
     root.destroy()
     return file_path
 
 def visualize_inhalation_focus(file_path):
     try:
-        data = np.load(file_path)
+        data = load_features(file_path)
         num_frames = len(data)
         num_features = data.shape[1]
         
@@ -390,7 +392,7 @@ def analyze_features(file_path):
     """
     Analytická funkce pro ověření kvality dat pro MS-TCN/ASFormer
     """
-    data = np.load(file_path)
+    data = load_features(file_path)
     num_frames = len(data)
     num_features = data.shape[1]
     
@@ -470,7 +472,7 @@ def visualize_smoothness(file_path):
     """
     Zobrazí plynulost dat v čase - ověření, jestli Savitzky-Golay funguje
     """
-    data = np.load(file_path)
+    data = load_features(file_path)
     num_frames = len(data)
     num_features = data.shape[1]
     
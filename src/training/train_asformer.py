@@ -7,14 +7,20 @@ import torch
 from torch.utils.data import DataLoader
 
 try:
-    from data_io.dataset import InhalerDataset
+    from data_io.batching import LengthBucketBatchSampler, describe_padding, pad_collate
+    from data_io.dataset import WindowedDataset, make_dataset
+    from data_io.sample_cache import format_cache_stats
+    from data_io.transforms import describe_transform, save_checkpoint_transform, training_transform
     from models.asformer import ASFormer
     from utils.paths import project_paths
 except ModuleNotFoundError:
     # Allow direct execution from src/training
     src_root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(src_root))
-    from data_io.dataset import InhalerDataset
+    from data_io.batching import LengthBucketBatchSampler, describe_padding, pad_collate
+    from data_io.dataset import WindowedDataset, make_dataset
+    from data_io.sample_cache import format_cache_stats
+    from data_io.transforms import describe_transform, save_checkpoint_transform, training_transform
     from models.asformer import ASFormer
     from utils.paths import project_paths
 
@@ -23,18 +29,53 @@ EPOCHS = 50
 BATCH_SIZE = 4
 LR = 0.0005
 MAX_LEN = 1000
+# Normalizace features az po nacteni davky (na GPU); ulozi se vedle checkpointu pro inferenci.
+# Vychozi [] = features tak, jak jsou ulozene (vysledky srovnatelne se starsimi checkpointy);
+# napr. ["normalize_skeleton"] normalizaci zapne.
+FEATURE_TRANSFORM = []
+# Navic z-score po kanalech, pokud existuje data/features_enhanced_stats.json (compute_feature_stats.py)
+# spocitany se stejnym FEATURE_TRANSFORM.
+ZSCORE = False
+# Cist vzorky ze zabaleneho datasetu data/features_enhanced_packed (utils/packed_store.py), pokud existuje.
+PACKED_DATASET = True
+# Davky z videi podobne delky (skupiny po BATCH_SIZE * BUCKET_BATCHES), padding jen na nejdelsi video v davce.
+BUCKET_BATCHES = 50
+# Videa delsi nez MAX_LEN: None = jen prvnich MAX_LEN snimku (puvodni chovani, vysledky
+# srovnatelne se starsimi checkpointy), "random" = nahodne okno MAX_LEN snimku v kazde epose,
+# "sliding" = pevna prekryvajici se okna s krokem WINDOW_STRIDE.
+WINDOW_MODE = None
+WINDOW_STRIDE = MAX_LEN // 2
+# Procesy DataLoaderu (0 = nacitani v hlavnim procesu).
+NUM_WORKERS = 0
+# Nactena videa drzet ve sdilene pameti (LRU, rozpocet v GB; 0 = vypnuto) spolecne pro vsechny
+# DataLoader workery. Jen pro features v souborech a NUM_WORKERS > 0 (bez workeru by stala
+# manager proces a blok v /dev/shm zbytecne; v kontejneru /dev/shm zvetsit, napr. --shm-size).
+SAMPLE_CACHE_GB = 4
+# Vyber videi z indexu datasetu (utils/dataset_index.py), napr. {"categories": ["..."], "max_frames": 20000}.
+DATASET_FILTERS = {}
 
 
 def main():
     paths = project_paths(__file__)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    transform = training_transform(paths["features_enhanced"], FEATURE_TRANSFORM, zscore=ZSCORE)
+    print(f"Transformace features: {describe_transform(transform)}")
 
-    dataset = InhalerDataset(
+    dataset = make_dataset(
         str(paths["features_enhanced"]),
         str(paths["labels"]),
         max_len=MAX_LEN,
+        packed=PACKED_DATASET,
+        pad=False,
+        cache_bytes=int(SAMPLE_CACHE_GB * 1e9) if NUM_WORKERS > 0 else 0,
+        filters=DATASET_FILTERS,
     )
-    train_loader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True)
+    sample_cache = getattr(dataset, "cache", None)
+    if WINDOW_MODE is not None:
+        dataset = WindowedDataset(dataset, MAX_LEN, mode=WINDOW_MODE, stride=WINDOW_STRIDE, pad=False)
+        print(f"Okna {MAX_LEN} snimku ({WINDOW_MODE}): {len(dataset)} vzorku z {len(dataset.base)} videi")
+    sampler = LengthBucketBatchSampler(dataset.lengths(), BATCH_SIZE, bucket_batches=BUCKET_BATCHES)
+    train_loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=pad_collate, num_workers=NUM_WORKERS)
 
     model = ASFormer(
         num_layers=8,
@@ -65,17 +106,19 @@ def main():
         MAX_LEN,
         device,
     )
+    logger.info(describe_padding(dataset.lengths(), BATCH_SIZE, MAX_LEN, sampler))
 
     for epoch in range(EPOCHS):
         epoch_start = time.time()
         model.train()
         epoch_loss = 0.0
 
-        for step, (data, target, _lengths) in enumerate(train_loader, start=1):
+        for step, (data, target, _lengths, valid_mask) in enumerate(train_loader, start=1):
             data = data.to(device)
             target = target.to(device)
-
-            valid_mask = target != -100
+            valid_mask = valid_mask.to(device)
+            if transform is not None:
+                data = transform(data)
 
             optimizer.zero_grad()
             output = model(data, mask=valid_mask)
@@ -104,8 +147,11 @@ def main():
             epoch_loss / len(train_loader),
             epoch_time,
         )
+        if sample_cache is not None:
+            logger.info(format_cache_stats(sample_cache.stats()))
 
     torch.save(model.state_dict(), "asformer_attention_v1.pth")
+    save_checkpoint_transform("asformer_attention_v1.pth", transform)
     logger.info("Model ulozen jako asformer_attention_v1.pth")
 
 
@@ -0,0 +1,45 @@
+import os
+import socket
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def tmp_path_for(path):
+    """Docasny soubor vedle `path`; host + pid, aby se nesrazily zapisy z vice stroju do sdileneho data/."""
+    return f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+
+
+@contextmanager
+def atomic_open(path, mode="wb", **kwargs):
+    """
+    Zapis do docasneho souboru vedle `path`, ktery se az po uspesnem zavreni
+    prejmenuje na `path` (os.replace je atomicky i na sdilenem disku).
+    Ctenar tak nikdy nevidi napul zapsany soubor; pri chybe se docasny soubor smaze.
+    Docasny soubor konci na .tmp, takze ho hledani *.npy / *.npz nenajde.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_npy(path, array):
+    """np.save s atomickym prepisem (viz atomic_open)."""
+    with atomic_open(path) as f:
+        np.save(f, array)
+
+
+def save_npz(path, compressed=True, **arrays):
+    """np.savez(_compressed) s atomickym prepisem (viz atomic_open)."""
+    with atomic_open(path) as f:
+        if compressed:
+            np.savez_compressed(f, **arrays)
+        else:
+            np.savez(f, **arrays)
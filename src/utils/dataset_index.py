@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    from utils.atomic_io import atomic_open
+    from utils.feature_meta import feature_meta_path, frame_stride
+    from utils.feature_store import feature_frames, is_feature_file
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/utils/dataset_index.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from utils.atomic_io import atomic_open
+    from utils.feature_meta import feature_meta_path, frame_stride
+    from utils.feature_store import feature_frames, is_feature_file
+    from utils.paths import project_paths
+
+# Index datasetu vedle slozky s features: data/features_enhanced -> data/features_enhanced_index.json
+#   videos: {rel cesta features: {frames, frame_stride, label (rel .txt nebo None), category,
+#            feature_mtime, meta_mtime, label_mtime}}
+#   feature_dirs / label_dirs: {rel slozka: {mtime_ns, subdirs, files}}
+# Obnova kontroluje jen mtime slozek (pridani, smazani i atomicky prepis souboru meni mtime
+# slozky); znovu se prochazi jen zmenene slozky a pocet snimku se cte jen u zmenenych souboru.
+INDEX_VERSION = 2
+
+
+def index_path_for(features_root):
+    return os.path.normpath(str(features_root)) + "_index.json"
+
+
+def category_of(rel_path):
+    """Kategorie = prvni slozka relativni cesty (jako v analyze_dataset_stats), soubory v koreni -> "_root"."""
+    parts = rel_path.split("/")
+    return parts[0] if len(parts) > 1 else "_root"
+
+
+def _join(rel_dir, name):
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def _refresh_dirs(root, known, wanted, full=False):
+    """
+    Aktualni stav slozek pod `root` (bez skrytych); slozka se cte (scandir) jen kdyz se zmenilo jeji mtime.
+    Vraci (slozky, mnozina zmenenych rel slozek).
+    """
+    dirs = {}
+    changed = set()
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            mtime_ns = os.stat(os.path.join(root, rel_dir)).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        entry = known.get(rel_dir)
+        if full or entry is None or entry["mtime_ns"] != mtime_ns:
+            subdirs, files = [], []
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                for item in it:
+                    if item.is_dir():
+                        # Skryte slozky (napr. .label_cache z utils/label_cache) nejsou soucasti datasetu.
+                        if not item.name.startswith("."):
+                            subdirs.append(item.name)
+                    elif wanted(item.name):
+                        files.append(item.name)
+            entry = {"mtime_ns": mtime_ns, "subdirs": sorted(subdirs), "files": sorted(files)}
+            changed.add(rel_dir)
+        dirs[rel_dir] = entry
+        stack.extend(_join(rel_dir, name) for name in entry["subdirs"])
+    return dirs, changed
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+
+def refresh_index(features_root, labels_root, index=None, full=False):
+    """
+    Vytvori nebo inkrementalne obnovi index. `full` = projit vsechny slozky i soubory
+    (napr. po rucnim prepisu souboru na miste, ktery mtime slozky nezmeni).
+    Vraci (index, souhrn {"rescanned_dirs", "updated", "removed"}).
+    """
+    if index is None or index.get("version") != INDEX_VERSION:
+        index = {"version": INDEX_VERSION, "feature_dirs": {}, "label_dirs": {}, "videos": {}}
+    feature_dirs, changed_features = _refresh_dirs(features_root, index["feature_dirs"], is_feature_file, full)
+    label_dirs, changed_labels = _refresh_dirs(labels_root, index["label_dirs"], lambda name: name.endswith(".txt"), full)
+
+    labels = {_join(rel_dir, name) for rel_dir, entry in label_dirs.items() for name in entry["files"]}
+    old_videos = index["videos"]
+    videos = {}
+    updated = 0
+    for rel_dir, entry in feature_dirs.items():
+        for name in entry["files"]:
+            rel = _join(rel_dir, name)
+            old = old_videos.get(rel)
+            label = os.path.splitext(rel)[0] + ".txt"
+            label = label if label in labels else None
+            label_dir = os.path.dirname(label) if label else None
+            video = dict(old) if old else None
+            if video is None or rel_dir in changed_features:
+                feature_path = os.path.join(features_root, rel)
+                feature_mtime = _mtime(feature_path)
+                meta_mtime = _mtime(feature_meta_path(feature_path))
+                if video is None or video["feature_mtime"] != feature_mtime or video["meta_mtime"] != meta_mtime:
+                    # frame_stride (<video>.meta.json) se cte jen tady, ne pri kazdem nacteni labelu.
+                    video = {
+                        "frames": feature_frames(feature_path),
+                        "frame_stride": frame_stride(feature_path),
+                        "feature_mtime": feature_mtime,
+                        "meta_mtime": meta_mtime,
+                    }
+                    updated += 1
+            if label is None:
+                video["label_mtime"] = None
+            elif label != video.get("label") or label_dir in changed_labels or "label_mtime" not in video:
+                video["label_mtime"] = _mtime(os.path.join(labels_root, label))
+            video["label"] = label
+            video["category"] = category_of(rel)
+            videos[rel] = video
+
+    summary = {
+        "rescanned_dirs": len(changed_features) + len(changed_labels),
+        "updated": updated,
+        "removed": len(set(old_videos) - set(videos)),
+    }
+    index.update(
+        {
+            "features_root": os.path.abspath(features_root),
+            "labels_root": os.path.abspath(labels_root),
+            "updated": time.time(),
+            "feature_dirs": feature_dirs,
+            "label_dirs": label_dirs,
+            "videos": videos,
+        }
+    )
+    return index, summary
+
+
+def load_index(features_root, labels_root, refresh=True, full=False):
+    """
+    Index z <features_root>_index.json, obnoveny podle aktualniho stavu disku
+    (a ulozeny, pokud se neco zmenilo). Bez `refresh` se pouzije tak, jak je.
+    """
+    path = index_path_for(features_root)
+    index = None
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if not refresh and index.get("version") == INDEX_VERSION:
+            return index
+    index, summary = refresh_index(features_root, labels_root, index=index, full=full)
+    if any(summary.values()):
+        save_index(path, index)
+    return index
+
+
+def save_index(path, index):
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def video_matches(rel, frames, categories=None, min_frames=None, max_frames=None, include_substring=None):
+    """Filtry videa podle relativni cesty features a poctu snimku (viz select_videos)."""
+    if categories and category_of(rel) not in categories:
+        return False
+    if min_frames is not None and frames < min_frames:
+        return False
+    if max_frames is not None and frames > max_frames:
+        return False
+    return not include_substring or include_substring.lower() in rel.lower()
+
+
+def select_videos(index, labeled=True, **filters):
+    """
+    Videa z indexu splnujici filtry (categories, min_frames, max_frames, include_substring),
+    serazena podle cesty: [(rel, zaznam), ...]. `labeled=None` vrati videa s labelem i bez nej.
+    """
+    selected = []
+    for rel, video in sorted(index["videos"].items()):
+        if labeled is not None and (video["label"] is not None) != labeled:
+            continue
+        if video_matches(rel, video["frames"], **filters):
+            selected.append((rel, video))
+    return selected
+
+
+def add_filter_args(parser):
+    """Spolecne CLI filtry nad indexem (--category, --min_frames, --max_frames, --include_substring)."""
+    parser.add_argument("--category", nargs="+", default=None, help="Jen videa z techto kategorii (prvni slozka)")
+    parser.add_argument("--min_frames", type=int, default=None)
+    parser.add_argument("--max_frames", type=int, default=None)
+    parser.add_argument(
+        "--include_substring",
+        default=None,
+        help="Optional: only videos whose relative feature path contains this text.",
+    )
+
+
+def filters_from_args(args):
+    return {
+        "categories": args.category,
+        "min_frames": args.min_frames,
+        "max_frames": args.max_frames,
+        "include_substring": args.include_substring,
+    }
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Index datasetu (features, pocet snimku, labely, kategorie)")
+    parser.add_argument("--features_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument("--labels_dir", default=str(paths["labels"]))
+    parser.add_argument("--full", action="store_true", help="Projit vsechny soubory, ne jen zmenene slozky")
+    add_filter_args(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.features_dir):
+        print(f"CHYBA: Slozka '{args.features_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = load_index(args.features_dir, args.labels_dir, full=args.full)
+    selected = select_videos(index, labeled=None, **filters_from_args(args))
+    categories = {}
+    for _, video in selected:
+        stats = categories.setdefault(video["category"], [0, 0, 0])
+        stats[0] += 1
+        stats[1] += video["label"] is not None
+        stats[2] += video["frames"]
+
+    print(f"\nIndex: {index_path_for(args.features_dir)} ({time.perf_counter() - start:.2f} s)")
+    print(f"{'Kategorie':<20} {'videi':>6} {'s labely':>9} {'snimku':>10}")
+    for category in sorted(categories):
+        count, labeled, frames = categories[category]
+        print(f"{category:<20} {count:>6} {labeled:>9} {frames:>10}")
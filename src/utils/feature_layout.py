@@ -0,0 +1,32 @@
+# Rozlozeni 243D feature vektoru (sloupce v ulozenem souboru features, viz extract_features_enhanced).
+FEATURE_GROUPS = {
+    "pose": slice(0, 92),            # 23 bodu × (x, y, z, visibility)
+    "left_hand": slice(92, 155),     # 21 bodu × (x, y, z)
+    "right_hand": slice(155, 218),   # 21 bodu × (x, y, z)
+    "distances": slice(218, 229),
+    "angles": slice(229, 237),
+    "hand_config": slice(237, 243),
+}
+FEATURE_DIM = 243
+BASIC_FEATURE_DIM = 218      # starsi features bez odvozenych (jen pose + ruce)
+LEGACY_POSE_DIM = 132        # puvodni format: 33 bodu pozy × (x, y, z, visibility)
+
+POSE_JOINTS = 23
+HAND_JOINTS = 21
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+
+# Sloupce v bloku "distances" (poradi viz _build_features_sequence).
+DISTANCE_NAMES = (
+    "left_wrist_mouth",
+    "right_wrist_mouth",
+    "left_wrist_nose",
+    "right_wrist_nose",
+    "shoulder_width",
+    "nose_left_shoulder_dy",
+    "nose_right_shoulder_dy",
+    "left_upper_arm",
+    "right_upper_arm",
+    "left_forearm",
+    "mouth_opening",
+)
@@ -0,0 +1,46 @@
+import json
+import os
+
+import numpy as np
+
+from utils.atomic_io import atomic_open
+
+FEATURE_META_SUFFIX = ".meta.json"
+
+
+def feature_meta_path(feature_path):
+    """data/features_enhanced/x/video.npy -> data/features_enhanced/x/video.meta.json"""
+    return os.path.splitext(feature_path)[0] + FEATURE_META_SUFFIX
+
+
+def read_feature_meta(feature_path):
+    """Metadata extrakce k .npy (frame_stride, fps, ...); prazdny slovnik u starsich features."""
+    path = feature_meta_path(feature_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_feature_meta(feature_path, meta):
+    with atomic_open(feature_meta_path(feature_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+
+
+def frame_stride(feature_path):
+    """Kolikaty snimek videa odpovida jednomu radku features (1 = kazdy snimek)."""
+    return int(read_feature_meta(feature_path).get("frame_stride", 1))
+
+
+def align_labels(labels, feature_path, stride=None):
+    """
+    Per-frame labely (jeden radek = jeden snimek videa) zarovna na features,
+    ktere byly extrahovany jen z kazdeho N-teho snimku (--target_fps).
+    Se znamym `stride` (napr. z indexu datasetu) se .meta.json necte.
+    """
+    labels = np.atleast_1d(labels)
+    if stride is None:
+        stride = frame_stride(feature_path)
+    if stride > 1:
+        labels = labels[::stride]
+    return labels
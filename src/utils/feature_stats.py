@@ -0,0 +1,110 @@
+import json
+import os
+
+import numpy as np
+
+from utils.atomic_io import atomic_open
+
+STATS_VERSION = 1
+# Kanal s mensi smerodatnou odchylkou (konstantni, napr. nikdy nedetekovana ruka) se nedeli.
+MIN_STD = 1e-6
+
+
+def stats_path_for(features_root):
+    """Statistiky lezi vedle slozky s features: data/features_enhanced -> data/features_enhanced_stats.json."""
+    return os.path.normpath(str(features_root)) + "_stats.json"
+
+
+class ChannelStats:
+    """
+    Prubezne statistiky po kanalech (pocet, prumer, rozptyl, min, max) bez drzeni dat.
+    Davky se pricitaji Welfordovou/Chanovou aktualizaci ve float64, dilci vysledky
+    z vice procesu se slouci pres merge(). NaN se do statistik nepocitaji.
+    """
+
+    def __init__(self, channels):
+        self.count = np.zeros(channels, dtype=np.int64)
+        self.mean = np.zeros(channels, dtype=np.float64)
+        self.m2 = np.zeros(channels, dtype=np.float64)
+        self.min = np.full(channels, np.inf, dtype=np.float64)
+        self.max = np.full(channels, -np.inf, dtype=np.float64)
+
+    @property
+    def channels(self):
+        return len(self.count)
+
+    def update(self, batch):
+        """Pricte davku (N, C)."""
+        batch = np.asarray(batch, dtype=np.float64)
+        valid = ~np.isnan(batch)
+        count = valid.sum(axis=0)
+        if not count.any():
+            return
+        safe = np.where(valid, batch, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, safe.sum(axis=0) / count, 0.0)
+        m2 = (np.where(valid, batch - mean, 0.0) ** 2).sum(axis=0)
+        self._combine(count, mean, m2)
+        self.min = np.fmin(self.min, np.where(valid, batch, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(valid, batch, -np.inf).max(axis=0))
+
+    def merge(self, other):
+        """Slouci statistiky jine casti dat (napr. z jineho workeru)."""
+        self._combine(other.count, other.mean, other.m2)
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, count / total, 0.0)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta**2 * self.count * weight
+        self.count = total
+
+    @property
+    def variance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.m2 / np.maximum(self.count, 1), 0.0)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def to_dict(self):
+        return {
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "var": self.variance.tolist(),
+            "std": self.std.tolist(),
+            "min": np.where(self.count > 0, self.min, 0.0).tolist(),
+            "max": np.where(self.count > 0, self.max, 0.0).tolist(),
+        }
+
+
+def save_stats(path, stats, transforms=None, files=0):
+    """Ulozi statistiky jako JSON; `transforms` = popis transformaci aplikovanych pred vypoctem."""
+    payload = {
+        "version": STATS_VERSION,
+        "channels": stats.channels,
+        "files": files,
+        "transforms": transforms or [],
+        **stats.to_dict(),
+    }
+    with atomic_open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+
+
+def load_stats(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def zscore_params(stats):
+    """(mean, std) jako float32 pole; kanaly s std < MIN_STD maji std 1 (jen se posunou)."""
+    mean = np.asarray(stats["mean"], dtype=np.float32)
+    std = np.asarray(stats["std"], dtype=np.float32)
+    std = np.where(std < MIN_STD, 1.0, std).astype(np.float32)
+    return mean, std
@@ -0,0 +1,218 @@
+import argparse
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from utils.atomic_io import atomic_open, save_npy
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/utils/feature_store.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from utils.atomic_io import atomic_open, save_npy
+    from utils.paths import project_paths
+
+# Format ulozenych features jednoho videa (T, 243):
+#   float32 - puvodni .npy
+#   float16 - .npz, polovicni velikost, ~3 platne cislice
+#   int16   - .npz, po kanalech skalovane na cely rozsah int16 (scale/offset v souboru),
+#             chyba radove 1e-4 rozsahu kanalu
+# Kompaktni formaty se ukladaji po blocich radku (kazdy blok = samostatny clen zipu),
+# s `compressed` kazdy blok zvlast deflate; cteni casti videa nacte jen potrebne bloky.
+FEATURE_FORMATS = ("float32", "float16", "int16")
+FEATURE_SUFFIXES = (".npy", ".npz")
+CHUNK_ROWS = 4096
+_INT16_NAN = np.int16(-32768)
+_INT16_MAX = 32767
+
+
+def is_feature_file(name):
+    return name.endswith(FEATURE_SUFFIXES)
+
+
+def feature_path(path, fmt="float32"):
+    """Cesta k features ve formatu `fmt` (pripona .npy / .npz) pro video s cestou `path` (libovolna pripona)."""
+    if fmt not in FEATURE_FORMATS:
+        raise ValueError(f"Unknown feature format: {fmt}. Use one of: {list(FEATURE_FORMATS)}")
+    return os.path.splitext(path)[0] + (".npy" if fmt == "float32" else ".npz")
+
+
+def find_feature_file(path):
+    """Existujici soubor features videa v libovolnem formatu (nejdrive `path`), jinak None."""
+    if os.path.exists(path):
+        return path
+    stem = os.path.splitext(path)[0]
+    for suffix in FEATURE_SUFFIXES:
+        if os.path.exists(stem + suffix):
+            return stem + suffix
+    return None
+
+
+def _chunk_name(index):
+    return f"features_{index:05d}"
+
+
+def _quantize_int16(features):
+    """Po kanalech: q = round((x - offset) / scale) v <-32767, 32767>, NaN -> -32768."""
+    with np.errstate(invalid="ignore"):
+        low = np.nanmin(features, axis=0) if len(features) else np.zeros(features.shape[1], np.float32)
+        high = np.nanmax(features, axis=0) if len(features) else np.zeros(features.shape[1], np.float32)
+    low = np.nan_to_num(low).astype(np.float64)
+    high = np.nan_to_num(high).astype(np.float64)
+    offset = (low + high) / 2
+    scale = (high - low) / (2 * _INT16_MAX)
+    scale[scale == 0] = 1.0
+    return scale.astype(np.float32), offset.astype(np.float32)
+
+
+def save_features(path, features, fmt="float32", compressed=False):
+    """
+    Ulozi features (T, C) atomicky ve formatu `fmt` a smaze pripadny soubor stejneho
+    videa v jinem formatu. Vraci skutecnou cestu (pripona podle formatu).
+    """
+    path = feature_path(path, fmt)
+    features = np.asarray(features, dtype=np.float32)
+    if fmt == "float32":
+        save_npy(path, features)
+    else:
+        arrays = {"format": np.array(fmt), "shape": np.array(features.shape, dtype=np.int64)}
+        if fmt == "int16":
+            scale, offset = _quantize_int16(features)
+            arrays["scale"], arrays["offset"] = scale, offset
+        for index, start in enumerate(range(0, len(features), CHUNK_ROWS)):
+            block = features[start : start + CHUNK_ROWS]
+            if fmt == "float16":
+                arrays[_chunk_name(index)] = block.astype(np.float16)
+            else:
+                with np.errstate(invalid="ignore"):
+                    q = np.rint((block - offset) / scale)
+                q = np.clip(q, -_INT16_MAX, _INT16_MAX)
+                q = np.nan_to_num(q, nan=_INT16_NAN).astype(np.int16)
+                arrays[_chunk_name(index)] = q
+        with atomic_open(path) as f:
+            (np.savez_compressed if compressed else np.savez)(f, **arrays)
+
+    for suffix in FEATURE_SUFFIXES:
+        other = os.path.splitext(path)[0] + suffix
+        if other != path and os.path.exists(other):
+            os.remove(other)
+    return path
+
+
+def feature_format(path):
+    """Format ulozenych features ("float32" / "float16" / "int16")."""
+    if not path.endswith(".npz"):
+        return "float32"
+    with np.load(path) as data:
+        return str(data["format"])
+
+
+def feature_compressed(path):
+    """True, pokud jsou bloky .npz komprimovane (save_features s `compressed`)."""
+    if not path.endswith(".npz"):
+        return False
+    with zipfile.ZipFile(path) as archive:
+        return any(info.compress_type != zipfile.ZIP_STORED for info in archive.infolist())
+
+
+def feature_frames(path):
+    """Pocet snimku (radku) bez nacteni features."""
+    if not path.endswith(".npz"):
+        return int(np.load(path, mmap_mode="r").shape[0])
+    with np.load(path) as data:
+        return int(data["shape"][0])
+
+
+def load_features(path, start=0, stop=None):
+    """
+    Nacte features (T, C) jako float32 bez ohledu na format ulozeni.
+    `start`/`stop` vyberou jen radky [start, stop); u kompaktnich formatu
+    se ctou jen bloky, ktere je obsahuji.
+    """
+    if not path.endswith(".npz"):
+        if start == 0 and stop is None:
+            return np.load(path).astype(np.float32, copy=False)
+        return np.array(np.load(path, mmap_mode="r")[start:stop], dtype=np.float32)
+
+    with np.load(path) as data:
+        fmt = str(data["format"])
+        total, channels = (int(v) for v in data["shape"])
+        start, stop, _ = slice(start, stop).indices(total)
+        out = np.empty((max(stop - start, 0), channels), dtype=np.float32)
+        if fmt == "int16":
+            scale, offset = data["scale"], data["offset"]
+        for index in range(start // CHUNK_ROWS, (stop + CHUNK_ROWS - 1) // CHUNK_ROWS if stop > start else 0):
+            chunk_start = index * CHUNK_ROWS
+            lo, hi = max(start, chunk_start), min(stop, chunk_start + CHUNK_ROWS)
+            block = data[_chunk_name(index)][lo - chunk_start : hi - chunk_start]
+            target = out[lo - start : hi - start]
+            if fmt == "int16":
+                np.multiply(block, scale, out=target)
+                target += offset
+                target[block == _INT16_NAN] = np.nan
+            else:
+                target[:] = block
+    return out
+
+
+def convert_tree(features_root, fmt, compressed=False, include_substring=None):
+    """
+    Prevede vsechny features ve strome do formatu `fmt` (na miste, soubory uz ve
+    formatu `fmt` preskoci). Vraci (pocet souboru, bajtu pred, bajtu po).
+    """
+    converted = 0
+    before = after = 0
+    failures = []
+    for root, _, files in os.walk(features_root):
+        for name in sorted(files):
+            if not is_feature_file(name):
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, features_root).replace("\\", "/")
+            if include_substring and include_substring.lower() not in rel.lower():
+                continue
+            try:
+                if feature_format(path) == fmt:
+                    continue
+                size = os.path.getsize(path)
+                new_path = save_features(path, load_features(path), fmt=fmt, compressed=compressed)
+            except Exception as exc:
+                failures.append((rel, f"{type(exc).__name__}: {exc}"))
+                continue
+            before += size
+            after += os.path.getsize(new_path)
+            converted += 1
+            print(f"  ✓ {rel} -> {os.path.basename(new_path)}")
+    if failures:
+        print(f"Selhalo {len(failures)} souboru:")
+        for rel, error in failures:
+            print(f"  ❌ {rel}: {error}")
+    return converted, before, after
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Prevod ulozenych features do kompaktniho formatu (float16 / int16)")
+    parser.add_argument("--features_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument("--format", choices=list(FEATURE_FORMATS), default="int16")
+    parser.add_argument("--compress", action="store_true", help="Kazdy blok radku navic komprimovat (deflate)")
+    parser.add_argument("--include_substring", default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.features_dir):
+        print(f"CHYBA: Slozka '{args.features_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    count, size_before, size_after = convert_tree(
+        args.features_dir, args.format, compressed=args.compress, include_substring=args.include_substring
+    )
+    print("\n=== HOTOVO ===")
+    print(f"Prevedeno: {count} souboru za {time.perf_counter() - start:.1f} s")
+    if size_after:
+        print(f"Velikost: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB ({size_before / size_after:.1f}x mensi)")
@@ -0,0 +1,145 @@
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from utils.atomic_io import atomic_open
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/utils/label_cache.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from utils.atomic_io import atomic_open
+    from utils.paths import project_paths
+
+# Kompaktni binarni kopie labelu (jeden int na radek v .txt) ve skryte podslozce:
+# data/labels/x/video.txt -> data/labels/x/.label_cache/video.labels.rle
+# Mimo slozku s .txt, aby zapis cache nemenil jeji mtime (utils/dataset_index obnovuje
+# index podle mtime slozek a skryte slozky preskakuje).
+# Soubor = hlavicka (LABEL_CACHE_HEADER: znacka, velikost, mtime_ns a crc32 textu, priznak
+# "racy") + labely jako RLE dvojice int32 (hodnota, delka useku); anotace jsou dlouhe useky
+# stejne akce, cache ma tak jen stovky bajtu.
+# Cache je platna, kdyz sedi velikost i mtime. Kdyz vznikla ve stejnem "tiku" mtime jako .txt
+# (sitove / FAT disky maji hrube rozliseni), mohl byt .txt prepsan beze zmeny mtime i velikosti
+# (jina cislice), proto se u takove ("racy") cache overuje i crc32, dokud ji dalsi cteni neprepise
+# jako jistou.
+LABEL_CACHE_DIR = ".label_cache"
+LABEL_CACHE_SUFFIX = ".labels.rle"
+LABEL_CACHE_MAGIC = b"LRL1"
+LABEL_CACHE_HEADER = struct.Struct("<4sqqI?3x")
+# Nejhrubsi bezne rozliseni mtime (FAT: 2 s).
+MTIME_RESOLUTION_NS = 2_000_000_000
+
+
+def label_cache_path(label_path):
+    folder, name = os.path.split(label_path)
+    return os.path.join(folder, LABEL_CACHE_DIR, os.path.splitext(name)[0] + LABEL_CACHE_SUFFIX)
+
+
+def _crc32(label_path):
+    with open(label_path, "rb") as f:
+        return zlib.crc32(f.read())
+
+
+def _encode(labels):
+    """Labely -> RLE dvojice (hodnota, delka) int32."""
+    labels = np.asarray(labels, dtype=np.int64)
+    if len(labels) == 0:
+        return np.zeros((0, 2), dtype="<i4")
+    starts = np.flatnonzero(np.diff(labels, prepend=labels[0] - 1))
+    lengths = np.diff(np.append(starts, len(labels)))
+    return np.stack([labels[starts], lengths], axis=1).astype("<i4")
+
+
+def _read_cache(label_path, stat):
+    """(labely int64, racy) z cache, nebo None, kdyz cache chybi nebo neodpovida .txt."""
+    try:
+        with open(label_cache_path(label_path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < LABEL_CACHE_HEADER.size or (len(data) - LABEL_CACHE_HEADER.size) % 8:
+        return None
+    magic, size, mtime_ns, crc, racy = LABEL_CACHE_HEADER.unpack_from(data)
+    if magic != LABEL_CACHE_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return None
+    if racy and crc != _crc32(label_path):
+        return None
+    runs = np.frombuffer(data, dtype="<i4", offset=LABEL_CACHE_HEADER.size).reshape(-1, 2)
+    return np.repeat(runs[:, 0].astype(np.int64), runs[:, 1]), racy
+
+
+def cache_labels(label_path, force=False):
+    """Vytvori (nebo obnovi zastaralou ci racy) cache labelu. Vraci True, pokud se zapisovalo."""
+    stat = os.stat(label_path)
+    cached = None if force else _read_cache(label_path, stat)
+    racy = time.time_ns() - stat.st_mtime_ns < MTIME_RESOLUTION_NS
+    if cached is not None and (not cached[1] or racy):
+        return False
+    # Racy cache s platnym crc32 se jen prepise jako jista (bez noveho parsovani).
+    labels = cached[0] if cached is not None else np.loadtxt(label_path, dtype=np.int64, ndmin=1)
+    header = LABEL_CACHE_HEADER.pack(LABEL_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, _crc32(label_path), racy)
+    with atomic_open(label_cache_path(label_path)) as f:
+        f.write(header)
+        f.write(_encode(labels).tobytes())
+    # Cache z predchozich verzi lezela primo vedle .txt.
+    legacy = os.path.splitext(label_path)[0] + ".labels.npy"
+    if os.path.exists(legacy):
+        os.remove(legacy)
+    return True
+
+
+def load_labels(label_path):
+    """
+    Labely videa jako int64 pole, misto np.loadtxt z binarni cache (pri prvnim cteni
+    nebo po zmene .txt se cache vytvori). Kdyz cache nejde zapsat (napr. jen pro cteni),
+    labely se ctou primo z .txt.
+    """
+    cached = _read_cache(label_path, os.stat(label_path))
+    if cached is not None and not cached[1]:
+        return cached[0]
+    try:
+        cache_labels(label_path)
+    except OSError:
+        return cached[0] if cached is not None else np.loadtxt(label_path, dtype=np.int64, ndmin=1)
+    return _read_cache(label_path, os.stat(label_path))[0]
+
+
+def cache_tree(labels_root, force=False):
+    """Prevede vsechny .txt labely ve strome. Vraci (souboru celkem, prepocitano)."""
+    total = written = 0
+    for root, dirs, files in os.walk(labels_root):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in sorted(files):
+            if not name.endswith(".txt"):
+                continue
+            total += 1
+            path = os.path.join(root, name)
+            try:
+                written += cache_labels(path, force=force)
+            except ValueError as exc:
+                print(f"  ❌ {os.path.relpath(path, labels_root)}: {exc}")
+    return total, written
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Binarni cache labelu (.txt -> .label_cache/*.labels.rle)")
+    parser.add_argument("--labels_dir", default=str(paths["labels"]))
+    parser.add_argument("--force", action="store_true", help="Prepocitat i aktualni cache")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.labels_dir):
+        print(f"CHYBA: Slozka '{args.labels_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    total, written = cache_tree(args.labels_dir, force=args.force)
+    print("\n=== HOTOVO ===")
+    print(f"Labelu: {total} | prepocitano: {written} | aktualnich: {total - written} | cas: {time.perf_counter() - start:.1f} s")
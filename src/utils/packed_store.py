@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from utils.atomic_io import atomic_open, tmp_path_for
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import load_index, select_videos
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
+    from utils.paths import project_paths
+except ModuleNotFoundError:
+    # Allow running this file directly: py src/utils/packed_store.py
+    src_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(src_root))
+    from utils.atomic_io import atomic_open, tmp_path_for
+    from utils.feature_meta import align_labels
+    from utils.dataset_index import load_index, select_videos
+    from utils.feature_store import load_features
+    from utils.label_cache import load_labels
+    from utils.paths import project_paths
+
+# Zabaleny dataset: features vsech videi v jednom souvislem poli (sum T, C) float32,
+# labely ve stejne dlouhem poli int64 (-100 kde label chybi) a index
+# [{"video", "label", "offset", "frames", "labels"}, ...]. Pole se otviraji
+# pres mmap, vzorek je jen pohled (slice) bez kopirovani a bez otevirani souboru.
+PACK_VERSION = 2
+IGNORE_LABEL = -100
+
+
+def packed_root_for(features_root):
+    """Zabaleny dataset lezi vedle slozky s features: data/features_enhanced -> data/features_enhanced_packed."""
+    return os.path.normpath(str(features_root)) + "_packed"
+
+
+def pack_paths(pack_root):
+    return {
+        "features": os.path.join(pack_root, "features.npy"),
+        "labels": os.path.join(pack_root, "labels.npy"),
+        "index": os.path.join(pack_root, "index.json"),
+    }
+
+
+def pack_features(features_root, labels_root, pack_root):
+    """
+    Zabali features a labely vsech olabelovanych videi do `pack_root`.
+    Pole se zapisuji do docasnych souboru a prejmenuji az na konci; stary index se smaze
+    pred prejmenovanim a novy se zapise jako posledni. Ctenar tak nikdy neuvidi napul
+    zapsany ani smichany (nove features, stare labely) dataset. Vraci seznam polozek indexu.
+    """
+    videos = select_videos(load_index(features_root, labels_root))
+    if not videos:
+        return []
+    pairs = [(rel, video["label"]) for rel, video in videos]
+    frames = [video["frames"] for _, video in videos]
+    strides = [video["frame_stride"] for _, video in videos]
+    total = int(sum(frames))
+    channels = load_features(os.path.join(features_root, pairs[0][0]), 0, 1).shape[1]
+
+    paths = pack_paths(pack_root)
+    os.makedirs(pack_root, exist_ok=True)
+    tmp = {key: tmp_path_for(path) for key, path in paths.items() if key != "index"}
+    features = labels = None
+    entries = []
+    offset = 0
+    try:
+        features = np.lib.format.open_memmap(tmp["features"], mode="w+", dtype=np.float32, shape=(total, channels))
+        labels = np.lib.format.open_memmap(tmp["labels"], mode="w+", dtype=np.int64, shape=(total,))
+        for (rel, label_rel), count, stride in zip(pairs, frames, strides):
+            feature_path = os.path.join(features_root, rel)
+            label_path = os.path.join(labels_root, label_rel)
+            data = load_features(feature_path)
+            if data.shape != (count, channels):
+                raise ValueError(f"{rel}: ocekavan tvar {(count, channels)}, nalezen {data.shape}")
+            gt = align_labels(load_labels(label_path), feature_path, stride=stride)[:count]
+            features[offset : offset + count] = data
+            labels[offset : offset + len(gt)] = gt
+            labels[offset + len(gt) : offset + count] = IGNORE_LABEL
+            entries.append(
+                {
+                    "video": rel,
+                    "label": label_rel,
+                    "offset": offset,
+                    "frames": count,
+                    "labels": len(gt),
+                    "frame_stride": stride,
+                    "feature_mtime": os.path.getmtime(feature_path),
+                    "label_mtime": os.path.getmtime(label_path),
+                }
+            )
+            offset += count
+        features.flush()
+        labels.flush()
+        # Mmapy zavrit pred prejmenovanim (Windows neprejmenuje otevreny soubor).
+        features = labels = None
+
+        # Bez index.json dataset neexistuje (PackedFeatures.exists): kdyz selze druhe prejmenovani,
+        # nikdo neotevre nove features se starymi labely.
+        if os.path.exists(paths["index"]):
+            os.remove(paths["index"])
+        os.replace(tmp["features"], paths["features"])
+        os.replace(tmp["labels"], paths["labels"])
+    except BaseException:
+        features = labels = None
+        for path in tmp.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    index = {
+        "version": PACK_VERSION,
+        "features_root": os.path.abspath(features_root),
+        "labels_root": os.path.abspath(labels_root),
+        "created": time.time(),
+        "frames": total,
+        "channels": channels,
+        "videos": entries,
+    }
+    with atomic_open(paths["index"], "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return entries
+
+
+class PackedFeatures:
+    """
+    Cteni zabaleneho datasetu (pack_features). `sample(i)` vraci pohledy
+    (features (T, C), labely (L,)) do mmap poli, L = pocet snimku s labelem.
+    Pole se otviraji az pri prvnim pristupu, takze objekt jde levne predat
+    do procesu DataLoader workeru (pickle neprenasi data).
+    """
+
+    def __init__(self, pack_root):
+        self.pack_root = pack_root
+        self.paths = pack_paths(pack_root)
+        with open(self.paths["index"], "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.entries = self.index["videos"]
+        self._features = None
+        self._labels = None
+        self._positions = None
+
+    @staticmethod
+    def exists(pack_root):
+        return os.path.exists(pack_paths(pack_root)["index"])
+
+    def _open(self):
+        self._features = np.load(self.paths["features"], mmap_mode="r")
+        self._labels = np.load(self.paths["labels"], mmap_mode="r")
+        if len(self._features) != self.index["frames"] or len(self._labels) != self.index["frames"]:
+            raise ValueError(f"Zabaleny dataset {self.pack_root} neodpovida indexu, zabalte ho znovu.")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_features"] = None
+        state["_labels"] = None
+        return state
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sample(self, idx):
+        if self._features is None:
+            self._open()
+        entry = self.entries[idx]
+        start = entry["offset"]
+        return self._features[start : start + entry["frames"]], self._labels[start : start + entry["labels"]]
+
+    def __getitem__(self, idx):
+        return self.sample(idx)
+
+    def pairs(self):
+        """(cesta k features, cesta k labelum) puvodnich souboru, ve stejnem poradi jako vzorky."""
+        return [
+            (
+                os.path.join(self.index["features_root"], entry["video"]),
+                os.path.join(self.index["labels_root"], entry["label"]),
+            )
+            for entry in self.entries
+        ]
+
+    def stale_reason(self, index=None):
+        """
+        Proc zabaleny dataset neodpovida aktualnim souborum, nebo None, kdyz odpovida.
+        Mnozina videi, pocty snimku a frame_stride se porovnaji s indexem datasetu,
+        mtime features a labelu primo se soubory (anotator prepisuje labely na miste,
+        coz mtime slozky a tedy ani index nezmeni).
+        """
+        if self.index.get("version") != PACK_VERSION:
+            return f"verze {self.index.get('version')}, aktualni je {PACK_VERSION}"
+        if index is None:
+            index = load_index(self.index["features_root"], self.index["labels_root"])
+        current = dict(select_videos(index))
+        packed = {entry["video"]: entry for entry in self.entries}
+        added = sorted(set(current) - set(packed))
+        if added:
+            return f"{len(added)} novych videi (napr. {added[0]})"
+        removed = sorted(set(packed) - set(current))
+        if removed:
+            return f"{len(removed)} videi uz neexistuje nebo nema label (napr. {removed[0]})"
+        for (feature_path, label_path), entry in zip(self.pairs(), self.entries):
+            video = current[entry["video"]]
+            for key in ("label", "frames", "frame_stride"):
+                if entry[key] != video[key]:
+                    return f"{entry['video']}: zmenene {key}"
+            if entry["feature_mtime"] != os.path.getmtime(feature_path):
+                return f"{entry['video']}: zmenene features"
+            if entry["label_mtime"] != os.path.getmtime(label_path):
+                return f"{entry['video']}: zmeneny label"
+        return None
+
+    def index_of(self, feature_path):
+        if self._positions is None:
+            self._positions = {os.path.normpath(path): i for i, (path, _) in enumerate(self.pairs())}
+        return self._positions[os.path.normpath(feature_path)]
+
+
+if __name__ == "__main__":
+    paths = project_paths(__file__)
+    parser = argparse.ArgumentParser(description="Zabaleni features + labelu do jednoho mmap datasetu s indexem")
+    parser.add_argument("--features_dir", default=str(paths["features_enhanced"]))
+    parser.add_argument("--labels_dir", default=str(paths["labels"]))
+    parser.add_argument("--output", default=None, help="Vychozi: data/features_enhanced_packed")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.features_dir):
+        print(f"CHYBA: Slozka '{args.features_dir}' nebyla nalezena!")
+        sys.exit(1)
+
+    output = args.output or packed_root_for(args.features_dir)
+    start = time.perf_counter()
+    entries = pack_features(args.features_dir, args.labels_dir, output)
+    if not entries:
+        print("CHYBA: Nebyly nalezeny zadne features s labely.")
+        sys.exit(1)
+
+    size = os.path.getsize(pack_paths(output)["features"])
+    print("\n=== HOTOVO ===")
+    print(f"Videi: {len(entries)} | snimku: {sum(e['frames'] for e in entries)} | {size / 1e6:.1f} MB")
+    print(f"Cas: {time.perf_counter() - start:.1f} s | ulozeno: {output}")
@@ -20,6 +20,7 @@ def project_paths(start_file: str):
         "data": root / "data",
         "results": root / "results",
         "features_enhanced": root / "data" / "features_enhanced",
+        "landmarks_raw": root / "data" / "landmarks_raw",
         "labels": root / "data" / "labels",
         "raw_videos": root / "data" / "raw_videos",
         "metadata_csv": root / "data" / "video_metadata.csv",